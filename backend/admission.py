@@ -0,0 +1,278 @@
+import os
+import math
+import time
+import asyncio
+import bisect
+import itertools
+from collections import Counter, OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+from rate_limit import TokenBucket
+from deadlines import remaining
+from metrics import METRICS, observe_stage
+
+
+class AdmissionRejected(Exception):
+    """A request was turned away; carries the HTTP status and Retry-After seconds to send."""
+
+    def __init__(self, status_code: int, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class EndpointPolicy:
+    """Admission limits for one class of endpoints (e.g. "search" or "chat")."""
+
+    def __init__(self, name: str, max_in_flight: int, max_queue: int, priority: int = 0,
+                 timeout_seconds: Optional[float] = None, rate_per_minute: float = 0, burst: Optional[float] = None):
+        """
+        Args:
+            name: Endpoint class name
+            max_in_flight: Requests of this class handled at once
+            max_queue: Requests of this class allowed to wait for a slot; more are rejected with 503
+            priority: Lower values are admitted first when slots free up
+            timeout_seconds: Deadline for each request, from arrival (None for no deadline)
+            rate_per_minute: Requests per minute allowed per client (0 for no limit); over it, 429
+            burst: Requests a client may send at once (defaults to ten seconds' worth)
+        """
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.priority = priority
+        self.timeout_seconds = timeout_seconds
+        self.rate_per_minute = rate_per_minute
+        self.burst = burst if burst is not None else max(1.0, rate_per_minute / 6)
+
+    @classmethod
+    def from_env(cls, name: str, max_in_flight: int, max_queue: int, priority: int,
+                 timeout_seconds: float) -> "EndpointPolicy":
+        """Create a policy from ADMISSION_<NAME>_* environment variables, with the given defaults."""
+        prefix = f"ADMISSION_{name.upper()}_"
+        timeout = float(os.getenv(prefix + "TIMEOUT_SECONDS", str(timeout_seconds)))
+        burst = os.getenv(prefix + "BURST")
+        return cls(
+            name,
+            max_in_flight=int(os.getenv(prefix + "MAX_IN_FLIGHT", str(max_in_flight))),
+            max_queue=int(os.getenv(prefix + "MAX_QUEUE", str(max_queue))),
+            priority=int(os.getenv(prefix + "PRIORITY", str(priority))),
+            timeout_seconds=timeout if timeout > 0 else None,
+            rate_per_minute=float(os.getenv(prefix + "RATE_PER_MINUTE", "0")),
+            burst=float(burst) if burst else None
+        )
+
+
+class Ticket:
+    """An admitted request's slot; hand it back with AdmissionController.release()."""
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        self.admitted_at = time.monotonic()
+        self.released = False
+
+
+class AdmissionController:
+    """
+    Decide which API requests run now, wait, or are turned away.
+
+    Each endpoint class has its own in-flight limit and bounded wait queue,
+    and all classes share a total in-flight limit. When a slot frees up the
+    waiting request with the best priority (then the oldest) gets it, so
+    cheap /search calls overtake queued /chat calls; keeping chat's own limit
+    below the total leaves search headroom even when chat is saturated.
+    Requests that would queue past max_queue, or wait longer than
+    queue_timeout (or their deadline), are rejected with 503, and clients
+    over their per-minute rate get 429; both carry a Retry-After hint.
+
+    Admission runs on the event loop and is not thread-safe.
+    """
+
+    def __init__(self, policies: List[EndpointPolicy], max_in_flight: int = 64, queue_timeout: float = 5.0,
+                 max_clients: int = 10000):
+        """
+        Initialize the controller.
+
+        Args:
+            policies: One policy per endpoint class
+            max_in_flight: Requests handled at once across all classes
+            queue_timeout: Longest a request waits for a slot, in seconds
+            max_clients: Per-client rate limit buckets kept (least recently used are dropped)
+        """
+        self.policies = {policy.name: policy for policy in policies}
+        self.max_in_flight = max_in_flight
+        self.queue_timeout = queue_timeout
+        self.max_clients = max_clients
+        self.in_flight: Counter = Counter()
+        self.queued: Counter = Counter()
+        self.admitted: Counter = Counter()
+        self.rejected: Counter = Counter()
+        # Smoothed seconds each class holds a slot, used to estimate Retry-After
+        self.service_seconds: Dict[str, float] = {policy.name: 1.0 for policy in policies}
+        # Waiting requests as (priority, arrival, endpoint, future), kept sorted
+        self._waiters: List[Tuple[int, int, str, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._buckets: "OrderedDict[Tuple[str, str], TokenBucket]" = OrderedDict()
+        self._register_metrics()
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        """Create the controller for the "search" and "chat" endpoint classes from ADMISSION_* variables."""
+        return cls(
+            policies=[
+                EndpointPolicy.from_env("search", max_in_flight=48, max_queue=100, priority=0, timeout_seconds=10),
+                EndpointPolicy.from_env("chat", max_in_flight=16, max_queue=32, priority=1, timeout_seconds=60)
+            ],
+            max_in_flight=int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "64")),
+            queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "5"))
+        )
+
+    def timeout(self, endpoint: str) -> Optional[float]:
+        """Deadline for a request to this endpoint class, in seconds."""
+        return self.policies[endpoint].timeout_seconds
+
+    def _has_room(self, policy: EndpointPolicy) -> bool:
+        return (self.in_flight[policy.name] < policy.max_in_flight
+                and sum(self.in_flight.values()) < self.max_in_flight)
+
+    def _retry_after(self, policy: EndpointPolicy) -> int:
+        # Roughly how long until the requests ahead have drained
+        waiting = self.queued[policy.name] + 1
+        seconds = self.service_seconds[policy.name] * waiting / max(1, policy.max_in_flight)
+        return min(60, max(1, math.ceil(seconds)))
+
+    def _reject(self, policy: EndpointPolicy, status_code: int, reason: str, retry_after: int):
+        self.rejected[(policy.name, reason)] += 1
+        raise AdmissionRejected(status_code, reason, retry_after)
+
+    def _check_rate(self, policy: EndpointPolicy, client_id: str, cost: float):
+        if not policy.rate_per_minute:
+            return
+        key = (policy.name, client_id)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(policy.rate_per_minute / 60, policy.burst)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(key)
+        if cost > bucket.capacity:
+            # A batch bigger than the burst could never be admitted, so say so instead of charging less
+            self._reject(policy, 429, "over_burst", 60)
+        wait = bucket.try_acquire(cost)
+        if wait > 0:
+            self._reject(policy, 429, "rate_limited", max(1, math.ceil(wait)))
+
+    def _grant(self, endpoint: str) -> Ticket:
+        self.in_flight[endpoint] += 1
+        self.admitted[endpoint] += 1
+        return Ticket(endpoint)
+
+    async def admit(self, endpoint: str, client_id: str, cost: float = 1) -> Ticket:
+        """
+        Admit a request, waiting for a slot if needed.
+
+        Args:
+            endpoint: Endpoint class name
+            client_id: Who sent the request, for the per-client rate limit
+            cost: Rate limit tokens the request uses (e.g. a batch's size)
+
+        Returns:
+            The request's ticket, to release when it finishes
+
+        Raises:
+            AdmissionRejected: The client is over its rate, the queue is
+                full, or no slot freed up in time
+        """
+        policy = self.policies[endpoint]
+        self._check_rate(policy, client_id, cost)
+        if self._has_room(policy):
+            return self._grant(endpoint)
+        if self.queued[endpoint] >= policy.max_queue:
+            self._reject(policy, 503, "queue_full", self._retry_after(policy))
+
+        future = asyncio.get_running_loop().create_future()
+        waiter = (policy.priority, next(self._sequence), endpoint, future)
+        bisect.insort(self._waiters, waiter)
+        self.queued[endpoint] += 1
+        timeout = self.queue_timeout
+        left = remaining()
+        if left is not None:
+            timeout = min(timeout, left)
+        started = time.monotonic()
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                # Granted just as the wait ran out; hand the slot straight back
+                self.release(future.result())
+            self._reject(policy, 503, "queue_timeout", self._retry_after(policy))
+        except asyncio.CancelledError:
+            # The client went away; give back a slot granted in the meantime
+            if future.done() and not future.cancelled():
+                self.release(future.result())
+            raise
+        finally:
+            observe_stage("admission_wait", time.monotonic() - started)
+            self.queued[endpoint] -= 1
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+    def release(self, ticket: Ticket):
+        """Free a ticket's slot and admit whoever is next. Releasing twice is a no-op."""
+        if ticket.released:
+            return
+        ticket.released = True
+        self.in_flight[ticket.endpoint] -= 1
+        held = time.monotonic() - ticket.admitted_at
+        previous = self.service_seconds[ticket.endpoint]
+        self.service_seconds[ticket.endpoint] = previous * 0.8 + held * 0.2
+        self._dispatch()
+
+    def _dispatch(self):
+        """Hand free slots to waiters in priority order, skipping classes that are at their own limit."""
+        for waiter in list(self._waiters):
+            if sum(self.in_flight.values()) >= self.max_in_flight:
+                return
+            _, _, endpoint, future = waiter
+            if future.done():
+                self._waiters.remove(waiter)
+                continue
+            if self._has_room(self.policies[endpoint]):
+                self._waiters.remove(waiter)
+                future.set_result(self._grant(endpoint))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get admission counters.
+
+        Returns:
+            Dictionary with, per endpoint class, requests in flight, waiting,
+            admitted and rejected by reason
+        """
+        endpoints = {}
+        for name, policy in self.policies.items():
+            endpoints[name] = {
+                "in_flight": self.in_flight[name],
+                "queued": self.queued[name],
+                "admitted": self.admitted[name],
+                "rejected": {reason: count for (endpoint, reason), count in self.rejected.items() if endpoint == name},
+                "max_in_flight": policy.max_in_flight,
+                "max_queue": policy.max_queue,
+                "service_seconds": round(self.service_seconds[name], 3)
+            }
+        return {"max_in_flight": self.max_in_flight, "endpoints": endpoints}
+
+    def _register_metrics(self):
+        METRICS.callback(
+            "rag_admission_in_flight", "Requests being handled, by endpoint class",
+            lambda: [({"endpoint": name}, self.in_flight[name]) for name in self.policies]
+        )
+        METRICS.callback(
+            "rag_admission_queued", "Requests waiting for a slot, by endpoint class",
+            lambda: [({"endpoint": name}, self.queued[name]) for name in self.policies]
+        )
+        METRICS.callback(
+            "rag_admission_rejected_total", "Requests turned away, by endpoint class and reason",
+            lambda: [({"endpoint": name, "reason": reason}, count) for (name, reason), count in self.rejected.items()],
+            kind="counter"
+        )
@@ -1,10 +1,17 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Dict, Any, Optional
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+from starlette.background import BackgroundTask
+from pydantic import BaseModel, Field
+from typing import List, Dict, Any, Optional, Tuple
 import uvicorn
+import json
 import os
+import asyncio
 import sys
+import time
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 
@@ -12,24 +19,120 @@ from dotenv import load_dotenv
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from rag_agent import RAGAgent
+from sessions import DEFAULT_SESSION_ID
+from metrics import METRICS, REQUEST_SECONDS, RequestProfiler, track_stages, stage_timer, observe_stage
+from compression import CompressionMiddleware
+from admission import AdmissionController, AdmissionRejected, Ticket
+from deadlines import DeadlineExceeded, deadline_scope
+from projection import SNIPPET_CHARS, TEXT_FIELDS, format_document, check_fields, query_terms, encode_cursor, decode_cursor
+from query_router import build_filter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 load_dotenv()
 
 # Initialize RAG Agent
 rag_agent = None
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Initialize and cleanup the RAG agent."""
+# Startup progress reported by /readyz: "starting", "ready" or "failed"
+startup_state = {"status": "starting", "error": None, "agent": None}
+
+# Optional warm-up once the agent is built: "none", "retrieval" or "full" (also primes the LLM)
+WARMUP_MODE = os.getenv("RAG_WARMUP", "none")
+
+class StatsCache:
+    """
+    Snapshot of the /stats payload, refreshed in the background.
+
+    Index stats are a network call for Pinecone, and the conversation store
+    stats may query a database, so /stats serves the latest snapshot and a
+    background task replaces it every ttl_seconds. Polling dashboards then
+    never put a live stats call on the request path.
+    """
+
+    def __init__(self, ttl_seconds: float = 15):
+        self.ttl_seconds = ttl_seconds
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self.updated_at = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def collect(agent: RAGAgent) -> Dict[str, Any]:
+        """Gather index, memory and cache stats from the agent."""
+        stats = agent.get_index_stats()
+        if "error" in stats:
+            raise RuntimeError(stats["error"])
+        return {
+            **stats,
+            "memory": agent.get_memory_stats(),
+            "embedding_cache": agent.get_embedding_cache_stats(),
+            "response_cache": agent.get_response_cache_stats(),
+            "coalescing": agent.get_coalescing_stats(),
+            "retrieval": agent.get_retrieval_stats()
+        }
+
+    async def refresh(self, agent: RAGAgent):
+        """Replace the snapshot, keeping the previous one if collecting fails."""
+        try:
+            self.snapshot = await run_in_threadpool(self.collect, agent)
+            self.updated_at = time.time()
+        except Exception as e:
+            print(f"❌ Error refreshing stats: {e}")
+
+    async def _run(self, agent: RAGAgent):
+        while True:
+            await asyncio.sleep(self.ttl_seconds)
+            await self.refresh(agent)
+
+    def start(self, agent: RAGAgent):
+        """Start refreshing the snapshot in the background."""
+        self.stop()
+        self._task = asyncio.create_task(self._run(agent))
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def age_seconds(self) -> float:
+        return round(time.time() - self.updated_at, 3)
+
+stats_cache = StatsCache(ttl_seconds=float(os.getenv("STATS_TTL_SECONDS", "15")))
+
+async def start_agent():
+    """Build the RAG agent off the event loop so the server is live while clients initialize."""
     global rag_agent
+    agent = RAGAgent(lazy=True)
+    startup_state["agent"] = agent
     try:
-        rag_agent = RAGAgent()
-        print("✅ RAG Agent initialized successfully")
+        await run_in_threadpool(agent.initialize)
+        if WARMUP_MODE in ("retrieval", "full"):
+            await agent.awarm_up(include_llm=WARMUP_MODE == "full")
+        await stats_cache.refresh(agent)
+        stats_cache.start(agent)
+        rag_agent = agent
+        startup_state["status"] = "ready"
+        print(f"✅ RAG Agent initialized successfully in {agent.startup_timings['total_ms']:.0f} ms")
     except Exception as e:
         print(f"❌ Failed to initialize RAG Agent: {e}")
-        rag_agent = None
+        startup_state["status"] = "failed"
+        startup_state["error"] = str(e)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start initializing the RAG agent in the background, and clean it up on shutdown."""
+    global rag_agent
+    startup_task = asyncio.create_task(start_agent())
     yield
     # Cleanup if needed
+    startup_task.cancel()
+    stats_cache.stop()
+    if rag_agent:
+        # Flush buffered conversation turns, stop the condense pool and close the HTTP clients
+        await rag_agent.aclose()
     rag_agent = None
 
 app = FastAPI(
@@ -48,10 +151,43 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large JSON bodies (brotli when installed, otherwise gzip); streams are left alone
+app.add_middleware(CompressionMiddleware, minimum_size=int(os.getenv("RESPONSE_COMPRESSION_MIN_BYTES", "1024")))
+
+profiler = RequestProfiler.from_env()
+
+# In-flight limits, wait queues, per-client rates and deadlines for /search and /chat traffic
+admission = AdmissionController.from_env()
+
+@app.middleware("http")
+async def instrument_requests(request: Request, call_next):
+    """Record request latency by route, profiling the request when RAG_PROFILE_REQUESTS is set."""
+    start = time.perf_counter()
+    with profiler.profile(f"{request.method} {request.url.path}"):
+        response = await call_next(request)
+    route = request.scope.get("route")
+    REQUEST_SECONDS.observe(
+        time.perf_counter() - start,
+        method=request.method,
+        route=getattr(route, "path", "unmatched"),
+        status=response.status_code
+    )
+    return response
+
 # Pydantic models for request/response
+class SearchFilters(BaseModel):
+    types: Optional[List[str]] = None  # prds, sprints, roadmaps
+    sources: Optional[List[str]] = None  # source file names
+    row_start: Optional[int] = None  # CSV chunks overlapping rows row_start..row_end
+    row_end: Optional[int] = None
+
 class ChatRequest(BaseModel):
     message: str
     include_sources: bool = True
+    session_id: str = DEFAULT_SESSION_ID
+    bypass_cache: bool = False
+    filters: Optional[SearchFilters] = None
+    route: bool = True  # let unfiltered questions be routed to the document type they target
 
 class ChatResponse(BaseModel):
     answer: str
@@ -59,14 +195,49 @@ class ChatResponse(BaseModel):
     timestamp: float
     sources: Optional[List[Dict[str, Any]]] = None
     error: Optional[bool] = None
+    cached: Optional[bool] = None
+    prompt_tokens: Optional[int] = None
+    timings: Optional[Dict[str, Any]] = None
+
+# Deepest result a /search cursor can page to, and the largest k
+MAX_SEARCH_RESULTS = int(os.getenv("RAG_MAX_SEARCH_RESULTS", "100"))
 
 class SearchRequest(BaseModel):
     query: str
-    k: int = 5
+    k: int = Field(5, ge=1, le=MAX_SEARCH_RESULTS)  # results per page
+    fields: Optional[List[str]] = None  # e.g. ["id", "snippet"]; defaults to id, content, metadata, type, source
+    snippet_chars: int = SNIPPET_CHARS
+    cursor: Optional[str] = None
+    filters: Optional[SearchFilters] = None
+    route: bool = True
 
 class SearchResponse(BaseModel):
     documents: List[Dict[str, Any]]
     query: str
+    timings: Optional[Dict[str, Any]] = None
+    next_cursor: Optional[str] = None
+
+class SearchBatchRequest(BaseModel):
+    queries: List[str]
+    k: int = Field(5, ge=1, le=MAX_SEARCH_RESULTS)
+    fields: Optional[List[str]] = None
+    snippet_chars: int = SNIPPET_CHARS
+    filters: Optional[SearchFilters] = None  # applied to every query
+    route: bool = True
+
+class SearchBatchItem(BaseModel):
+    query: str
+    documents: List[Dict[str, Any]] = []
+    error: Optional[str] = None
+
+class SearchBatchResponse(BaseModel):
+    results: List[SearchBatchItem]
+
+class ChatBatchRequest(BaseModel):
+    requests: List[ChatRequest]
+
+class ChatBatchResponse(BaseModel):
+    responses: List[ChatResponse]
 
 class StatsResponse(BaseModel):
     index_name: str
@@ -74,9 +245,127 @@ class StatsResponse(BaseModel):
     dimension: int
     namespaces: Dict[str, Any]
     index_fullness: float
+    memory: Optional[Dict[str, Any]] = None
+    embedding_cache: Optional[Dict[str, Any]] = None
+    response_cache: Optional[Dict[str, Any]] = None
+    coalescing: Optional[Dict[str, Any]] = None
+    retrieval: Optional[Dict[str, Any]] = None
+    admission: Optional[Dict[str, Any]] = None
+    stats_age_seconds: Optional[float] = None
 
 class HistoryResponse(BaseModel):
     history: List[Dict[str, str]]
+    session_id: str = DEFAULT_SESSION_ID
+    total: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+MAX_BATCH_SIZE = int(os.getenv("RAG_MAX_BATCH_SIZE", "100"))
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with orjson when it is installed."""
+
+    def render(self, content: Any) -> bytes:
+        if orjson is None:
+            return super().render(content)
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+def dumps(content: Any) -> str:
+    """Serialize a value to a JSON string, with orjson when it is installed."""
+    if orjson is None:
+        return json.dumps(content)
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode("utf-8")
+
+def format_documents(docs, fields: List[str] = None, query: str = "",
+                     snippet_chars: int = SNIPPET_CHARS) -> List[Dict[str, Any]]:
+    """Convert retrieved documents into the JSON shape returned by the search endpoints, keeping only `fields`."""
+    fields = check_fields(fields)
+    terms = query_terms(query) if "snippet" in fields else None
+    return [format_document(doc, fields, terms, snippet_chars) for doc in docs]
+
+async def with_text(docs, fields: List[str] = None):
+    """Fetch the docstore text for results whose fields need it; id, type and source come from the index."""
+    if set(check_fields(fields)) & set(TEXT_FIELDS):
+        return await rag_agent.ahydrate(docs)
+    return docs
+
+async def search_results(query: str, end: int, filter: Optional[Dict[str, Any]], route: bool,
+                         fields: List[str] = None) -> Tuple[List[Any], bool]:
+    """
+    The first `end` results of a search, with what `fields` needs, and whether more follow.
+    
+    Hits the docstore can't fill in are dropped (see ChunkDocstore.hydrate)
+    before the results are paged, and the search is widened to refill
+    them, so a page holds k results and cursor offsets count results
+    actually returned.
+    """
+    # Fetch one result past `end` to know whether there is another page
+    k = min(end + 1, MAX_SEARCH_RESULTS)
+    while True:
+        docs = await rag_agent.asearch_documents(query, k=k, filter=filter, route=route, with_text=False)
+        results = await with_text(docs, fields)
+        if len(results) > end or len(docs) < k or k == MAX_SEARCH_RESULTS:
+            return results[:end], len(results) > end
+        k = min(k + len(docs) - len(results), MAX_SEARCH_RESULTS)
+
+def render(model: BaseModel) -> JSONResponse:
+    """Serialize a response model to JSON, timed as the "serialize" stage."""
+    with stage_timer("serialize"):
+        if orjson is None:
+            return JSONResponse(content=jsonable_encoder(model))
+        return FastJSONResponse(content=model.model_dump())
+
+def client_id(request: Request) -> str:
+    """Identify the caller for per-client rate limits: the X-Client-Id header, else the client address."""
+    return request.headers.get("x-client-id") or (request.client.host if request.client else "unknown")
+
+def request_timeout(request: Request, endpoint: str) -> Optional[float]:
+    """Seconds the request may take: the endpoint's deadline, shortened by an X-Request-Timeout header."""
+    timeout = admission.timeout(endpoint)
+    try:
+        requested = float(request.headers.get("x-request-timeout", "0"))
+    except ValueError:
+        requested = 0
+    if requested > 0:
+        timeout = min(timeout, requested) if timeout else requested
+    return timeout
+
+async def admit(request: Request, endpoint: str, cost: float = 1) -> Ticket:
+    """Wait for an admission slot, turning rejections into 429/503 responses with Retry-After."""
+    try:
+        return await admission.admit(endpoint, client_id(request), cost)
+    except AdmissionRejected as e:
+        if e.reason == "over_burst":
+            detail = "Batch is larger than the per-client burst allows"
+        else:
+            detail = "Too many requests" if e.status_code == 429 else "Server busy"
+        raise HTTPException(status_code=e.status_code, detail=f"{detail} ({e.reason})",
+                            headers={"Retry-After": str(e.retry_after)})
+
+@asynccontextmanager
+async def admitted(request: Request, endpoint: str, cost: float = 1):
+    """Run the enclosed handler under the request's deadline, holding an admission slot."""
+    with deadline_scope(request_timeout(request, endpoint)):
+        ticket = await admit(request, endpoint, cost)
+        try:
+            yield
+        finally:
+            admission.release(ticket)
+
+def metadata_filter(filters: Optional[SearchFilters]) -> Optional[Dict[str, Any]]:
+    """Turn a request's filters into a metadata filter, rejecting invalid ones with 400."""
+    if filters is None:
+        return None
+    try:
+        return build_filter(filters.types, filters.sources, filters.row_start, filters.row_end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def check_batch_size(size: int):
+    """Reject empty or oversized batches."""
+    if size == 0:
+        raise HTTPException(status_code=400, detail="Batch must not be empty")
+    if size > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"Batch size {size} exceeds the limit of {MAX_BATCH_SIZE}")
 
 # API Endpoints
 @app.get("/")
@@ -84,6 +373,23 @@ async def root():
     """Health check endpoint."""
     return {"message": "RAG Agent API is running", "status": "healthy"}
 
+@app.get("/livez")
+async def liveness():
+    """Liveness probe: the process is up and serving, whether or not the agent is ready."""
+    return {"status": "alive"}
+
+@app.get("/readyz")
+async def readiness():
+    """Readiness probe: 200 once the agent is built, 503 while starting or after a failed start."""
+    agent = startup_state["agent"]
+    body = {
+        "status": startup_state["status"],
+        "phases": dict(agent.startup_timings) if agent is not None else {}
+    }
+    if startup_state["error"]:
+        body["error"] = startup_state["error"]
+    return JSONResponse(body, status_code=200 if rag_agent is not None else 503)
+
 @app.get("/health")
 async def health_check():
     """Detailed health check."""
@@ -92,73 +398,241 @@ async def health_check():
     return {"status": "healthy", "agent_initialized": True}
 
 @app.post("/chat", response_model=ChatResponse)
-async def chat(request: ChatRequest):
+async def chat(request: ChatRequest, http_request: Request):
     """Send a message to the RAG agent and get a response."""
     if rag_agent is None:
         raise HTTPException(status_code=503, detail="RAG Agent not initialized")
+    filter = metadata_filter(request.filters)
     
-    try:
-        response = rag_agent.ask(request.message, include_sources=request.include_sources)
-        return ChatResponse(**response)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error processing chat: {str(e)}")
+    async with admitted(http_request, "chat"):
+        try:
+            response = await rag_agent.aask(
+                request.message,
+                include_sources=request.include_sources,
+                session_id=request.session_id,
+                use_cache=not request.bypass_cache,
+                filter=filter,
+                route=request.route
+            )
+            return render(ChatResponse(**response))
+        except DeadlineExceeded as e:
+            raise HTTPException(status_code=504, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error processing chat: {str(e)}")
+
+@app.post("/chat/stream")
+async def chat_stream(request: ChatRequest, http_request: Request):
+    """
+    Stream a response from the RAG agent as Server-Sent Events.
+    
+    Sends a "sources" event once retrieval finishes, a "token" event per LLM
+    token, and a final "done" event with the full answer and timings. If the
+    request's deadline passes mid-stream, the stream ends with a
+    "deadline_exceeded" event instead (the status line has already been
+    sent, so it cannot be a 504). The admission slot is held until the
+    stream ends.
+    """
+    if rag_agent is None:
+        raise HTTPException(status_code=503, detail="RAG Agent not initialized")
+    filter = metadata_filter(request.filters)
+    
+    # Admit before responding so rejections are real 429/503 responses, not stream events
+    with deadline_scope(request_timeout(http_request, "chat")) as deadline:
+        ticket = await admit(http_request, "chat")
+    
+    async def event_stream():
+        try:
+            with deadline_scope(deadline - time.monotonic() if deadline is not None else None):
+                serialize_seconds = 0.0
+                async for event in rag_agent.astream_ask(request.message, include_sources=request.include_sources,
+                                                         session_id=request.session_id, filter=filter, route=request.route):
+                    start = time.perf_counter()
+                    frame = f"event: {event['event']}\ndata: {dumps(event)}\n\n"
+                    serialize_seconds += time.perf_counter() - start
+                    yield frame
+                observe_stage("serialize", serialize_seconds)
+        finally:
+            admission.release(ticket)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Also released here in case the stream is never iterated; releasing is idempotent
+        background=BackgroundTask(admission.release, ticket)
+    )
 
 @app.post("/search", response_model=SearchResponse)
-async def search_documents(request: SearchRequest):
-    """Search for relevant documents without generating a response."""
+async def search_documents(request: SearchRequest, http_request: Request):
+    """
+    Search for relevant documents without generating a response.
+    
+    Returns k results per page; pass next_cursor back as cursor for the next
+    page. fields= limits what each result carries (e.g. ["id", "snippet"]),
+    and filters= restricts the search by document type, source file or CSV
+    rows.
+    """
     if rag_agent is None:
         raise HTTPException(status_code=503, detail="RAG Agent not initialized")
     
+    filter = metadata_filter(request.filters)
     try:
-        docs = rag_agent.search_documents(request.query, k=request.k)
-        documents = []
-        for doc in docs:
-            doc_info = {
-                "content": doc.page_content,
-                "metadata": doc.metadata,
-                "type": doc.metadata.get("type", "unknown"),
-                "source": doc.metadata.get("source", "unknown")
-            }
-            documents.append(doc_info)
-        
-        return SearchResponse(documents=documents, query=request.query)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error searching documents: {str(e)}")
+        # A cursor only pages the search it came from, filters included. Whether the
+        # fields need text matters too: that decides whether undisplayable hits count
+        needs_text = bool(set(check_fields(request.fields)) & set(TEXT_FIELDS))
+        scope = dumps([request.query, filter, request.route, needs_text])
+        offset = decode_cursor(request.cursor, scope) if request.cursor else 0
+        if offset >= MAX_SEARCH_RESULTS:
+            raise ValueError(f"Cannot page past the first {MAX_SEARCH_RESULTS} results")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    async with admitted(http_request, "search"):
+        try:
+            end = min(offset + request.k, MAX_SEARCH_RESULTS)
+            with track_stages() as timings:
+                results, more = await search_results(request.query, end, filter, request.route, request.fields)
+            next_cursor = encode_cursor(end, scope) if more else None
+            return render(SearchResponse(
+                documents=format_documents(results[offset:], request.fields, request.query, request.snippet_chars),
+                query=request.query,
+                timings=timings,
+                next_cursor=next_cursor
+            ))
+        except DeadlineExceeded as e:
+            raise HTTPException(status_code=504, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error searching documents: {str(e)}")
+
+@app.post("/search/batch", response_model=SearchBatchResponse)
+async def search_documents_batch(request: SearchBatchRequest, http_request: Request):
+    """Run several searches with one embedding call; failures are reported per query."""
+    if rag_agent is None:
+        raise HTTPException(status_code=503, detail="RAG Agent not initialized")
+    check_batch_size(len(request.queries))
+    try:
+        check_fields(request.fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    filter = metadata_filter(request.filters)
+    
+    async with admitted(http_request, "search", cost=len(request.queries)):
+        try:
+            results = await rag_agent.asearch_documents_batch(
+                request.queries, k=request.k, filter=filter, route=request.route, with_text=False
+            )
+        except DeadlineExceeded as e:
+            raise HTTPException(status_code=504, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error searching documents: {str(e)}")
+    
+    items = []
+    for query, result in zip(request.queries, results):
+        if isinstance(result, Exception):
+            items.append(SearchBatchItem(query=query, error=str(result)))
+        else:
+            items.append(SearchBatchItem(
+                query=query,
+                documents=format_documents(await with_text(result, request.fields), request.fields, query,
+                                           request.snippet_chars)
+            ))
+    return render(SearchBatchResponse(results=items))
+
+@app.post("/chat/batch", response_model=ChatBatchResponse)
+async def chat_batch(request: ChatBatchRequest, http_request: Request):
+    """Answer several messages under a concurrency cap; failures are reported per item."""
+    if rag_agent is None:
+        raise HTTPException(status_code=503, detail="RAG Agent not initialized")
+    check_batch_size(len(request.requests))
+    filters = [metadata_filter(item.filters) for item in request.requests]
+    
+    async with admitted(http_request, "chat", cost=len(request.requests)):
+        try:
+            responses = await rag_agent.aask_batch([
+                {
+                    "question": item.message,
+                    "include_sources": item.include_sources,
+                    "session_id": item.session_id,
+                    "use_cache": not item.bypass_cache,
+                    "filter": filter,
+                    "route": item.route
+                }
+                for item, filter in zip(request.requests, filters)
+            ])
+            return render(ChatBatchResponse(responses=[ChatResponse(**response) for response in responses]))
+        except DeadlineExceeded as e:
+            raise HTTPException(status_code=504, detail=str(e))
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error processing chat batch: {str(e)}")
 
 @app.get("/stats", response_model=StatsResponse)
 async def get_stats():
-    """Get statistics about the vector store index."""
+    """Get statistics about the vector store index, from a snapshot refreshed every STATS_TTL_SECONDS."""
     if rag_agent is None:
         raise HTTPException(status_code=503, detail="RAG Agent not initialized")
     
-    try:
-        stats = rag_agent.get_index_stats()
-        if "error" in stats:
-            raise HTTPException(status_code=500, detail=stats["error"])
-        return StatsResponse(**stats)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting stats: {str(e)}")
+    if stats_cache.snapshot is None:
+        # Only until the first refresh succeeds
+        await stats_cache.refresh(rag_agent)
+        if stats_cache.snapshot is None:
+            raise HTTPException(status_code=500, detail="Error getting stats: index stats unavailable")
+    return render(StatsResponse(
+        **stats_cache.snapshot,
+        admission=admission.stats(),
+        stats_age_seconds=stats_cache.age_seconds()
+    ))
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Expose stage latencies, token counts and cache hit rates in the Prometheus text format."""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/history", response_model=HistoryResponse)
-async def get_history():
-    """Get the current conversation history."""
+async def get_history(session_id: str = Query(DEFAULT_SESSION_ID), limit: Optional[int] = Query(None, ge=1),
+                      cursor: Optional[str] = None):
+    """
+    Get the conversation history for a session.
+    
+    With limit, returns the latest `limit` messages; pass next_cursor back as
+    cursor to page towards older messages. Without it, returns everything.
+    """
     if rag_agent is None:
         raise HTTPException(status_code=503, detail="RAG Agent not initialized")
     
+    # Pages run backwards from the newest message; the cursor is where the next page ends
     try:
-        history = rag_agent.get_conversation_history()
-        return HistoryResponse(history=history)
+        before = decode_cursor(cursor, session_id) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    def read_page():
+        # Only the page is read from the store
+        total = rag_agent.get_history_length(session_id)
+        end = min(before, total) if before is not None else total
+        start = max(end - limit, 0) if limit else 0
+        return rag_agent.get_conversation_history(session_id, start, end - start), start, total
+    
+    try:
+        # Redis and SQLite stores do blocking I/O, so read off the event loop
+        history, start, total = await run_in_threadpool(read_page)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting history: {str(e)}")
+    
+    return render(HistoryResponse(
+        history=history,
+        session_id=session_id,
+        total=total,
+        next_cursor=encode_cursor(start, session_id) if start > 0 else None
+    ))
 
 @app.delete("/history")
-async def clear_history():
-    """Clear the conversation history."""
+async def clear_history(session_id: str = Query(DEFAULT_SESSION_ID)):
+    """Clear the conversation history for a session."""
     if rag_agent is None:
         raise HTTPException(status_code=503, detail="RAG Agent not initialized")
     
     try:
-        rag_agent.clear_memory()
+        await run_in_threadpool(rag_agent.clear_memory, session_id)
         return {"message": "Conversation history cleared successfully"}
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error clearing history: {str(e)}")
@@ -0,0 +1,8 @@
+"""
+Offline benchmarks for the RAG agent API and the ingestion pipeline.
+
+Run from the backend directory:
+
+    python -m benchmarks.load --concurrency 16 --requests 200
+    python -m benchmarks.ingest --embed-latency-ms 50
+"""
@@ -0,0 +1,46 @@
+import os
+from typing import List, Dict, Any
+from langchain_core.documents import Document
+from ingest_loaders import iter_source_files, load_file, make_chunker
+from ingest_manifest import assign_chunk_ids
+
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "copilot-data")
+
+# Questions used to drive /chat and /search; later entries read as follow-ups
+QUESTIONS = [
+    "What are the top priorities on the roadmap for next quarter?",
+    "Write a PRD for a self-serve onboarding checklist.",
+    "Which success metrics should we track for the search feature?",
+    "Summarize the goals of the current sprint.",
+    "Draft release notes for the latest mobile update.",
+    "What dependencies does the analytics dashboard have?",
+    "How should we prioritize the notification redesign?",
+    "What are the acceptance criteria for single sign-on?",
+    "What about the timeline for that?",
+    "Can you expand on the risks?",
+]
+
+
+def load_corpus(data_dir: str = DEFAULT_DATA_DIR) -> Dict[str, Any]:
+    """
+    Load and chunk the data directory the way setup.py does.
+
+    Args:
+        data_dir: Directory containing the prds, sprints and roadmaps folders
+
+    Returns:
+        Dictionary with the file count, loaded documents, chunks (with chunk ids) and chunk stats
+    """
+    chunker = make_chunker()
+    files = 0
+    documents: List[Document] = []
+    chunks: List[Document] = []
+    for folder, filename, file_path in iter_source_files(data_dir):
+        docs = load_file(folder, filename, file_path)
+        file_chunks = chunker.split_documents(docs)
+        assign_chunk_ids(f"{folder}/{filename}", file_chunks)
+        files += 1
+        documents.extend(docs)
+        chunks.extend(file_chunks)
+    return {"files": files, "documents": documents, "chunks": chunks, "chunk_stats": chunker.stats.summary()}
@@ -0,0 +1,204 @@
+import re
+import time
+import asyncio
+import hashlib
+import tempfile
+from typing import List, Dict, Any, Optional, Iterator, AsyncIterator
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.messages import BaseMessage, AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseChatModel
+from langchain_core.callbacks import CallbackManagerForLLMRun, AsyncCallbackManagerForLLMRun
+from vector_backends import LocalVectorIndex, LocalVectorStore
+
+
+ANSWER_WORDS = (
+    "Based on the roadmap and sprint notes the team should prioritize onboarding "
+    "improvements, ship the latency work first, and track activation and retention "
+    "as the success metrics for the next quarter."
+).split()
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Deterministic, offline stand-in for OpenAIEmbeddings.
+
+    Vectors are built with the hashing trick over the words of the text, so
+    texts that share words are close and retrieval behaves plausibly. Each
+    call sleeps for a fixed latency plus a per-text cost to mimic the API.
+    """
+
+    def __init__(self, dimension: int = 256, latency_ms: float = 0.0, per_text_ms: float = 0.0,
+                 model: str = "fake-embedding"):
+        """
+        Initialize the fake model.
+
+        Args:
+            dimension: Vector dimension
+            latency_ms: Fixed delay per call
+            per_text_ms: Additional delay per embedded text
+            model: Model name reported to the embedding cache
+        """
+        self.dimension = dimension
+        self.latency_ms = latency_ms
+        self.per_text_ms = per_text_ms
+        self.model = model
+        self.calls = 0
+        self.texts_embedded = 0
+
+    def vector(self, text: str) -> List[float]:
+        """Embed one text without any artificial latency."""
+        vector = np.zeros(self.dimension, dtype=np.float32)
+        for word in re.findall(r"\w+", text.lower()):
+            digest = hashlib.md5(word.encode("utf-8")).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dimension
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            vector[0] = 1.0
+            norm = 1.0
+        return (vector / norm).tolist()
+
+    def _delay(self, count: int) -> float:
+        self.calls += 1
+        self.texts_embedded += count
+        return (self.latency_ms + self.per_text_ms * count) / 1000
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        time.sleep(self._delay(len(texts)))
+        return [self.vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        time.sleep(self._delay(1))
+        return self.vector(text)
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        await asyncio.sleep(self._delay(len(texts)))
+        return [self.vector(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        await asyncio.sleep(self._delay(1))
+        return self.vector(text)
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline stand-in for ChatOpenAI.
+
+    Returns a fixed-length canned answer. The first token arrives after
+    first_token_ms and each following token after token_ms, both when
+    streaming and (as a total) when invoking.
+    """
+
+    model_name: str = "gpt-3.5-turbo"
+    first_token_ms: float = 0.0
+    token_ms: float = 0.0
+    response_tokens: int = 60
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _tokens(self) -> List[str]:
+        return [ANSWER_WORDS[i % len(ANSWER_WORDS)] + " " for i in range(self.response_tokens)]
+
+    def _total_seconds(self) -> float:
+        return (self.first_token_ms + self.token_ms * max(self.response_tokens - 1, 0)) / 1000
+
+    def _generate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                  run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        time.sleep(self._total_seconds())
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(self._tokens()).strip()))])
+
+    async def _agenerate(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                         run_manager: Optional[AsyncCallbackManagerForLLMRun] = None, **kwargs: Any) -> ChatResult:
+        await asyncio.sleep(self._total_seconds())
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content="".join(self._tokens()).strip()))])
+
+    def _stream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                run_manager: Optional[CallbackManagerForLLMRun] = None, **kwargs: Any) -> Iterator[ChatGenerationChunk]:
+        for i, token in enumerate(self._tokens()):
+            time.sleep((self.first_token_ms if i == 0 else self.token_ms) / 1000)
+            if run_manager:
+                run_manager.on_llm_new_token(token)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+    async def _astream(self, messages: List[BaseMessage], stop: Optional[List[str]] = None,
+                       run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+                       **kwargs: Any) -> AsyncIterator[ChatGenerationChunk]:
+        for i, token in enumerate(self._tokens()):
+            await asyncio.sleep((self.first_token_ms if i == 0 else self.token_ms) / 1000)
+            if run_manager:
+                await run_manager.on_llm_new_token(token)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token))
+
+
+class FakeVectorStore(LocalVectorStore):
+    """
+    LocalVectorStore with artificial network latency, standing in for Pinecone.
+
+    Searches are real (so results depend on the corpus) but each query and
+    upsert first waits as long as a round trip to a hosted index would.
+    """
+
+    def __init__(self, index: LocalVectorIndex, embedding: Embeddings, query_latency_ms: float = 0.0,
+                 upsert_latency_ms: float = 0.0):
+        super().__init__(index, embedding)
+        self.query_latency_ms = query_latency_ms
+        self.upsert_latency_ms = upsert_latency_ms
+
+    def add_embeddings(self, ids: List[str], vectors: List[List[float]], texts: List[str],
+                       metadatas: List[Dict[str, Any]]) -> List[str]:
+        time.sleep(self.upsert_latency_ms / 1000)
+        return super().add_embeddings(ids, vectors, texts, metadatas)
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4,
+                                               filter: Optional[Dict[str, Any]] = None):
+        time.sleep(self.query_latency_ms / 1000)
+        return super().similarity_search_by_vector_with_score(embedding, k=k, filter=filter)
+
+    async def asimilarity_search_by_vector(self, embedding: List[float], k: int = 4,
+                                           filter: Optional[Dict[str, Any]] = None, **kwargs: Any) -> List[Document]:
+        await asyncio.sleep(self.query_latency_ms / 1000)
+        return [doc for doc, _ in super().similarity_search_by_vector_with_score(embedding, k=k, filter=filter)]
+
+    async def asimilarity_search(self, query: str, k: int = 4,
+                                 filter: Optional[Dict[str, Any]] = None, **kwargs: Any) -> List[Document]:
+        embedding = await self._embedding.aembed_query(query)
+        return await self.asimilarity_search_by_vector(embedding, k=k, filter=filter)
+
+
+def build_fake_vectorstore(documents: List[Document], embeddings: Embeddings, fake: FakeEmbeddings,
+                           query_latency_ms: float = 0.0, path: str = None) -> FakeVectorStore:
+    """
+    Create a FakeVectorStore holding the given chunks.
+
+    The corpus is embedded with fake.vector() directly, so building the
+    index neither sleeps nor warms the query embedding cache.
+
+    Args:
+        documents: Chunks to index (chunk_id metadata is used as the id when present)
+        embeddings: Embeddings the store uses for queries
+        fake: The FakeEmbeddings behind `embeddings`
+        query_latency_ms: Artificial latency per vector query
+        path: Index directory (a temporary directory by default; nothing is saved)
+
+    Returns:
+        The populated store
+    """
+    store = FakeVectorStore(
+        LocalVectorIndex(path or tempfile.mkdtemp(prefix="rag-bench-index-")),
+        embeddings,
+        query_latency_ms=query_latency_ms
+    )
+    if documents:
+        LocalVectorStore.add_embeddings(
+            store,
+            [doc.metadata.get("chunk_id") or f"doc-{i}" for i, doc in enumerate(documents)],
+            [fake.vector(doc.page_content) for doc in documents],
+            [doc.page_content for doc in documents],
+            [doc.metadata for doc in documents]
+        )
+    return store
@@ -0,0 +1,129 @@
+import os
+import sys
+import argparse
+import tempfile
+from typing import Dict, Any
+
+# Make the backend modules importable when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import setup
+from embedding_cache import CachedEmbeddings
+from rate_limit import RateLimiter, RateLimitedEmbeddings
+from vector_backends import LocalVectorIndex
+from benchmarks.fakes import FakeEmbeddings, FakeVectorStore
+from benchmarks.corpus import DEFAULT_DATA_DIR
+from benchmarks.report import write_results, compare_results
+
+INDEX_NAME = "bench"
+
+
+def run_setup(setup_args: argparse.Namespace, embeddings, vectorstore, fake: FakeEmbeddings) -> Dict[str, Any]:
+    """Run setup.ingest() once and flatten its stats into one comparable row."""
+    calls_before = fake.calls
+    stats = setup.ingest(setup_args, embeddings=embeddings, vectorstore=vectorstore)
+    seconds = stats["phases"]["total"]
+    row = {
+        "files_changed": stats["files"]["added"] + stats["files"]["changed"],
+        "files_unchanged": stats["files"]["unchanged"],
+        "uploaded": stats["uploaded"],
+        "failed": stats["failed"],
+        "embedding_calls": fake.calls - calls_before,
+        "seconds": seconds,
+        "chunks_per_second": round(stats["uploaded"] / seconds, 1) if seconds else 0.0
+    }
+    for phase, phase_seconds in stats["phases"].items():
+        if phase != "total":
+            row[f"{phase}_seconds"] = phase_seconds
+    return row
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """
+    Benchmark setup.py end to end: walk, load, split, docstore, embed, upsert, save.
+
+    Three runs against one scratch index: cold (every chunk embedded), an
+    unchanged re-run (skipped via the manifest), and a rebuild with the
+    manifest removed, so every chunk is upserted again but its embedding
+    comes from the cache.
+    """
+    work_dir = tempfile.mkdtemp(prefix="rag-bench-ingest-")
+    manifest_path = os.path.join(work_dir, "manifest.json")
+    # setup.py reads its paths and tuning from the environment
+    os.environ.update({
+        "VECTOR_BACKEND": "local",
+        "VECTOR_NAMESPACE_BY_TYPE": "false",
+        "LOCAL_INDEX_DIR": work_dir,
+        "INGEST_MANIFEST_PATH": manifest_path,
+        "INGEST_EMBED_CONCURRENCY": str(args.embed_concurrency),
+        "INGEST_UPSERT_CONCURRENCY": str(args.upsert_concurrency),
+        "INGEST_MAX_RETRIES": str(args.max_retries)
+    })
+    for name in ("DOCSTORE_PATH", "LEXICAL_INDEX_PATH"):
+        os.environ.pop(name, None)
+
+    fake = FakeEmbeddings(dimension=args.dimension, latency_ms=args.embed_latency_ms, per_text_ms=args.per_text_ms)
+    limiter = RateLimiter(requests_per_minute=args.rpm, tokens_per_minute=args.tpm)
+    embeddings = CachedEmbeddings(RateLimitedEmbeddings(fake, limiter, max_retries=args.max_retries))
+    vectorstore = FakeVectorStore(
+        LocalVectorIndex(os.path.join(work_dir, INDEX_NAME)), embeddings, upsert_latency_ms=args.upsert_latency_ms
+    )
+    setup_args = argparse.Namespace(data_dir=args.data_dir, index=INDEX_NAME, batch_size=args.batch_size,
+                                    dry_run=False)
+
+    print("⏱️  Cold run (every chunk embedded)...")
+    cold = run_setup(setup_args, embeddings, vectorstore, fake)
+
+    print("⏱️  Unchanged re-run (files skipped via the manifest)...")
+    unchanged = run_setup(setup_args, embeddings, vectorstore, fake)
+
+    print("⏱️  Rebuild (manifest removed, embeddings served from cache)...")
+    os.remove(manifest_path)
+    warm = run_setup(setup_args, embeddings, vectorstore, fake)
+
+    return {
+        "cold": cold,
+        "unchanged": unchanged,
+        "warm": warm,
+        "embedding_cache": embeddings.stats()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark setup.py ingestion against offline fake backends")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Data directory to ingest")
+    parser.add_argument("--batch-size", type=int, default=50, help="Chunks per embedding request and upsert")
+    parser.add_argument("--embed-concurrency", type=int, default=4, help="Embedding requests in flight")
+    parser.add_argument("--upsert-concurrency", type=int, default=4, help="Upserts in flight")
+    parser.add_argument("--max-retries", type=int, default=5, help="Retries before a batch is dead-lettered")
+    parser.add_argument("--dimension", type=int, default=256, help="Fake embedding dimension")
+    parser.add_argument("--embed-latency-ms", type=float, default=100.0, help="Fake embedding latency per call")
+    parser.add_argument("--per-text-ms", type=float, default=0.5, help="Fake embedding latency per text")
+    parser.add_argument("--upsert-latency-ms", type=float, default=30.0, help="Fake vector store latency per upsert")
+    parser.add_argument("--rpm", type=float, default=3000, help="Embedding requests per minute limit")
+    parser.add_argument("--tpm", type=float, default=1000000, help="Embedding tokens per minute limit")
+    parser.add_argument("--output", help="Results JSON path (defaults to benchmarks/results/ingest-<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    results = run(args)
+
+    for name in ("cold", "unchanged", "warm"):
+        row = results[name]
+        phases = ", ".join(
+            f"{key[:-len('_seconds')]} {value}s" for key, value in row.items()
+            if key.endswith("_seconds")
+        )
+        print(
+            f"📊 {name:9} {row['uploaded']} chunks in {row['seconds']}s "
+            f"({row['chunks_per_second']} chunks/s, {row['embedding_calls']} embedding calls; {phases})"
+        )
+    path = write_results("ingest", vars(args), results, args.output)
+    print(f"💾 Results written to {path}")
+    if args.compare:
+        for line in compare_results(results, args.compare):
+            print(f"   {line}")
+
+
+if __name__ == "__main__":
+    main()
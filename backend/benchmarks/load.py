@@ -0,0 +1,183 @@
+import os
+import sys
+import time
+import asyncio
+import argparse
+from typing import List, Dict, Any, Optional
+
+# Make the backend modules importable when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from embedding_cache import CachedEmbeddings
+from rag_agent import RAGAgent
+from benchmarks.fakes import FakeEmbeddings, FakeChatModel, build_fake_vectorstore
+from benchmarks.corpus import DEFAULT_DATA_DIR, QUESTIONS, load_corpus
+from benchmarks.report import summarize_latencies, write_results, compare_results
+
+
+ENDPOINTS = ("chat", "stream", "search", "stats", "history")
+
+
+def build_agent(args: argparse.Namespace) -> RAGAgent:
+    """Create a RAGAgent over the fake backends, indexing the data directory."""
+    corpus = load_corpus(args.data_dir)
+    fake = FakeEmbeddings(dimension=args.dimension, latency_ms=args.embed_latency_ms)
+    embeddings = CachedEmbeddings(fake, max_memory_entries=args.embedding_cache_size)
+    vectorstore = build_fake_vectorstore(corpus["chunks"], embeddings, fake, query_latency_ms=args.query_latency_ms)
+    llm = FakeChatModel(
+        first_token_ms=args.first_token_ms,
+        token_ms=args.token_ms,
+        response_tokens=args.response_tokens
+    )
+    print(f"📚 Indexed {len(corpus['chunks'])} chunks from {corpus['files']} files")
+    return RAGAgent(
+        max_concurrency=args.max_concurrency,
+        condense_strategy=args.condense_strategy,
+        embeddings=embeddings,
+        vectorstore=vectorstore,
+        llm=llm
+    )
+
+
+async def send(client: httpx.AsyncClient, endpoint: str, i: int, sessions: int) -> Optional[float]:
+    """
+    Send request number i to an endpoint.
+
+    Returns:
+        Time to the first streamed token in seconds for "stream", else None
+
+    Raises:
+        httpx.HTTPStatusError: If the response status is not 2xx
+    """
+    session_id = f"bench-{endpoint}-{i % sessions}"
+    # Each session walks through the questions in order, so later turns are follow-ups
+    question = QUESTIONS[(i // sessions) % len(QUESTIONS)]
+
+    if endpoint == "chat":
+        response = await client.post("/chat", json={"message": question, "session_id": session_id})
+    elif endpoint == "search":
+        response = await client.post("/search", json={"query": QUESTIONS[i % len(QUESTIONS)], "k": 5})
+    elif endpoint == "stats":
+        response = await client.get("/stats")
+    elif endpoint == "history":
+        response = await client.get("/history", params={"session_id": f"bench-chat-{i % sessions}"})
+    elif endpoint == "stream":
+        start = time.perf_counter()
+        first_token = None
+        async with client.stream("POST", "/chat/stream", json={"message": question, "session_id": session_id}) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if first_token is None and line == "event: token":
+                    first_token = time.perf_counter() - start
+                if line == "event: error":
+                    raise RuntimeError("stream reported an error")
+        return first_token
+    else:
+        raise ValueError(f"Unknown endpoint: {endpoint}")
+
+    response.raise_for_status()
+    return None
+
+
+async def run_endpoint(client: httpx.AsyncClient, endpoint: str, requests: int, concurrency: int,
+                       sessions: int, offset: int = 0) -> Dict[str, Any]:
+    """Send `requests` requests to one endpoint with `concurrency` in flight and summarize them."""
+    latencies: List[float] = []
+    first_tokens: List[float] = []
+    errors = 0
+    next_index = iter(range(offset, offset + requests))
+
+    async def worker():
+        nonlocal errors
+        for i in next_index:
+            start = time.perf_counter()
+            try:
+                first_token = await send(client, endpoint, i, sessions)
+            except Exception as e:
+                errors += 1
+                if errors <= 3:
+                    print(f"❌ {endpoint} request {i} failed: {e}")
+                continue
+            latencies.append(time.perf_counter() - start)
+            if first_token is not None:
+                first_tokens.append(first_token)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    summary = summarize_latencies(latencies, time.perf_counter() - started, errors)
+    if first_tokens:
+        ttft = summarize_latencies(first_tokens, 1.0)
+        summary.update({f"ttft_{key}": value for key, value in ttft.items() if key.endswith("_ms")})
+    return summary
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout)
+        agent = None
+    else:
+        import api
+        agent = build_agent(args)
+        api.rag_agent = agent
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://bench", timeout=args.timeout)
+
+    results = {}
+    async with client:
+        for endpoint in args.endpoints:
+            if args.warmup:
+                await run_endpoint(client, endpoint, args.warmup, args.concurrency, args.sessions)
+            print(f"⏱️  {endpoint}: {args.requests} requests at concurrency {args.concurrency}...")
+            results[endpoint] = await run_endpoint(
+                client, endpoint, args.requests, args.concurrency, args.sessions, offset=args.warmup
+            )
+
+    if agent is not None:
+        results["embedding_cache"] = agent.get_embedding_cache_stats()
+        results["response_cache"] = agent.get_response_cache_stats()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the RAG agent API against offline fake backends")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS),
+                        help=f"Comma-separated endpoints to drive ({', '.join(ENDPOINTS)})")
+    parser.add_argument("--requests", type=int, default=200, help="Measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=10, help="Unmeasured requests per endpoint before measuring")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight at once")
+    parser.add_argument("--sessions", type=int, default=20, help="Distinct chat sessions to spread requests over")
+    parser.add_argument("--url", help="Benchmark a running server instead of the in-process app with fakes")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Per-request timeout in seconds")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR, help="Corpus indexed into the fake vector store")
+    parser.add_argument("--dimension", type=int, default=256, help="Fake embedding dimension")
+    parser.add_argument("--embed-latency-ms", type=float, default=20.0, help="Fake embedding latency per call")
+    parser.add_argument("--query-latency-ms", type=float, default=15.0, help="Fake vector query latency")
+    parser.add_argument("--first-token-ms", type=float, default=250.0, help="Fake LLM time to first token")
+    parser.add_argument("--token-ms", type=float, default=5.0, help="Fake LLM delay between tokens")
+    parser.add_argument("--response-tokens", type=int, default=60, help="Fake LLM answer length in tokens")
+    parser.add_argument("--embedding-cache-size", type=int, default=10000, help="In-memory embedding cache entries")
+    parser.add_argument("--max-concurrency", type=int, default=None, help="RAGAgent backend concurrency cap")
+    parser.add_argument("--condense-strategy", default=None, help="RAGAgent condense strategy")
+    parser.add_argument("--output", help="Results JSON path (defaults to benchmarks/results/load-<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+    args.endpoints = [endpoint.strip() for endpoint in args.endpoints.split(",") if endpoint.strip()]
+
+    results = asyncio.run(run(args))
+
+    for endpoint in args.endpoints:
+        summary = results[endpoint]
+        print(
+            f"📊 {endpoint:8} {summary.get('rps', 0):8.1f} req/s  p50 {summary.get('p50_ms', 0):8.1f} ms  "
+            f"p95 {summary.get('p95_ms', 0):8.1f} ms  p99 {summary.get('p99_ms', 0):8.1f} ms  "
+            f"errors {summary['errors']}"
+        )
+    path = write_results("load", vars(args), results, args.output)
+    print(f"💾 Results written to {path}")
+    if args.compare:
+        for line in compare_results(results, args.compare):
+            print(f"   {line}")
+
+
+if __name__ == "__main__":
+    main()
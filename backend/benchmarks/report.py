@@ -0,0 +1,93 @@
+import os
+import json
+import time
+import platform
+from typing import List, Dict, Any, Optional
+import numpy as np
+
+
+DEFAULT_RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+
+
+def summarize_latencies(latencies: List[float], wall_seconds: float, errors: int = 0) -> Dict[str, Any]:
+    """
+    Summarize request latencies.
+
+    Args:
+        latencies: Per-request latencies in seconds
+        wall_seconds: Wall-clock duration of the run
+        errors: Number of failed requests
+
+    Returns:
+        Dictionary with count, error count, requests per second and
+        mean/p50/p95/p99/max latency in milliseconds
+    """
+    if not latencies:
+        return {"requests": 0, "errors": errors, "rps": 0.0}
+    values = np.asarray(latencies) * 1000
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / wall_seconds, 2) if wall_seconds else 0.0,
+        "mean_ms": round(float(values.mean()), 2),
+        "p50_ms": round(float(np.percentile(values, 50)), 2),
+        "p95_ms": round(float(np.percentile(values, 95)), 2),
+        "p99_ms": round(float(np.percentile(values, 99)), 2),
+        "max_ms": round(float(values.max()), 2)
+    }
+
+
+def write_results(kind: str, config: Dict[str, Any], results: Dict[str, Any], output: Optional[str] = None) -> str:
+    """
+    Write a benchmark run to JSON.
+
+    Args:
+        kind: Benchmark name ("load" or "ingest")
+        config: Settings the run used
+        results: Measurements
+        output: File path (defaults to results/<kind>-<timestamp>.json)
+
+    Returns:
+        The path written
+    """
+    if output is None:
+        output = os.path.join(DEFAULT_RESULTS_DIR, f"{kind}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    payload = {
+        "benchmark": kind,
+        "timestamp": time.time(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": config,
+        "results": results
+    }
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    return output
+
+
+def compare_results(current: Dict[str, Any], baseline_path: str) -> List[str]:
+    """
+    Compare a run's numbers with an earlier results file.
+
+    Args:
+        current: Results of this run, shaped like the baseline's "results"
+        baseline_path: Path of an earlier results JSON
+
+    Returns:
+        One line per metric present in both runs, with the relative change
+    """
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    lines = []
+    for name, metrics in current.items():
+        before = baseline.get(name)
+        if not isinstance(metrics, dict) or not isinstance(before, dict):
+            continue
+        for key, value in metrics.items():
+            old = before.get(key)
+            if not isinstance(value, (int, float)) or not isinstance(old, (int, float)) or not old:
+                continue
+            change = (value - old) / old * 100
+            lines.append(f"{name}.{key}: {old} -> {value} ({change:+.1f}%)")
+    return lines
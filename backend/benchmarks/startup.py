@@ -0,0 +1,111 @@
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+from typing import List, Dict, Any
+
+# Make the backend modules importable when run as a script
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.report import write_results
+
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter so nothing is already imported
+PROBE = """
+import json, time
+started = time.perf_counter()
+import api
+imported = time.perf_counter()
+from rag_agent import RAGAgent
+agent = RAGAgent(vector_backend={backend!r})
+built = time.perf_counter()
+print("STARTUP " + json.dumps({{
+    "import_ms": (imported - started) * 1000,
+    "startup_ms": (built - imported) * 1000,
+    "phases": agent.startup_timings
+}}))
+"""
+
+
+def probe(backend: str) -> Dict[str, Any]:
+    """Import the API and build a RAGAgent in a fresh interpreter, returning the timings."""
+    env = dict(os.environ)
+    env.setdefault("OPENAI_API_KEY", "startup-check")
+    env.setdefault("LOCAL_INDEX_DIR", tempfile.mkdtemp(prefix="rag-startup-"))
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(backend=backend)],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith("STARTUP "):
+            return json.loads(line[len("STARTUP "):])
+    raise RuntimeError(f"Startup probe failed:\n{result.stderr[-2000:]}")
+
+
+def median_phases(runs: List[Dict[str, Any]]) -> Dict[str, float]:
+    names = {name for run in runs for name in run["phases"]}
+    return {
+        name: round(statistics.median(run["phases"].get(name, 0.0) for run in runs), 2)
+        for name in sorted(names)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure API import time and RAGAgent startup time, failing on regressions"
+    )
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters to measure (median is reported)")
+    parser.add_argument("--backend", default="local",
+                        help="Vector backend to build; the default needs no network")
+    parser.add_argument("--max-import-ms", type=float, help="Fail if the median import time exceeds this")
+    parser.add_argument("--max-startup-ms", type=float, help="Fail if the median startup time exceeds this")
+    parser.add_argument("--baseline", help="Earlier startup results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="Allowed slowdown against the baseline, as a fraction")
+    parser.add_argument("--output", help="Results JSON path (defaults to benchmarks/results/startup-<timestamp>.json)")
+    args = parser.parse_args()
+
+    runs = []
+    for i in range(args.runs):
+        runs.append(probe(args.backend))
+        print(f"⏱️  Run {i + 1}: import {runs[-1]['import_ms']:.0f} ms, startup {runs[-1]['startup_ms']:.0f} ms")
+
+    results = {
+        "startup": {
+            "import_ms": round(statistics.median(run["import_ms"] for run in runs), 2),
+            "startup_ms": round(statistics.median(run["startup_ms"] for run in runs), 2)
+        },
+        "phases": median_phases(runs)
+    }
+    print(f"📊 Median import {results['startup']['import_ms']} ms, startup {results['startup']['startup_ms']} ms")
+    print(f"📊 Phases: {results['phases']}")
+    path = write_results("startup", vars(args), results, args.output)
+    print(f"💾 Results written to {path}")
+
+    failures = []
+    limits = {"import_ms": args.max_import_ms, "startup_ms": args.max_startup_ms}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]["startup"]
+        for key, value in baseline.items():
+            limit = value * (1 + args.tolerance)
+            if limits.get(key) is None or limit < limits[key]:
+                limits[key] = limit
+    for key, limit in limits.items():
+        if limit is not None and results["startup"][key] > limit:
+            failures.append(f"{key} {results['startup'][key]} ms exceeds {limit:.0f} ms")
+
+    if failures:
+        for failure in failures:
+            print(f"❌ Regression: {failure}")
+        sys.exit(1)
+    print("✅ Startup within limits")
+
+
+if __name__ == "__main__":
+    main()
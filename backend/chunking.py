@@ -0,0 +1,272 @@
+import re
+import statistics
+from collections import Counter
+from typing import List, Dict, Any, Tuple
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+from context_packing import TokenCounter
+
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.+?)\s*#*\s*$")
+FENCE_PATTERN = re.compile(r"^\s*(```|~~~)")
+HEADING_SEPARATOR = " > "
+
+# Images embedded as base64 data URIs, either inline or as reference definitions
+DATA_REFERENCE_PATTERN = re.compile(r"^\s*\[[^\]]+\]:\s*<?data:[^\s>]*>?\s*$", re.MULTILINE)
+DATA_IMAGE_PATTERN = re.compile(r"!\[([^\]]*)\]\(<?data:[^)]*\)")
+DATA_URI_PATTERN = re.compile(r"<?data:[\w/+.-]+;base64,[A-Za-z0-9+/=]+>?")
+
+
+def strip_embedded_data(text: str) -> str:
+    """Remove base64 data URIs (e.g. pasted images), which are noise to embed; inline images keep their alt text."""
+    text = DATA_REFERENCE_PATTERN.sub("", text)
+    text = DATA_IMAGE_PATTERN.sub(lambda m: m.group(1), text)
+    return DATA_URI_PATTERN.sub("", text)
+
+
+def parse_markdown_sections(text: str) -> List[Tuple[List[str], str]]:
+    """
+    Split markdown into sections at its headings.
+
+    Headings inside fenced code blocks are ignored. Text before the first
+    heading becomes a section with an empty heading path.
+
+    Args:
+        text: Markdown source
+
+    Returns:
+        (heading_path, section_text) pairs in document order, where
+        heading_path lists the titles from the top-level heading down and
+        section_text starts with the section's own heading line
+    """
+    sections: List[Tuple[List[str], str]] = []
+    stack: List[Tuple[int, str]] = []
+    lines: List[str] = []
+    in_fence = False
+
+    def flush():
+        body = "\n".join(lines).strip()
+        if body:
+            sections.append(([title for _, title in stack], body))
+
+    for line in text.splitlines():
+        if FENCE_PATTERN.match(line):
+            in_fence = not in_fence
+        match = None if in_fence else HEADING_PATTERN.match(line)
+        if match:
+            flush()
+            lines = []
+            level = len(match.group(1))
+            while stack and stack[-1][0] >= level:
+                stack.pop()
+            stack.append((level, match.group(2).strip("*_ ")))
+        lines.append(line)
+    flush()
+    return sections
+
+
+def _common_prefix(paths: List[List[str]]) -> List[str]:
+    prefix = []
+    for titles in zip(*paths):
+        if any(title != titles[0] for title in titles):
+            break
+        prefix.append(titles[0])
+    return prefix
+
+
+class Chunker:
+    """
+    Structure-aware splitter for the ingested files.
+
+    Markdown is split at its headings and each chunk records its heading
+    path; small neighbouring sections are packed together and sections over
+    the budget are split further. CSV rows, which load as one Document each,
+    are packed into groups of consecutive rows. Plain text is split by size
+    alone. All sizes are measured in tokens, and every chunk carries its
+    token count in metadata. Statistics about the chunks produced are kept
+    in `stats`.
+    """
+
+    def __init__(self, max_tokens: int = 300, overlap_tokens: int = 30, model_name: str = "gpt-3.5-turbo"):
+        """
+        Initialize the chunker.
+
+        Args:
+            max_tokens: Token budget per chunk
+            overlap_tokens: Tokens shared between consecutive pieces of a section too long for one chunk
+            model_name: Model whose tokenizer measures chunk sizes
+        """
+        self.max_tokens = max_tokens
+        self.overlap_tokens = overlap_tokens
+        self.tokens = TokenCounter(model_name)
+        self.text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=max_tokens,
+            chunk_overlap=overlap_tokens,
+            length_function=self.tokens.count
+        )
+        self.stats = ChunkStats()
+
+    def split_documents(self, docs: List[Document]) -> List[Document]:
+        """
+        Chunk the Documents loaded from one file.
+
+        Args:
+            docs: Documents from ingest_loaders.load_file
+
+        Returns:
+            The chunks, in document order
+        """
+        chunks: List[Document] = []
+        rows: List[Document] = []
+        for doc in docs:
+            if "row_index" in doc.metadata:
+                rows.append(doc)
+                continue
+            doc = Document(page_content=strip_embedded_data(doc.page_content), metadata=doc.metadata)
+            if doc.metadata.get("source", "").endswith(".md"):
+                chunks.extend(self.split_markdown(doc))
+            elif doc.page_content.strip():
+                chunks.extend(self._finish(self._split_text(doc.page_content, doc.metadata), "text"))
+        if rows:
+            chunks.extend(self.pack_rows(rows))
+        return chunks
+
+    def _finish(self, chunks: List[Document], kind: str) -> List[Document]:
+        for chunk in chunks:
+            chunk.metadata["tokens"] = self.tokens.count(chunk.page_content)
+            self.stats.record(chunk, kind)
+        return chunks
+
+    def _split_text(self, text: str, metadata: Dict[str, Any], prefix: str = "") -> List[Document]:
+        """Split text that may exceed the budget, starting each continuation piece with prefix."""
+        if self.tokens.count(text) <= self.max_tokens:
+            return [Document(page_content=text, metadata=dict(metadata))]
+        splitter = self.text_splitter
+        if prefix:
+            # Leave room for the prefix so continuation pieces stay within the budget
+            splitter = RecursiveCharacterTextSplitter(
+                chunk_size=max(self.max_tokens - self.tokens.count(prefix) - 1, self.max_tokens // 2),
+                chunk_overlap=self.overlap_tokens,
+                length_function=self.tokens.count
+            )
+        pieces = splitter.split_text(text)
+        self.stats.oversized += 1
+        return [
+            Document(page_content=piece if i == 0 or not prefix else f"{prefix}\n{piece}", metadata=dict(metadata))
+            for i, piece in enumerate(pieces)
+        ]
+
+    def split_markdown(self, doc: Document) -> List[Document]:
+        """
+        Split a markdown Document at its headings.
+
+        Adjacent sections are packed together while they fit in max_tokens;
+        a packed chunk's heading_path is the path its sections share.
+        """
+        chunks: List[Document] = []
+        group: List[Tuple[List[str], str]] = []
+        group_tokens = 0
+
+        def flush():
+            if not group:
+                return
+            path = _common_prefix([titles for titles, _ in group]) if len(group) > 1 else group[0][0]
+            metadata = {**doc.metadata, "heading_path": HEADING_SEPARATOR.join(path)}
+            chunks.append(Document(page_content="\n\n".join(text for _, text in group), metadata=metadata))
+
+        for path, text in parse_markdown_sections(doc.page_content):
+            tokens = self.tokens.count(text)
+            if tokens > self.max_tokens:
+                flush()
+                group, group_tokens = [], 0
+                metadata = {**doc.metadata, "heading_path": HEADING_SEPARATOR.join(path)}
+                chunks.extend(self._split_text(text, metadata, prefix=HEADING_SEPARATOR.join(path)))
+                continue
+            if group and group_tokens + tokens > self.max_tokens:
+                flush()
+                group, group_tokens = [], 0
+            group.append((path, text))
+            group_tokens += tokens
+        flush()
+        return self._finish(chunks, "markdown")
+
+    def pack_rows(self, rows: List[Document]) -> List[Document]:
+        """
+        Pack consecutive CSV row Documents into chunks of up to max_tokens.
+
+        Each chunk records the rows it holds in row_start, row_end and
+        row_count; row_index is kept as the first row.
+        """
+        chunks: List[Document] = []
+        group: List[Document] = []
+        group_tokens = 0
+
+        def flush():
+            if not group:
+                return
+            first, last = group[0].metadata["row_index"], group[-1].metadata["row_index"]
+            metadata = {
+                **group[0].metadata,
+                "row_index": first,
+                "row_start": first,
+                "row_end": last,
+                "row_count": len(group)
+            }
+            chunks.append(Document(page_content="\n\n".join(row.page_content for row in group), metadata=metadata))
+
+        for row in rows:
+            tokens = self.tokens.count(row.page_content)
+            if tokens > self.max_tokens:
+                flush()
+                group, group_tokens = [], 0
+                index = row.metadata["row_index"]
+                metadata = {**row.metadata, "row_start": index, "row_end": index, "row_count": 1}
+                chunks.extend(self._split_text(row.page_content, metadata))
+                continue
+            if group and group_tokens + tokens > self.max_tokens:
+                flush()
+                group, group_tokens = [], 0
+            group.append(row)
+            group_tokens += tokens
+        flush()
+        return self._finish(chunks, "csv")
+
+
+class ChunkStats:
+    """Running statistics about the chunks a Chunker has produced."""
+
+    def __init__(self):
+        self.token_counts: List[int] = []
+        self.by_kind: Counter = Counter()
+        self.by_type: Counter = Counter()
+        self.oversized = 0
+
+    def record(self, chunk: Document, kind: str):
+        self.token_counts.append(chunk.metadata["tokens"])
+        self.by_kind[kind] += 1
+        self.by_type[chunk.metadata.get("type", "unknown")] += 1
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarize chunk counts and sizes.
+
+        Returns:
+            Dictionary with the chunk count, token totals and percentiles,
+            counts by chunking strategy and document type, and how many
+            sections or rows had to be split further
+        """
+        counts = sorted(self.token_counts)
+        if not counts:
+            return {"chunks": 0}
+        return {
+            "chunks": len(counts),
+            "total_tokens": sum(counts),
+            "mean_tokens": round(statistics.mean(counts), 1),
+            "min_tokens": counts[0],
+            "p50_tokens": counts[len(counts) // 2],
+            "p95_tokens": counts[min(len(counts) - 1, int(len(counts) * 0.95))],
+            "max_tokens": counts[-1],
+            "by_kind": dict(self.by_kind),
+            "by_type": dict(self.by_type),
+            "oversized_splits": self.oversized
+        }
@@ -0,0 +1,166 @@
+import os
+import threading
+from typing import Dict, Any, Optional
+
+
+class ClientRegistry:
+    """
+    Shared, long-lived clients for OpenAI and Pinecone.
+
+    Every OpenAI model built through the registry sends its requests over
+    the same pooled HTTP transports (one sync, one async) with keep-alive and
+    explicit timeouts, so bursts reuse warm TLS connections instead of
+    opening new ones. Pinecone index handles are created once per index and
+    cached. RAGAgent and setup.py both build their clients here.
+    """
+
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 20,
+                 keepalive_expiry: float = 30.0, connect_timeout: float = 5.0, read_timeout: float = 60.0,
+                 max_retries: int = 2, pinecone_pool_threads: Optional[int] = None,
+                 pinecone_pool_maxsize: Optional[int] = None):
+        """
+        Initialize the registry. Clients are created on first use.
+
+        Args:
+            max_connections: Maximum open connections per HTTP transport
+            max_keepalive_connections: Idle connections kept open for reuse
+            keepalive_expiry: Seconds an idle connection is kept open
+            connect_timeout: Seconds allowed to establish a connection
+            read_timeout: Seconds allowed to wait for response data
+            max_retries: Retries the OpenAI client makes on transient errors
+            pinecone_pool_threads: Pinecone client thread pool size (SDK default if None)
+            pinecone_pool_maxsize: Connections kept per Pinecone index (SDK default if None)
+        """
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.max_retries = max_retries
+        self.pinecone_pool_threads = pinecone_pool_threads
+        self.pinecone_pool_maxsize = pinecone_pool_maxsize
+        self._lock = threading.Lock()
+        self._http_client = None
+        self._async_http_client = None
+        self._pinecone = None
+        self._indexes: Dict[str, Any] = {}
+
+    @classmethod
+    def from_env(cls) -> "ClientRegistry":
+        """Create a registry configured from the HTTP_* and PINECONE_POOL_* environment variables."""
+        pool_threads = os.getenv("PINECONE_POOL_THREADS")
+        pool_maxsize = os.getenv("PINECONE_POOL_MAXSIZE")
+        return cls(
+            max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+            max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("HTTP_KEEPALIVE_SECONDS", "30")),
+            connect_timeout=float(os.getenv("HTTP_CONNECT_TIMEOUT", "5")),
+            read_timeout=float(os.getenv("HTTP_READ_TIMEOUT", "60")),
+            max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "2")),
+            pinecone_pool_threads=int(pool_threads) if pool_threads else None,
+            pinecone_pool_maxsize=int(pool_maxsize) if pool_maxsize else None
+        )
+
+    def timeout(self):
+        """The httpx timeout applied to every OpenAI request."""
+        import httpx
+        return httpx.Timeout(self.read_timeout, connect=self.connect_timeout)
+
+    def _transport_options(self) -> Dict[str, Any]:
+        import httpx
+        return {
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive_connections,
+                keepalive_expiry=self.keepalive_expiry
+            ),
+            "timeout": self.timeout()
+        }
+
+    def http_client(self):
+        """Get the pooled synchronous HTTP client."""
+        with self._lock:
+            if self._http_client is None:
+                import httpx
+                self._http_client = httpx.Client(**self._transport_options())
+            return self._http_client
+
+    def async_http_client(self):
+        """Get the pooled asynchronous HTTP client."""
+        with self._lock:
+            if self._async_http_client is None:
+                import httpx
+                self._async_http_client = httpx.AsyncClient(**self._transport_options())
+            return self._async_http_client
+
+    def openai_options(self) -> Dict[str, Any]:
+        """Keyword arguments that put a LangChain OpenAI model on the shared transports."""
+        return {
+            "http_client": self.http_client(),
+            "http_async_client": self.async_http_client(),
+            "request_timeout": self.timeout(),
+            "max_retries": self.max_retries
+        }
+
+    def openai_embeddings(self, **kwargs: Any):
+        """Create OpenAIEmbeddings on the shared transports (kwargs override the defaults)."""
+        from langchain_openai import OpenAIEmbeddings
+        return OpenAIEmbeddings(**{**self.openai_options(), **kwargs})
+
+    def chat_model(self, **kwargs: Any):
+        """Create ChatOpenAI on the shared transports (kwargs override the defaults)."""
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(**{**self.openai_options(), **kwargs})
+
+    def pinecone(self):
+        """Get the shared Pinecone client."""
+        with self._lock:
+            if self._pinecone is None:
+                from pinecone import Pinecone
+                self._pinecone = Pinecone(
+                    api_key=os.getenv("PINECONE_API_KEY"),
+                    pool_threads=self.pinecone_pool_threads
+                )
+            return self._pinecone
+
+    def index(self, index_name: str):
+        """Get the cached handle for a Pinecone index, creating it on first use."""
+        pc = self.pinecone()
+        with self._lock:
+            index = self._indexes.get(index_name)
+            if index is None:
+                options = {}
+                if self.pinecone_pool_threads:
+                    options["pool_threads"] = self.pinecone_pool_threads
+                if self.pinecone_pool_maxsize:
+                    options["connection_pool_maxsize"] = self.pinecone_pool_maxsize
+                index = self._indexes[index_name] = pc.Index(index_name, **options)
+            return index
+
+    def close(self):
+        """Close the synchronous HTTP client. The async client is closed with aclose()."""
+        with self._lock:
+            if self._http_client is not None:
+                self._http_client.close()
+                self._http_client = None
+
+    async def aclose(self):
+        """Close both HTTP clients."""
+        self.close()
+        with self._lock:
+            client, self._async_http_client = self._async_http_client, None
+        if client is not None:
+            await client.aclose()
+
+
+_default_registry = None
+_default_lock = threading.Lock()
+
+
+def default_registry() -> ClientRegistry:
+    """Get the process-wide registry, configured from the environment on first use."""
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = ClientRegistry.from_env()
+        return _default_registry
@@ -0,0 +1,56 @@
+import re
+from typing import List
+from langchain_core.messages import BaseMessage, HumanMessage
+
+
+CONDENSE_STRATEGIES = ("llm", "none", "heuristic", "speculative")
+
+# Words that usually point back at something said earlier in the conversation
+FOLLOW_UP_PATTERN = re.compile(
+    r"\b(it|its|this|that|these|those|they|them|their|above|previous|same|also|more|again|instead)\b",
+    re.IGNORECASE
+)
+FOLLOW_UP_PREFIXES = ("and ", "what about", "how about", "also", "now ", "then ", "ok ", "okay ")
+
+
+def recent_user_questions(messages: List[BaseMessage], turns: int = 1) -> List[str]:
+    """Get the last few questions the user asked, oldest first."""
+    questions = [message.content for message in messages if isinstance(message, HumanMessage)]
+    return questions[-turns:] if turns > 0 else []
+
+
+def is_follow_up(question: str) -> bool:
+    """Guess whether a question depends on earlier turns to make sense."""
+    lowered = question.strip().lower()
+    return (
+        lowered.startswith(FOLLOW_UP_PREFIXES)
+        or len(lowered.split()) < 5
+        or bool(FOLLOW_UP_PATTERN.search(lowered))
+    )
+
+
+def history_query(question: str, messages: List[BaseMessage], turns: int = 1) -> str:
+    """Retrieval query for the "none" strategy: the raw question plus the user's recent questions."""
+    return "\n".join(recent_user_questions(messages, turns) + [question])
+
+
+def heuristic_rewrite(question: str, messages: List[BaseMessage]) -> str:
+    """
+    Local stand-in for the condense LLM call.
+
+    Standalone questions are used as-is; questions that look like follow-ups
+    are prefixed with the previous user question so retrieval sees the topic
+    being referred to.
+    """
+    previous = recent_user_questions(messages, 1)
+    if previous and is_follow_up(question):
+        return f"{previous[0]} {question}"
+    return question
+
+
+def text_similarity(a: str, b: str) -> float:
+    """Word-set Jaccard similarity between two questions."""
+    a_words = set(re.findall(r"\w+", a.lower()))
+    b_words = set(re.findall(r"\w+", b.lower()))
+    union = a_words | b_words
+    return len(a_words & b_words) / len(union) if union else 1.0
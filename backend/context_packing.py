@@ -0,0 +1,182 @@
+import re
+from typing import List, Tuple
+from langchain_core.documents import Document
+from langchain_core.messages import BaseMessage, SystemMessage, get_buffer_string
+
+
+class TokenCounter:
+    """
+    Counts tokens with the model's tiktoken encoding.
+
+    If tiktoken or its encoding file is unavailable (e.g. offline), falls
+    back to an estimate of four characters per token.
+    """
+
+    def __init__(self, model_name: str = "gpt-3.5-turbo"):
+        self.model_name = model_name
+        self._encoding = None
+        try:
+            import tiktoken
+            self._encoding = tiktoken.encoding_for_model(model_name)
+        except Exception as e:
+            print(f"⚠️  tiktoken unavailable for {model_name}, estimating token counts: {e}")
+
+    def count(self, text: str) -> int:
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return len(text) // 4 + 1
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut text down to at most max_tokens tokens."""
+        if self._encoding is not None:
+            tokens = self._encoding.encode(text, disallowed_special=())
+            return text if len(tokens) <= max_tokens else self._encoding.decode(tokens[:max_tokens])
+        return text[:max_tokens * 4]
+
+
+def _shingles(text: str, size: int = 3) -> set:
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def _overlap_length(left: str, right: str, max_overlap: int = 200) -> int:
+    """Length of the longest suffix of left that is also a prefix of right."""
+    for length in range(min(len(left), len(right), max_overlap), 0, -1):
+        if left.endswith(right[:length]):
+            return length
+    return 0
+
+
+class ContextPacker:
+    """
+    Assembles the retrieved chunks and chat history that go into the prompt.
+
+    Retrieved chunks are deduplicated (near-identical chunks, e.g. similar
+    CSV rows, are dropped by word-shingle Jaccard similarity), chunks from
+    the same source that overlap because of the splitter's chunk_overlap are
+    merged into one, and the result is trimmed to a token budget in
+    relevance order. Chat history is trimmed to its own budget, keeping the
+    most recent messages.
+    """
+
+    def __init__(
+        self,
+        max_context_tokens: int = 1500,
+        max_history_tokens: int = 1000,
+        dedupe_threshold: float = 0.8,
+        model_name: str = "gpt-3.5-turbo"
+    ):
+        """
+        Initialize the packer.
+
+        Args:
+            max_context_tokens: Token budget for retrieved context
+            max_history_tokens: Token budget for chat history
+            dedupe_threshold: Jaccard similarity above which a chunk counts as a duplicate
+            model_name: Model whose tokenizer is used for counting
+        """
+        self.max_context_tokens = max_context_tokens
+        self.max_history_tokens = max_history_tokens
+        self.dedupe_threshold = dedupe_threshold
+        self.tokens = TokenCounter(model_name)
+
+    def _dedupe(self, docs: List[Document]) -> List[Document]:
+        kept: List[Tuple[Document, set]] = []
+        for doc in docs:
+            shingles = _shingles(doc.page_content)
+            duplicate = False
+            for other, other_shingles in kept:
+                if doc.page_content in other.page_content:
+                    duplicate = True
+                    break
+                union = shingles | other_shingles
+                if union and len(shingles & other_shingles) / len(union) >= self.dedupe_threshold:
+                    duplicate = True
+                    break
+            if not duplicate:
+                kept.append((doc, shingles))
+        return [doc for doc, _ in kept]
+
+    @staticmethod
+    def _merge_neighbors(docs: List[Document]) -> List[Document]:
+        """Merge chunks of the same source whose edges overlap, keeping the first chunk's rank."""
+        merged: List[Document] = []
+        for doc in docs:
+            key = (doc.metadata.get("source"), doc.metadata.get("row_index"))
+            for i, existing in enumerate(merged):
+                if (existing.metadata.get("source"), existing.metadata.get("row_index")) != key:
+                    continue
+                overlap = _overlap_length(existing.page_content, doc.page_content)
+                if overlap:
+                    text = existing.page_content + doc.page_content[overlap:]
+                else:
+                    overlap = _overlap_length(doc.page_content, existing.page_content)
+                    if not overlap:
+                        continue
+                    text = doc.page_content + existing.page_content[overlap:]
+                merged[i] = Document(page_content=text, metadata=existing.metadata)
+                break
+            else:
+                merged.append(doc)
+        return merged
+
+    def pack_documents(self, docs: List[Document]) -> List[Document]:
+        """
+        Deduplicate, merge and budget retrieved chunks.
+
+        Args:
+            docs: Retrieved chunks, most relevant first
+
+        Returns:
+            The chunks to put in the prompt, most relevant first
+        """
+        packed = []
+        remaining = self.max_context_tokens
+        for doc in self._merge_neighbors(self._dedupe(docs)):
+            size = self.tokens.count(doc.page_content)
+            if size <= remaining:
+                packed.append(doc)
+                remaining -= size
+            elif not packed:
+                # Always keep some of the best chunk, even if it alone is over budget
+                packed.append(Document(
+                    page_content=self.tokens.truncate(doc.page_content, remaining),
+                    metadata=doc.metadata
+                ))
+                remaining = 0
+        return packed
+
+    def fit_history(self, messages: List[BaseMessage]) -> str:
+        """
+        Render as much recent chat history as fits the history budget.
+
+        A leading system message (the summary of older turns, see
+        history_summary) is always kept; the budget left is filled with the
+        most recent messages.
+
+        Args:
+            messages: Conversation messages, oldest first
+
+        Returns:
+            The history text passed to the prompt
+        """
+        kept = []
+        remaining = self.max_history_tokens
+        summary = []
+        if messages and isinstance(messages[0], SystemMessage):
+            summary = messages[:1]
+            remaining -= self.tokens.count(get_buffer_string(summary))
+            messages = messages[1:]
+        for message in reversed(messages):
+            size = self.tokens.count(get_buffer_string([message]))
+            if size > remaining:
+                break
+            kept.append(message)
+            remaining -= size
+        return get_buffer_string(summary + list(reversed(kept)))
+
+    def count(self, text: str) -> int:
+        """Count tokens in text."""
+        return self.tokens.count(text)
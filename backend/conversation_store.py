@@ -0,0 +1,441 @@
+import os
+import json
+import time
+import atexit
+import sqlite3
+import threading
+from abc import abstractmethod
+from typing import Dict, Any, List, Optional, Tuple
+from langchain_core.messages import BaseMessage
+from sessions import (
+    ConversationStore, SessionTable, DEFAULT_SESSION_ID, turns_to_messages, turn_window, message_window
+)
+
+
+DEFAULT_CONVERSATION_DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "conversations.sqlite")
+
+
+class BufferedConversationStore(ConversationStore):
+    """
+    Base for conversation stores that live outside the process.
+
+    Saved turns are handed to a background thread that writes them in
+    batches (group commit): every turn saved while a write is in progress, or
+    within flush_interval of the first one, goes into the next batch, so
+    answering a question never waits on a write and busy workers write once
+    per batch instead of once per turn. Session touches from reads ride along
+    with the next batch, or are written within a second. A read of a session
+    with buffered turns flushes first, so a worker always sees its own
+    writes; other workers see them once the batch is written.
+    """
+
+    def __init__(self, ttl_seconds: float = 3600, max_turns: int = 50,
+                 flush_interval: float = 0.005, batch_size: int = 100):
+        """
+        Initialize the write buffer and start the flusher thread.
+
+        Args:
+            ttl_seconds: Idle time after which a session expires
+            max_turns: Maximum question/answer pairs kept per session
+            flush_interval: How long to wait for more turns before writing a batch
+            batch_size: Number of buffered turns that are written without waiting
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_turns = max_turns
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending: List[Tuple[str, str, str, float]] = []
+        self._touched: Dict[str, float] = {}
+        self._dirty = set()
+        self._wake = threading.Event()
+        self._closed = False
+        self.flushes = 0
+        self.turns_written = 0
+        self._flusher = threading.Thread(target=self._flush_loop, name="conversation-flush", daemon=True)
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def _flush_loop(self):
+        while not self._closed:
+            self._wake.wait(1.0)
+            self._wake.clear()
+            if self.flush_interval and len(self._pending) < self.batch_size:
+                time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"❌ Error writing conversation turns: {e}")
+
+    def flush(self):
+        """Write all buffered turns and touches in one batch."""
+        with self._flush_lock:
+            with self._lock:
+                turns, self._pending = self._pending, []
+                touched, self._touched = self._touched, {}
+            if turns or touched:
+                self._write_batch(turns, touched)
+                self.flushes += 1
+                self.turns_written += len(turns)
+            with self._lock:
+                self._dirty = {session_id for session_id, _, _, _ in self._pending}
+
+    def _touch(self, session_id: str):
+        with self._lock:
+            self._touched[session_id] = time.time()
+
+    def _flush_if_dirty(self, session_id: str):
+        """Flush first if this session has turns that are not written yet."""
+        if session_id in self._dirty:
+            self.flush()
+
+    def save_turn(self, session_id: str, question: str, answer: str):
+        """
+        Buffer a question/answer pair for the next batched write.
+
+        Args:
+            session_id: Session identifier
+            question: The user's question
+            answer: The assistant's answer
+        """
+        now = time.time()
+        with self._lock:
+            self._pending.append((session_id, question, answer, now))
+            self._touched[session_id] = now
+            self._dirty.add(session_id)
+        self._wake.set()
+
+    def _drop_pending(self, session_id: str):
+        """Forget buffered writes for a session that is being cleared."""
+        with self._lock:
+            self._pending = [turn for turn in self._pending if turn[0] != session_id]
+            self._touched.pop(session_id, None)
+            self._dirty.discard(session_id)
+
+    @abstractmethod
+    def _write_batch(self, turns: List[Tuple[str, str, str, float]], touched: Dict[str, float]):
+        """Persist turns (session_id, question, answer, created_at) and last-access times."""
+
+    def close(self):
+        """Stop the flusher thread and write anything still buffered."""
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._flusher.join(timeout=5)
+        self.flush()
+
+
+class SQLiteConversationStore(BufferedConversationStore):
+    """
+    Conversation store in a SQLite database shared by every worker on the host.
+
+    The database runs in WAL mode, so readers in one worker never block on a
+    batch being written by another. Turns are kept one row each with an index
+    on (session_id, id), which makes reading the last N turns of a session a
+    short index range scan however long the conversation is.
+    """
+
+    def __init__(self, path: str = DEFAULT_CONVERSATION_DB_PATH, ttl_seconds: float = 3600, max_turns: int = 50,
+                 flush_interval: float = 0.005, batch_size: int = 100, cleanup_interval: float = 60):
+        """
+        Open (or create) the conversation database.
+
+        Args:
+            path: Path of the SQLite database file
+            ttl_seconds: Idle time after which a session expires
+            max_turns: Maximum question/answer pairs kept per session
+            flush_interval: How long to wait for more turns before writing a batch
+            batch_size: Number of buffered turns that are written without waiting
+            cleanup_interval: How often expired sessions are deleted
+        """
+        self.path = path
+        self.cleanup_interval = cleanup_interval
+        self._last_cleanup = 0.0
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = self._connect()
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, last_access REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS sessions_last_access ON sessions (last_access);"
+            "CREATE TABLE IF NOT EXISTS turns ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, "
+            "question TEXT NOT NULL, answer TEXT NOT NULL, created_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS turns_session ON turns (session_id, id);"
+        )
+        self._db.commit()
+        super().__init__(ttl_seconds=ttl_seconds, max_turns=max_turns,
+                         flush_interval=flush_interval, batch_size=batch_size)
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        return db
+
+    def _reader(self) -> sqlite3.Connection:
+        """Get this thread's read connection, so reads run alongside the writer."""
+        db = getattr(self._local, "db", None)
+        if db is None:
+            db = self._local.db = self._connect()
+        return db
+
+    def _write_batch(self, turns: List[Tuple[str, str, str, float]], touched: Dict[str, float]):
+        now = time.time()
+        with self._db:
+            self._db.executemany(
+                "INSERT INTO turns (session_id, question, answer, created_at) VALUES (?, ?, ?, ?)", turns
+            )
+            self._db.executemany(
+                "INSERT INTO sessions (session_id, last_access) VALUES (?, ?) "
+                "ON CONFLICT(session_id) DO UPDATE SET last_access = MAX(last_access, excluded.last_access)",
+                list(touched.items())
+            )
+            # Trim only the sessions that just grew
+            self._db.executemany(
+                "DELETE FROM turns WHERE session_id = ? AND id <= "
+                "(SELECT id FROM turns WHERE session_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                [(session_id, session_id, self.max_turns) for session_id in {turn[0] for turn in turns}]
+            )
+            if now - self._last_cleanup >= self.cleanup_interval:
+                self._delete_expired(now)
+                self._last_cleanup = now
+
+    def _delete_expired(self, now: float):
+        cutoff = now - self.ttl_seconds
+        self._db.execute(
+            "DELETE FROM turns WHERE session_id IN (SELECT session_id FROM sessions WHERE last_access < ?)",
+            (cutoff,)
+        )
+        self._db.execute("DELETE FROM sessions WHERE last_access < ?", (cutoff,))
+
+    def _read(self, session_id: str, turns: Optional[int]) -> Optional[List[BaseMessage]]:
+        """Read the last turns of a live session, or None if it does not exist or has expired."""
+        db = self._reader()
+        if not self._live(db, session_id):
+            return None
+        rows = db.execute(
+            "SELECT question, answer FROM "
+            "(SELECT id, question, answer FROM turns WHERE session_id = ? ORDER BY id DESC LIMIT ?) "
+            "ORDER BY id",
+            (session_id, turns or self.max_turns)
+        ).fetchall()
+        return turns_to_messages(rows)
+
+    def recent_messages(self, session_id: str = DEFAULT_SESSION_ID, turns: Optional[int] = None) -> List[BaseMessage]:
+        self._flush_if_dirty(session_id)
+        self._touch(session_id)
+        return self._read(session_id, turns) or []
+
+    def _live(self, db: sqlite3.Connection, session_id: str) -> bool:
+        """Whether a session exists and has not expired."""
+        row = db.execute("SELECT last_access FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        return row is not None and time.time() - row[0] <= self.ttl_seconds
+
+    def history(self, session_id: str = DEFAULT_SESSION_ID, offset: int = 0,
+                limit: Optional[int] = None) -> Optional[List[BaseMessage]]:
+        self._flush_if_dirty(session_id)
+        db = self._reader()
+        if not self._live(db, session_id):
+            return None
+        first, count = turn_window(offset, limit)
+        rows = db.execute(
+            "SELECT question, answer FROM turns WHERE session_id = ? ORDER BY id LIMIT ? OFFSET ?",
+            (session_id, -1 if count is None else count, first)
+        ).fetchall()
+        return message_window(rows, offset, limit)
+
+    def history_length(self, session_id: str = DEFAULT_SESSION_ID) -> int:
+        self._flush_if_dirty(session_id)
+        db = self._reader()
+        if not self._live(db, session_id):
+            return 0
+        return 2 * db.execute("SELECT COUNT(*) FROM turns WHERE session_id = ?", (session_id,)).fetchone()[0]
+
+    def clear(self, session_id: str = DEFAULT_SESSION_ID):
+        """Remove a session and its history."""
+        with self._flush_lock:
+            self._drop_pending(session_id)
+            with self._db:
+                self._db.execute("DELETE FROM turns WHERE session_id = ?", (session_id,))
+                self._db.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report conversation database size and write batching.
+
+        Returns:
+            Dictionary with session counts, message counts, content bytes and flush counts
+        """
+        db = self._reader()
+        cutoff = time.time() - self.ttl_seconds
+        active_sessions = db.execute("SELECT COUNT(*) FROM sessions WHERE last_access >= ?", (cutoff,)).fetchone()[0]
+        turn_count, content_bytes = db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(CAST(question AS BLOB)) + LENGTH(CAST(answer AS BLOB))), 0) "
+            "FROM turns WHERE session_id IN (SELECT session_id FROM sessions WHERE last_access >= ?)",
+            (cutoff,)
+        ).fetchone()
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "active_sessions": active_sessions,
+            "ttl_seconds": self.ttl_seconds,
+            "max_turns": self.max_turns,
+            "total_messages": turn_count * 2,
+            "content_bytes": content_bytes,
+            "pending_turns": len(self._pending),
+            "flushes": self.flushes,
+            "turns_written": self.turns_written
+        }
+
+    def close(self):
+        super().close()
+        self._db.close()
+
+
+class RedisConversationStore(BufferedConversationStore):
+    """
+    Conversation store in Redis, shared by every worker that can reach it.
+
+    Each session is a list of JSON-encoded turns under its own key. Batches
+    are written with one pipelined RPUSH/LTRIM/EXPIRE per session, and reads
+    fetch only the tail of the list with LRANGE, so both stay bounded. The
+    client only needs the redis-py interface, so Redis itself, a local
+    stand-in such as KeyDB, Dragonfly or Valkey, or fakeredis in-process all
+    work.
+    """
+
+    def __init__(self, client: Any, ttl_seconds: float = 3600, max_turns: int = 50,
+                 flush_interval: float = 0.005, batch_size: int = 100, prefix: str = "rag:conversation:"):
+        """
+        Initialize the store on an existing client.
+
+        Args:
+            client: A redis-py compatible client
+            ttl_seconds: Idle time after which a session expires
+            max_turns: Maximum question/answer pairs kept per session
+            flush_interval: How long to wait for more turns before writing a batch
+            batch_size: Number of buffered turns that are written without waiting
+            prefix: Key prefix for session lists
+        """
+        self.client = client
+        self.prefix = prefix
+        super().__init__(ttl_seconds=ttl_seconds, max_turns=max_turns,
+                         flush_interval=flush_interval, batch_size=batch_size)
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs: Any) -> "RedisConversationStore":
+        """Connect to the server at url (e.g. redis://localhost:6379/0)."""
+        import redis
+        return cls(redis.Redis.from_url(url), **kwargs)
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.prefix}{session_id}"
+
+    def _write_batch(self, turns: List[Tuple[str, str, str, float]], touched: Dict[str, float]):
+        by_session: Dict[str, List[str]] = {}
+        for session_id, question, answer, _ in turns:
+            by_session.setdefault(session_id, []).append(json.dumps({"q": question, "a": answer}))
+
+        ttl = max(int(self.ttl_seconds), 1)
+        pipe = self.client.pipeline(transaction=False)
+        for session_id, items in by_session.items():
+            key = self._key(session_id)
+            pipe.rpush(key, *items)
+            pipe.ltrim(key, -self.max_turns, -1)
+        for session_id in set(by_session) | set(touched):
+            pipe.expire(self._key(session_id), ttl)
+        pipe.execute()
+
+    def _pairs(self, items: List[bytes]) -> List[Tuple[str, str]]:
+        pairs = []
+        for item in items:
+            turn = json.loads(item)
+            pairs.append((turn["q"], turn["a"]))
+        return pairs
+
+    def _read(self, session_id: str, turns: Optional[int]) -> List[BaseMessage]:
+        items = self.client.lrange(self._key(session_id), -(turns or self.max_turns), -1)
+        return turns_to_messages(self._pairs(items))
+
+    def recent_messages(self, session_id: str = DEFAULT_SESSION_ID, turns: Optional[int] = None) -> List[BaseMessage]:
+        self._flush_if_dirty(session_id)
+        self._touch(session_id)
+        return self._read(session_id, turns)
+
+    def history(self, session_id: str = DEFAULT_SESSION_ID, offset: int = 0,
+                limit: Optional[int] = None) -> Optional[List[BaseMessage]]:
+        self._flush_if_dirty(session_id)
+        first, count = turn_window(offset, limit)
+        if count == 0:
+            return []
+        items = self.client.lrange(self._key(session_id), first, -1 if count is None else first + count - 1)
+        if not items and not self.client.exists(self._key(session_id)):
+            return None
+        return message_window(self._pairs(items), offset, limit)
+
+    def history_length(self, session_id: str = DEFAULT_SESSION_ID) -> int:
+        self._flush_if_dirty(session_id)
+        return 2 * self.client.llen(self._key(session_id))
+
+    def clear(self, session_id: str = DEFAULT_SESSION_ID):
+        """Remove a session and its history."""
+        with self._flush_lock:
+            self._drop_pending(session_id)
+            self.client.delete(self._key(session_id))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report conversation counts and write batching.
+
+        Returns:
+            Dictionary with session counts and flush counts
+        """
+        return {
+            "backend": "redis",
+            "active_sessions": sum(1 for _ in self.client.scan_iter(match=f"{self.prefix}*", count=1000)),
+            "ttl_seconds": self.ttl_seconds,
+            "max_turns": self.max_turns,
+            "pending_turns": len(self._pending),
+            "flushes": self.flushes,
+            "turns_written": self.turns_written
+        }
+
+
+def build_conversation_store(backend: str = None) -> ConversationStore:
+    """
+    Create the conversation store selected by CONVERSATION_STORE.
+
+    "memory" keeps conversations in the process and only suits a single
+    worker; "sqlite" and "redis" are shared, so the API can run with
+    several workers.
+
+    Args:
+        backend: "memory", "sqlite" or "redis" (defaults to CONVERSATION_STORE or "memory")
+
+    Returns:
+        The conversation store
+    """
+    backend = backend or os.getenv("CONVERSATION_STORE", "memory")
+    ttl_seconds = float(os.getenv("RAG_SESSION_TTL_SECONDS", "3600"))
+    max_turns = int(os.getenv("RAG_SESSION_MAX_TURNS", "50"))
+    if backend == "memory":
+        return SessionTable(
+            max_sessions=int(os.getenv("RAG_MAX_SESSIONS", "1000")),
+            ttl_seconds=ttl_seconds,
+            max_turns=max_turns
+        )
+
+    buffering = {
+        "ttl_seconds": ttl_seconds,
+        "max_turns": max_turns,
+        "flush_interval": float(os.getenv("CONVERSATION_FLUSH_MS", "5")) / 1000,
+        "batch_size": int(os.getenv("CONVERSATION_BATCH_SIZE", "100"))
+    }
+    if backend == "sqlite":
+        return SQLiteConversationStore(os.getenv("CONVERSATION_DB_PATH") or DEFAULT_CONVERSATION_DB_PATH, **buffering)
+    if backend == "redis":
+        return RedisConversationStore.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"), **buffering)
+    raise ValueError(f"Unknown conversation store: {backend}")
@@ -0,0 +1,107 @@
+import asyncio
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional, Awaitable, Any, Iterator, AsyncIterator
+from metrics import METRICS
+
+# Monotonic time by which the request being handled must finish, if it has a deadline
+_deadline: ContextVar[Optional[float]] = ContextVar("rag_deadline", default=None)
+
+_expired_counts: Counter = Counter()
+
+
+class DeadlineExceeded(Exception):
+    """The request's deadline passed before the named stage finished."""
+
+    def __init__(self, stage: str):
+        super().__init__(f"Deadline exceeded during {stage}")
+        self.stage = stage
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[Optional[float]]:
+    """
+    Give the enclosed work a deadline `seconds` from now.
+
+    A deadline already in effect is only ever shortened, never extended.
+    Passing None removes the deadline, for work that outlives the request
+    that started it (see singleflight).
+    """
+    if seconds is None:
+        deadline = None
+    else:
+        deadline = time.monotonic() + seconds
+        current = _deadline.get()
+        if current is not None:
+            deadline = min(deadline, current)
+    token = _deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or None without one."""
+    deadline = _deadline.get()
+    if deadline is None:
+        return None
+    return max(0.0, deadline - time.monotonic())
+
+
+def check_deadline(stage: str):
+    """Raise DeadlineExceeded if the current deadline has already passed."""
+    if remaining() == 0.0:
+        _record_expiry(stage)
+        raise DeadlineExceeded(stage)
+
+
+async def within_deadline(awaitable: Awaitable[Any], stage: str) -> Any:
+    """
+    Await a call, cancelling it if the current deadline passes first.
+
+    Args:
+        awaitable: The embedding, retrieval or LLM call to run
+        stage: Pipeline stage, reported in the DeadlineExceeded error
+
+    Returns:
+        The call's result
+    """
+    timeout = remaining()
+    if timeout is None:
+        return await awaitable
+    if timeout == 0.0:
+        # Close the coroutine so it is not reported as never awaited
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        _record_expiry(stage)
+        raise DeadlineExceeded(stage)
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError:
+        _record_expiry(stage)
+        raise DeadlineExceeded(stage) from None
+
+
+async def stream_within_deadline(stream: AsyncIterator[Any], stage: str) -> AsyncIterator[Any]:
+    """Iterate an async stream (e.g. LLM tokens), cancelling it if the current deadline passes first."""
+    iterator = stream.__aiter__()
+    while True:
+        try:
+            item = await within_deadline(iterator.__anext__(), stage)
+        except StopAsyncIteration:
+            return
+        yield item
+
+
+def _record_expiry(stage: str):
+    _expired_counts[stage] += 1
+
+
+METRICS.callback(
+    "rag_deadline_exceeded_total", "Requests cancelled because their deadline passed, by stage",
+    lambda: [({"stage": stage}, count) for stage, count in _expired_counts.items()],
+    kind="counter"
+)
@@ -0,0 +1,207 @@
+import os
+import json
+import logging
+import sqlite3
+import threading
+from typing import List, Dict, Any, Optional
+from langchain_core.documents import Document
+from projection import document_id
+from vector_backends import DEFAULT_LOCAL_INDEX_DIR
+
+logger = logging.getLogger(__name__)
+
+
+# Metadata kept with each vector when the text lives in the docstore: the id,
+# the fields retrieval filters on (see query_router.build_filter) and the
+# namespace field
+INDEX_FIELDS = ("chunk_id", "type", "source", "row_start", "row_end")
+
+
+def docstore_enabled() -> bool:
+    """Whether chunk text lives in the docstore rather than the vector index (CHUNK_DOCSTORE)."""
+    return os.getenv("CHUNK_DOCSTORE", "true").lower() == "true"
+
+
+def default_docstore_path(index_name: str) -> str:
+    """Where the docstore for a vector index lives (DOCSTORE_PATH overrides it)."""
+    return os.getenv("DOCSTORE_PATH") or os.path.join(
+        os.getenv("LOCAL_INDEX_DIR", DEFAULT_LOCAL_INDEX_DIR), f"{index_name}.docstore.sqlite"
+    )
+
+
+class ChunkDocstore:
+    """
+    SQLite store of chunk text and metadata, keyed by chunk id.
+
+    setup.py writes every chunk here and upserts vectors that carry only
+    INDEX_FIELDS, so queries transfer ids instead of text, and a file can
+    be re-chunked or its metadata re-rendered without touching its
+    vectors. Hits are filled in with hydrate() once it is known which of
+    them are used.
+
+    A file's new chunks are added before their vectors are upserted and its
+    old ones are only dropped by finish_file() once the new vectors are in,
+    so every live vector has its text whenever ingestion stops.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open (or create) the docstore at path.
+
+        Args:
+            path: SQLite file the chunks are stored in
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self.fetches = 0
+        self.chunks_fetched = 0
+        self.missing = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        # Let the API read while setup.py writes
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS chunks ("
+            "chunk_id TEXT PRIMARY KEY, file_key TEXT NOT NULL, text TEXT NOT NULL, metadata TEXT NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS chunks_file_key ON chunks (file_key)")
+        self._db.execute("CREATE TABLE IF NOT EXISTS files (file_key TEXT PRIMARY KEY, hash TEXT NOT NULL)")
+        self._db.commit()
+
+    @classmethod
+    def load(cls, path: str) -> Optional["ChunkDocstore"]:
+        """Open the docstore at path, or return None if there is none."""
+        if not os.path.exists(path):
+            return None
+        return cls(path)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def is_unchanged(self, file_key: str, content_hash: str) -> bool:
+        """Whether a file is stored with the same content."""
+        with self._lock:
+            row = self._db.execute("SELECT hash FROM files WHERE file_key = ?", (file_key,)).fetchone()
+        return row is not None and row[0] == content_hash
+
+    def file_keys(self) -> List[str]:
+        """Every file with chunks in the store, finished or not."""
+        with self._lock:
+            return [row[0] for row in self._db.execute(
+                "SELECT file_key FROM files UNION SELECT DISTINCT file_key FROM chunks"
+            )]
+
+    def add_chunks(self, file_key: str, chunks: List[Document]):
+        """Store a file's chunks (which carry chunk_id metadata), keeping its previous ones for now."""
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO chunks (chunk_id, file_key, text, metadata) VALUES (?, ?, ?, ?)",
+                [(chunk.metadata["chunk_id"], file_key, chunk.page_content, json.dumps(chunk.metadata))
+                 for chunk in chunks]
+            )
+            self._db.commit()
+
+    def finish_file(self, file_key: str, content_hash: str, chunk_ids: List[str]):
+        """Once a file's vectors are current, drop its chunks that are not among chunk_ids and record its hash."""
+        keep = set(chunk_ids)
+        with self._lock:
+            stale = [
+                row[0] for row in self._db.execute("SELECT chunk_id FROM chunks WHERE file_key = ?", (file_key,))
+                if row[0] not in keep
+            ]
+            self._db.executemany("DELETE FROM chunks WHERE chunk_id = ?", [(chunk_id,) for chunk_id in stale])
+            self._db.execute("INSERT OR REPLACE INTO files (file_key, hash) VALUES (?, ?)", (file_key, content_hash))
+            self._db.commit()
+
+    def remove_file(self, file_key: str):
+        """Drop a file's chunks from the store."""
+        with self._lock:
+            self._db.execute("DELETE FROM chunks WHERE file_key = ?", (file_key,))
+            self._db.execute("DELETE FROM files WHERE file_key = ?", (file_key,))
+            self._db.commit()
+
+    def get(self, chunk_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Fetch chunks by id in bulk.
+
+        Args:
+            chunk_ids: Chunk ids to fetch
+
+        Returns:
+            chunk_id -> {"text": ..., "metadata": ...} for the ids found
+        """
+        found = {}
+        ids = list(dict.fromkeys(chunk_ids))
+        with self._lock:
+            for i in range(0, len(ids), 500):
+                batch = ids[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._db.execute(
+                    f"SELECT chunk_id, text, metadata FROM chunks WHERE chunk_id IN ({placeholders})", batch
+                ).fetchall()
+                for chunk_id, text, metadata in rows:
+                    found[chunk_id] = {"text": text, "metadata": json.loads(metadata)}
+            self.fetches += 1
+            self.chunks_fetched += len(found)
+        return found
+
+    def hydrate(self, docs: List[Document]) -> List[Document]:
+        """
+        Fill in the text and full metadata of hits that carry only ids.
+
+        Hits that already have text (e.g. lexical hits, or an index built
+        before the docstore) are returned as they are. Hits whose chunk is
+        not in the store cannot be shown, so they are dropped, counted in
+        `missing` and logged: it means the docstore and the index have
+        drifted apart (e.g. the docstore was deleted or belongs to another
+        index) and setup.py should be re-run. The documents given are not
+        modified, since coalesced requests may share them.
+
+        Args:
+            docs: Retrieved documents, best first
+
+        Returns:
+            The documents with their text, in the same order
+        """
+        wanted = [document_id(doc) for doc in docs if not doc.page_content]
+        if not wanted:
+            return docs
+        found = self.get(wanted)
+        hydrated = []
+        missing = []
+        for doc in docs:
+            if doc.page_content:
+                hydrated.append(doc)
+                continue
+            record = found.get(document_id(doc))
+            if record is None:
+                missing.append(document_id(doc))
+                continue
+            hydrated.append(Document(page_content=record["text"], metadata=record["metadata"]))
+        if missing:
+            with self._lock:
+                self.missing += len(missing)
+            logger.warning("%d retrieved chunks are not in the docstore (%s); re-run setup.py",
+                           len(missing), ", ".join(missing[:3]))
+        return hydrated
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get docstore size and fetch counts.
+
+        Returns:
+            Dictionary with the chunks stored, bulk fetches made, chunks
+            fetched, and hits dropped because their chunk was missing
+        """
+        return {
+            "chunks": len(self),
+            "fetches": self.fetches,
+            "chunks_fetched": self.chunks_fetched,
+            "missing": self.missing
+        }
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,292 @@
+import os
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+from langchain_core.embeddings import Embeddings
+from metrics import stage_timer
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text before hashing so trivially different inputs share a cache entry."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Caching wrapper around an Embeddings model.
+
+    Vectors are looked up in an in-memory LRU tier first, then in an optional
+    SQLite tier on disk, and only the misses are sent to the wrapped model
+    (in one batched call for embed_documents). Entries are keyed by model name
+    and a hash of the normalized text, so queries and document chunks share
+    the same cache. The async methods read and write the disk tier on a
+    worker thread.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_memory_entries: int = 10000,
+        disk_path: Optional[str] = None,
+        max_disk_entries: int = 200000
+    ):
+        """
+        Initialize the caching wrapper.
+
+        Args:
+            embeddings: The embeddings model to wrap
+            max_memory_entries: Maximum number of vectors kept in memory
+            disk_path: Path of the SQLite cache file, or None for memory only
+            max_disk_entries: Maximum number of vectors kept on disk
+        """
+        self.embeddings = embeddings
+        self.model_name = getattr(embeddings, "model", None) or type(embeddings).__name__
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.disk_path = disk_path
+        self._memory: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        # Rows in the disk tier, counted as they are written instead of on every write
+        self._disk_entries = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.lookup_seconds = 0.0
+        self.miss_seconds = 0.0
+
+        if disk_path:
+            os.makedirs(os.path.dirname(os.path.abspath(disk_path)), exist_ok=True)
+            # Shared with setup.py and other API workers: WAL lets readers run alongside a
+            # writer, and the timeout waits out another process's write instead of failing
+            self._db = sqlite3.connect(disk_path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS embeddings_last_access ON embeddings (last_access)")
+            self._db.commit()
+            self._disk_entries = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def _key(self, text: str) -> str:
+        digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+        return f"{self.model_name}:{digest}"
+
+    def _lookup_memory(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Find vectors for the given keys in the memory tier."""
+        start = time.perf_counter()
+        found = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+                    self.memory_hits += 1
+            self.lookup_seconds += time.perf_counter() - start
+        return found
+
+    def _lookup_disk(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Find vectors for the given (unique) keys in the disk tier, promoting them into memory."""
+        start = time.perf_counter()
+        found = {}
+        with self._lock:
+            now = time.time()
+            for i in range(0, len(keys), 500):
+                batch = keys[i:i + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._db.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ).fetchall()
+                for key, blob in rows:
+                    vector = array("f", blob).tolist()
+                    found[key] = vector
+                    self._remember(key, vector)
+                    self.disk_hits += 1
+                self._db.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key, _ in rows]
+                )
+            self._db.commit()
+            self.lookup_seconds += time.perf_counter() - start
+        return found
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Find cached vectors for the given keys, promoting disk hits into memory."""
+        found = self._lookup_memory(keys)
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if self._db is not None and missing:
+            found.update(self._lookup_disk(missing))
+        return found
+
+    async def _alookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Async version of _lookup(); the disk tier is read on a worker thread."""
+        found = self._lookup_memory(keys)
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if self._db is not None and missing:
+            found.update(await asyncio.to_thread(self._lookup_disk, missing))
+        return found
+
+    def _remember(self, key: str, vector: List[float]):
+        """Store a vector in the memory tier, evicting the least recently used entries."""
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _store_memory(self, items: Dict[str, List[float]]):
+        """Store freshly computed vectors in the memory tier."""
+        with self._lock:
+            for key, vector in items.items():
+                self._remember(key, vector)
+
+    def _store_disk(self, items: Dict[str, List[float]]):
+        """
+        Store freshly computed vectors in the disk tier.
+
+        Once it holds more than max_disk_entries rows, the least recently
+        used tenth is evicted in one sweep, so the table is only counted and
+        trimmed every so often rather than on every write.
+        """
+        with self._lock:
+            now = time.time()
+            inserted = self._db.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+                [(key, array("f", vector).tobytes(), now) for key, vector in items.items()]
+            ).rowcount
+            if inserted < len(items):
+                # Another process stored some of them first
+                self._db.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?", [(now, key) for key in items]
+                )
+            self._disk_entries += inserted
+            if self._disk_entries > self.max_disk_entries:
+                # Recount, since other processes (setup.py, API workers) may share the file
+                self._disk_entries = self._db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+                if self._disk_entries > self.max_disk_entries:
+                    self._disk_entries -= self._db.execute(
+                        "DELETE FROM embeddings WHERE key IN "
+                        "(SELECT key FROM embeddings ORDER BY last_access LIMIT ?)",
+                        (self._disk_entries - self.max_disk_entries * 9 // 10,)
+                    ).rowcount
+            self._db.commit()
+
+    def _store(self, items: Dict[str, List[float]]):
+        """Store freshly computed vectors in both tiers."""
+        self._store_memory(items)
+        if self._db is not None and items:
+            self._store_disk(items)
+
+    async def _astore(self, items: Dict[str, List[float]]):
+        """Async version of _store(); the disk tier is written on a worker thread."""
+        self._store_memory(items)
+        if self._db is not None and items:
+            await asyncio.to_thread(self._store_disk, items)
+
+    def _count_misses(self, misses: int = 0, seconds: float = 0.0):
+        """Add to the miss counters, which embedding calls on several threads update."""
+        with self._lock:
+            self.misses += misses
+            self.miss_seconds += seconds
+
+    def _misses(self, texts: List[str], keys: List[str], found: Dict[str, List[float]]) -> Dict[str, str]:
+        """Map each uncached key to one text that needs embedding."""
+        pending = {}
+        for text, key in zip(texts, keys):
+            if key not in found and key not in pending:
+                pending[key] = text
+        self._count_misses(len(pending))
+        return pending
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Embed documents, sending only uncached texts to the wrapped model in one call."""
+        with stage_timer("embed"):
+            keys = [self._key(text) for text in texts]
+            found = self._lookup(keys)
+            pending = self._misses(texts, keys, found)
+            if pending:
+                start = time.perf_counter()
+                vectors = self.embeddings.embed_documents(list(pending.values()))
+                self._count_misses(seconds=time.perf_counter() - start)
+                computed = dict(zip(pending.keys(), vectors))
+                self._store(computed)
+                found.update(computed)
+            return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Embed a query, using the cache when possible."""
+        with stage_timer("embed"):
+            key = self._key(text)
+            found = self._lookup([key])
+            if key in found:
+                return found[key]
+            self._count_misses(1)
+            start = time.perf_counter()
+            vector = self.embeddings.embed_query(text)
+            self._count_misses(seconds=time.perf_counter() - start)
+            self._store({key: vector})
+            return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """Async version of embed_documents()."""
+        with stage_timer("embed"):
+            keys = [self._key(text) for text in texts]
+            found = await self._alookup(keys)
+            pending = self._misses(texts, keys, found)
+            if pending:
+                start = time.perf_counter()
+                vectors = await self.embeddings.aembed_documents(list(pending.values()))
+                self._count_misses(seconds=time.perf_counter() - start)
+                computed = dict(zip(pending.keys(), vectors))
+                await self._astore(computed)
+                found.update(computed)
+            return [found[key] for key in keys]
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """Async version of embed_query()."""
+        with stage_timer("embed"):
+            key = self._key(text)
+            found = await self._alookup([key])
+            if key in found:
+                return found[key]
+            self._count_misses(1)
+            start = time.perf_counter()
+            vector = await self.embeddings.aembed_query(text)
+            self._count_misses(seconds=time.perf_counter() - start)
+            await self._astore({key: vector})
+            return vector
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report cache effectiveness.
+
+        Returns:
+            Dictionary with hit/miss counts, hit rate and latency totals
+        """
+        with self._lock:
+            memory_entries = len(self._memory)
+            memory_hits, disk_hits, misses = self.memory_hits, self.disk_hits, self.misses
+            lookup_seconds, miss_seconds = self.lookup_seconds, self.miss_seconds
+        hits = memory_hits + disk_hits
+        lookups = hits + misses
+        return {
+            "model": self.model_name,
+            "memory_entries": memory_entries,
+            "max_memory_entries": self.max_memory_entries,
+            "disk_path": self.disk_path,
+            "memory_hits": memory_hits,
+            "disk_hits": disk_hits,
+            "misses": misses,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "lookup_ms_total": round(lookup_seconds * 1000, 2),
+            "miss_ms_total": round(miss_seconds * 1000, 2),
+            "avg_miss_ms": round(miss_seconds * 1000 / misses, 2) if misses else 0.0
+        }
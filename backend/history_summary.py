@@ -0,0 +1,231 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Callable, Tuple
+from langchain_core.messages import BaseMessage, SystemMessage, get_buffer_string
+from context_packing import TokenCounter
+from sessions import turns_to_messages
+from metrics import METRICS, current_timings, observe_stage, observe_tokens
+
+
+MEMORY_MODES = ("buffer", "summary")
+
+SUMMARY_PROMPT = """Progressively summarize the conversation between a product manager and PM Copilot, adding onto the previous summary and returning a new summary. Keep decisions, requirements, feature names, numbers, owners and open questions; leave out pleasantries.
+
+Current summary:
+{summary}
+
+New lines of conversation:
+{new_lines}
+
+New summary:"""
+
+
+def turn_key(question: str, answer: str) -> str:
+    """Identify a question/answer pair by its content."""
+    return hashlib.sha1(f"{question}\x00{answer}".encode("utf-8")).hexdigest()
+
+
+def message_pairs(messages: List[BaseMessage]) -> List[Tuple[str, str]]:
+    """Collapse alternating human and AI messages back into (question, answer) pairs."""
+    return [(str(question.content), str(answer.content)) for question, answer in zip(messages[0::2], messages[1::2])]
+
+
+class RollingSummarizer:
+    """
+    Keep the last few turns of a conversation verbatim and older turns as a
+    running summary.
+
+    Once turns fall out of the verbatim window they are folded into the
+    session's summary by an LLM call on a background thread, after the
+    answer has been returned, so the request path never waits on it. Until
+    a fold finishes, turns it has not covered yet stay verbatim, so nothing
+    drops out of the prompt in the meantime. The summary is capped at
+    max_tokens.
+
+    The summary records the last turn it covers by content, so it lines up
+    with the store's messages however many turns the store returns.
+    Summaries live in this process (like the response cache): a session
+    this process has not summarized is passed through unchanged.
+    """
+
+    def __init__(self, llm: Any, tokens: TokenCounter, recent_turns: int = 3, fold_every: int = 2,
+                 max_tokens: int = 256, max_sessions: int = 1000):
+        """
+        Initialize the summarizer.
+
+        Args:
+            llm: Chat model that writes the summaries
+            tokens: Token counter for the prompt model
+            recent_turns: Question/answer pairs kept verbatim
+            fold_every: Turns that must have left the verbatim window before
+                they are summarized, so a long conversation costs one summary
+                call per fold_every turns rather than one per turn
+            max_tokens: Longest summary kept, in tokens
+            max_sessions: Summaries held at once (least recently used are dropped)
+        """
+        self.llm = llm.bind(max_tokens=max_tokens)
+        self.tokens = tokens
+        self.recent_turns = recent_turns
+        self.fold_every = max(1, fold_every)
+        self.max_tokens = max_tokens
+        self.max_sessions = max_sessions
+        # session_id -> {"summary": ..., "last_key": key of the newest summarized turn, "turns": turns summarized}
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        # Bumped when a session is cleared, so a fold already running does not bring it back
+        self._epochs: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._running = set()
+        self._rerun = set()
+        self._pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="summarize")
+        self.summaries = 0
+        self.failures = 0
+        self.compactions = 0
+        self.tokens_saved = 0
+        self._register_metrics()
+
+    @staticmethod
+    def _uncovered_from(pairs: List[Tuple[str, str]], last_key: Optional[str]) -> int:
+        """Index of the first pair the summary does not cover."""
+        if last_key is None:
+            return 0
+        for index, (question, answer) in enumerate(pairs):
+            if turn_key(question, answer) == last_key:
+                return index + 1
+        # The last summarized turn is older than every pair given
+        return 0
+
+    def compact(self, session_id: str, messages: List[BaseMessage]) -> List[BaseMessage]:
+        """
+        Replace the turns a session's summary covers with the summary.
+
+        Args:
+            session_id: Session the messages belong to
+            messages: The session's recent messages, oldest first
+
+        Returns:
+            A system message carrying the summary followed by the turns it
+            does not cover, or the messages unchanged if there is no summary
+        """
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                return messages
+            self._sessions.move_to_end(session_id)
+            summary, last_key = state["summary"], state["last_key"]
+
+        start = self._uncovered_from(message_pairs(messages), last_key)
+        compacted = [SystemMessage(content=f"Summary of the earlier conversation: {summary}")] + messages[start * 2:]
+        saved = max(0, self.tokens.count(get_buffer_string(messages)) - self.tokens.count(get_buffer_string(compacted)))
+        self.compactions += 1
+        self.tokens_saved += saved
+        observe_tokens("history_saved", saved)
+        current_timings()["history_tokens_saved"] = saved
+        return compacted
+
+    def schedule(self, session_id: str, load: Callable[[], Optional[List[BaseMessage]]]):
+        """
+        Fold turns that left the verbatim window into the summary, in the background.
+
+        Args:
+            session_id: Session that just finished a turn
+            load: Reads the session's stored messages (called on the worker thread)
+        """
+        with self._lock:
+            if session_id in self._running:
+                # The running fold re-reads the session when it is done
+                self._rerun.add(session_id)
+                return
+            self._running.add(session_id)
+        self._pool.submit(self._run, session_id, load)
+
+    def _run(self, session_id: str, load: Callable[[], Optional[List[BaseMessage]]]):
+        try:
+            while True:
+                self._fold(session_id, load() or [])
+                with self._lock:
+                    if session_id not in self._rerun:
+                        return
+                    self._rerun.discard(session_id)
+        except Exception as e:
+            self.failures += 1
+            print(f"❌ Error summarizing conversation: {e}")
+        finally:
+            with self._lock:
+                self._running.discard(session_id)
+                self._rerun.discard(session_id)
+
+    def _fold(self, session_id: str, messages: List[BaseMessage]):
+        pairs = message_pairs(messages)
+        with self._lock:
+            state = self._sessions.get(session_id) or {"summary": "", "last_key": None, "turns": 0}
+            epoch = self._epochs.get(session_id, 0)
+        start = self._uncovered_from(pairs, state["last_key"])
+        old = pairs[start:max(start, len(pairs) - self.recent_turns)]
+        if len(old) < self.fold_every:
+            return
+
+        started = time.perf_counter()
+        prompt = SUMMARY_PROMPT.format(
+            summary=state["summary"] or "(none yet)",
+            new_lines=get_buffer_string(turns_to_messages(old))
+        )
+        summary = self.tokens.truncate(str(self.llm.invoke(prompt).content).strip(), self.max_tokens)
+        observe_stage("summarize", time.perf_counter() - started)
+
+        with self._lock:
+            if self._epochs.get(session_id, 0) != epoch:
+                return
+            self._sessions[session_id] = {
+                "summary": summary,
+                "last_key": turn_key(*old[-1]),
+                "turns": state["turns"] + len(old)
+            }
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        self.summaries += 1
+
+    def forget(self, session_id: str):
+        """Drop a session's summary, e.g. when its history is cleared."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._epochs[session_id] = self._epochs.get(session_id, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get summary counts and the prompt tokens they saved.
+
+        Returns:
+            Dictionary with sessions summarized, summary calls made and
+            failed, and history tokens saved in total and per compacted turn
+        """
+        with self._lock:
+            sessions = len(self._sessions)
+            pending = len(self._running)
+        return {
+            "mode": "summary",
+            "recent_turns": self.recent_turns,
+            "max_tokens": self.max_tokens,
+            "sessions": sessions,
+            "pending": pending,
+            "summaries": self.summaries,
+            "failures": self.failures,
+            "compacted_turns": self.compactions,
+            "tokens_saved": self.tokens_saved,
+            "mean_tokens_saved": round(self.tokens_saved / self.compactions, 1) if self.compactions else 0.0
+        }
+
+    def _register_metrics(self):
+        METRICS.callback(
+            "rag_history_summaries_total", "Conversation summary updates, by outcome",
+            lambda: [({"outcome": "ok"}, self.summaries), ({"outcome": "error"}, self.failures)],
+            kind="counter"
+        )
+        METRICS.callback(
+            "rag_history_tokens_saved_total", "Chat history tokens kept out of prompts by summarizing older turns",
+            lambda: [({}, self.tokens_saved)],
+            kind="counter"
+        )
@@ -0,0 +1,138 @@
+from collections import Counter
+from typing import List, Dict, Any, Optional, Sequence
+from pydantic import Field
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+from lexical_index import BM25Index
+from projection import document_id
+from metrics import current_timings, stage_timer
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[Document]], k: int = 60) -> List[Document]:
+    """
+    Merge ranked result lists with reciprocal rank fusion.
+
+    Each document scores sum(1 / (k + rank)) over the lists it appears in,
+    so documents ranked well by several retrievers rise to the top without
+    their raw scores (cosine similarity, BM25) having to be comparable.
+    Ties keep the order of the earlier lists.
+
+    Args:
+        rankings: Result lists, best first
+        k: Damping constant; larger values flatten the rank contribution
+
+    Returns:
+        The distinct documents, best first
+    """
+    scores: Dict[str, float] = {}
+    documents: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            doc_id = document_id(doc)
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank)
+            documents.setdefault(doc_id, doc)
+    order = sorted(scores, key=lambda doc_id: -scores[doc_id])
+    return [documents[doc_id] for doc_id in order]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retriever combining the vector store with a BM25 index.
+
+    Dense and lexical candidates are merged with reciprocal rank fusion. When
+    the lexical ranking is confident on its own (the best hit contains every
+    query term and clearly outscores the runner-up), the lexical results are
+    returned directly and the query is never embedded. Without a lexical
+    index this is a plain similarity search. The path taken is recorded as
+    "retrieval_path" in the request's timings and counted in `paths`.
+    """
+
+    vectorstore: VectorStore
+    lexical: Optional[BM25Index] = None
+    k: int = 5
+    # Candidates fetched from each retriever before fusion
+    fetch_k: int = 20
+    rrf_k: int = 60
+    # Best lexical score must be at least this multiple of the second best to skip the embedding
+    skip_margin: float = 1.5
+    paths: Counter = Field(default_factory=Counter)
+
+    def _lexical(self, query: str, k: int, filter: Optional[Dict[str, Any]]) -> List[Any]:
+        if self.lexical is None:
+            return []
+        with stage_timer("lexical"):
+            return self.lexical.search(query, k=k, filter=filter)
+
+    def _is_confident(self, hits: List[Any]) -> bool:
+        """Whether lexical hits alone are trustworthy enough to skip dense retrieval."""
+        if not hits or hits[0][2] < 1.0:
+            return False
+        return len(hits) == 1 or hits[0][1] >= self.skip_margin * hits[1][1]
+
+    def needs_embedding(self, query: str, k: Optional[int] = None, filter: Optional[Dict[str, Any]] = None) -> bool:
+        """Whether searching for the query will embed it, i.e. it has no confident lexical match."""
+        return not self._is_confident(self._lexical(query, max(k or self.k, self.fetch_k), filter))
+
+    def _finish(self, path: str, docs: List[Document], k: int) -> List[Document]:
+        self.paths[path] += 1
+        current_timings()["retrieval_path"] = path
+        return docs[:k]
+
+    def _fuse(self, dense: List[Document], hits: List[Any], k: int) -> List[Document]:
+        if not hits:
+            return self._finish("dense", dense, k)
+        lexical = [doc for doc, _, _ in hits]
+        return self._finish("hybrid", reciprocal_rank_fusion([dense, lexical], self.rrf_k), k)
+
+    def search(self, query: str, k: Optional[int] = None, filter: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """
+        Retrieve the k best chunks for a query.
+
+        Args:
+            query: Search query
+            k: Number of results (defaults to the retriever's k)
+            filter: Optional Pinecone-style metadata filter
+
+        Returns:
+            The documents, best first
+        """
+        k = k or self.k
+        candidates = max(k, self.fetch_k)
+        hits = self._lexical(query, candidates, filter)
+        if self._is_confident(hits):
+            return self._finish("lexical", [doc for doc, _, _ in hits], k)
+        dense = self.vectorstore.similarity_search(query, k=candidates if hits else k, filter=filter)
+        return self._fuse(dense, hits, k)
+
+    async def asearch(self, query: str, k: Optional[int] = None, filter: Optional[Dict[str, Any]] = None,
+                      vector: Optional[List[float]] = None) -> List[Document]:
+        """
+        Async version of search().
+
+        Args:
+            query: Search query
+            k: Number of results (defaults to the retriever's k)
+            filter: Optional Pinecone-style metadata filter
+            vector: The query's embedding, if already computed (e.g. for a batch)
+
+        Returns:
+            The documents, best first
+        """
+        k = k or self.k
+        candidates = max(k, self.fetch_k)
+        hits = self._lexical(query, candidates, filter)
+        if self._is_confident(hits):
+            return self._finish("lexical", [doc for doc, _, _ in hits], k)
+        fetch = candidates if hits else k
+        if vector is not None:
+            dense = await self.vectorstore.asimilarity_search_by_vector(vector, k=fetch, filter=filter)
+        else:
+            dense = await self.vectorstore.asimilarity_search(query, k=fetch, filter=filter)
+        return self._fuse(dense, hits, k)
+
+    def _get_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        return self.search(query)
+
+    async def _aget_relevant_documents(self, query: str, *, run_manager=None) -> List[Document]:
+        return await self.asearch(query)
@@ -0,0 +1,75 @@
+import os
+import csv
+from typing import List, Iterator, Tuple
+from langchain_core.documents import Document
+from langchain_community.document_loaders import TextLoader
+from chunking import Chunker
+from query_router import DOCUMENT_TYPES
+
+
+# Folders under the data directory that are ingested (one per document type), and the file types loaded from them
+DATA_FOLDERS = DOCUMENT_TYPES
+SUPPORTED_EXTENSIONS = (".md", ".txt", ".csv")
+
+# Chunk budget in tokens
+CHUNK_TOKENS = int(os.getenv("INGEST_CHUNK_TOKENS", "300"))
+CHUNK_OVERLAP_TOKENS = int(os.getenv("INGEST_CHUNK_OVERLAP_TOKENS", "30"))
+
+
+def make_chunker() -> Chunker:
+    """Create the structure-aware chunker used for ingestion."""
+    return Chunker(max_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS)
+
+
+def iter_source_files(base_path: str) -> Iterator[Tuple[str, str, str]]:
+    """
+    Walk the data folders in a stable order.
+
+    Args:
+        base_path: Data directory containing the prds, sprints and roadmaps folders
+
+    Yields:
+        Tuples of (folder, filename, file_path) for each supported file
+    """
+    for folder in DATA_FOLDERS:
+        full_path = os.path.join(base_path, folder)
+
+        # Check if folder exists
+        if not os.path.exists(full_path):
+            print(f"Warning: Folder {full_path} does not exist, skipping...")
+            continue
+
+        for filename in sorted(os.listdir(full_path)):
+            if filename.endswith(SUPPORTED_EXTENSIONS):
+                yield folder, filename, os.path.join(full_path, filename)
+
+
+def load_file(folder: str, filename: str, file_path: str) -> List[Document]:
+    """Load one source file into Documents tagged with its type and source."""
+    docs = []
+
+    # Load .md or .txt files
+    if filename.endswith(".md") or filename.endswith(".txt"):
+        loader = TextLoader(file_path, encoding='utf-8')
+        for doc in loader.load():
+            doc.metadata["type"] = folder
+            doc.metadata["source"] = filename
+            docs.append(doc)
+
+    # Load .csv files
+    elif filename.endswith(".csv"):
+        with open(file_path, newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for row_idx, row in enumerate(reader):
+                content = "\n".join(f"{k}: {v}" for k, v in row.items())
+                doc = Document(
+                    page_content=content,
+                    metadata={
+                        "type": folder,
+                        "source": filename,
+                        "row_index": row_idx
+                    }
+                )
+                docs.append(doc)
+
+    return docs
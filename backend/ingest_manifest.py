@@ -0,0 +1,166 @@
+import os
+import json
+import hashlib
+from typing import List, Dict, Any, Optional, Set
+from langchain_core.documents import Document
+
+
+def file_hash(path: str) -> str:
+    """Hash a file's bytes."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def assign_chunk_ids(file_key: str, chunks: List[Document]) -> List[str]:
+    """
+    Give each chunk of a file a deterministic id and store it in chunk_id metadata.
+
+    The id is derived from the file key and the chunk's content and
+    metadata, so an unchanged chunk keeps its id across runs, and an edited
+    chunk, or one whose position moved (e.g. a CSV group whose row_start
+    and row_end shifted because a row was inserted above it), gets a new
+    one and is upserted again. Identical chunks within a file are told
+    apart by occurrence.
+
+    Args:
+        file_key: Stable identifier of the source file, e.g. "prds/airpod.md"
+        chunks: The file's chunks
+
+    Returns:
+        The chunk ids, in chunk order
+    """
+    seen: Dict[str, int] = {}
+    ids = []
+    for chunk in chunks:
+        metadata = {key: value for key, value in chunk.metadata.items() if key != "chunk_id"}
+        digest = hashlib.sha256(chunk.page_content.encode("utf-8"))
+        digest.update(b"\0" + json.dumps(metadata, sort_keys=True, default=str).encode("utf-8"))
+        content_hash = digest.hexdigest()
+        occurrence = seen.get(content_hash, 0)
+        seen[content_hash] = occurrence + 1
+        chunk_id = hashlib.sha256(f"{file_key}\0{occurrence}\0{content_hash}".encode("utf-8")).hexdigest()[:32]
+        chunk.metadata["chunk_id"] = chunk_id
+        ids.append(chunk_id)
+    return ids
+
+
+class IngestManifest:
+    """
+    Record of what has been ingested into an index.
+
+    For every source file the manifest keeps the file's content hash and the
+    ids of the chunks it produced. Comparing a new run against it tells
+    setup.py which files can be skipped, which chunks need embedding and
+    upserting, and which vectors must be deleted.
+    """
+
+    def __init__(self, path: str):
+        """
+        Load the manifest at path, or start an empty one.
+
+        Args:
+            path: JSON file the manifest is stored in
+        """
+        self.path = path
+        self.files: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.files = json.load(f).get("files", {})
+
+    def get(self, file_key: str) -> Optional[Dict[str, Any]]:
+        """Get the recorded entry for a file, if any."""
+        return self.files.get(file_key)
+
+    def is_unchanged(self, file_key: str, content_hash: str) -> bool:
+        """Whether a file has the same content as when it was last ingested."""
+        entry = self.files.get(file_key)
+        return entry is not None and entry["hash"] == content_hash
+
+    def diff(self, file_key: str, chunk_ids: List[str]) -> Dict[str, List[str]]:
+        """
+        Compare a file's new chunk ids with the recorded ones.
+
+        Returns:
+            Dictionary with "upsert" (new ids) and "delete" (ids no longer produced)
+        """
+        old_ids = set(self.files.get(file_key, {}).get("chunk_ids", []))
+        new_ids = set(chunk_ids)
+        return {
+            "upsert": [chunk_id for chunk_id in chunk_ids if chunk_id not in old_ids],
+            "delete": sorted(old_ids - new_ids)
+        }
+
+    def record(self, file_key: str, content_hash: str, chunk_ids: List[str]):
+        """Record a successfully ingested file."""
+        self.files[file_key] = {"hash": content_hash, "chunk_ids": chunk_ids}
+
+    def remove(self, file_key: str):
+        """Forget a file that no longer exists."""
+        self.files.pop(file_key, None)
+
+    def save(self):
+        """Write the manifest atomically."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "files": self.files}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+class IngestCheckpoint:
+    """
+    Progress of files whose chunks are only partly in the index.
+
+    While a run is upserting a file, the ids of its chunks that are already
+    in the index are kept here (with the file's content hash). The file is
+    written alongside the manifest, so a run that is interrupted part way
+    through a file resumes without upserting those chunks again. Entries are
+    dropped once the file is recorded in the manifest, and the file is
+    removed when nothing is left in progress.
+    """
+
+    def __init__(self, path: str):
+        """
+        Load the checkpoint at path, or start an empty one.
+
+        Args:
+            path: JSON file the checkpoint is stored in
+        """
+        self.path = path
+        self.files: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.files = json.load(f).get("files", {})
+
+    def done(self, file_key: str, content_hash: str) -> Set[str]:
+        """Chunk ids of this version of a file that an earlier run already upserted."""
+        entry = self.files.get(file_key)
+        if entry is None or entry["hash"] != content_hash:
+            return set()
+        return set(entry["done"])
+
+    def mark(self, file_key: str, content_hash: str, chunk_ids: List[str]):
+        """Record chunks of a file as upserted."""
+        entry = self.files.get(file_key)
+        if entry is None or entry["hash"] != content_hash:
+            entry = self.files[file_key] = {"hash": content_hash, "done": []}
+        entry["done"].extend(chunk_ids)
+
+    def finish(self, file_key: str):
+        """Forget a file once the manifest records it."""
+        self.files.pop(file_key, None)
+
+    def save(self):
+        """Write the checkpoint atomically, or remove it when nothing is in progress."""
+        if not self.files:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "files": self.files}, f)
+        os.replace(tmp_path, self.path)
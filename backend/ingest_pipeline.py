@@ -0,0 +1,205 @@
+import time
+import queue
+import threading
+from typing import List, Dict, Any, Tuple, Iterable, Iterator, Optional, Callable, Sequence
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from rate_limit import retry_with_backoff
+from vector_backends import upsert_embeddings
+
+
+class IngestPipeline:
+    """
+    Streaming embed -> upsert pipeline for ingestion.
+
+    Chunks are read lazily from any iterable (e.g. a generator that walks,
+    loads and splits files) and grouped into batches. Batches flow through
+    bounded queues to a pool of embedding threads and then a pool of upsert
+    threads, so embedding and upserting of different batches overlap, and
+    when a stage falls behind the stages before it block instead of piling
+    up work: memory is bounded by the queue sizes, not the corpus. Rate
+    limiting and backoff for embeddings live in the embeddings wrapper
+    (RateLimitedEmbeddings); upserts are retried with backoff here. Batches
+    that still fail are put on a dead-letter list instead of aborting the run.
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        vectorstore: VectorStore,
+        batch_size: int = 50,
+        embed_concurrency: int = 4,
+        upsert_concurrency: int = 4,
+        max_retries: int = 5,
+        queue_batches: int = 2,
+        on_upserted: Optional[Callable[[List[Document]], None]] = None,
+        index_fields: Optional[Sequence[str]] = None
+    ):
+        """
+        Initialize the pipeline.
+
+        Args:
+            embeddings: Embeddings model (ideally cached and rate limited)
+            vectorstore: Store created by build_vectorstore()
+            batch_size: Chunks per embedding request and upsert
+            embed_concurrency: Embedding requests in flight at once
+            upsert_concurrency: Upserts in flight at once
+            max_retries: Upsert retries before a batch is dead-lettered
+            queue_batches: Batches waiting per worker in front of each stage
+            on_upserted: Called with each batch once it is upserted (from an
+                upsert thread), e.g. to checkpoint progress
+            index_fields: Metadata fields stored with each vector; when set,
+                the chunk text and the rest of the metadata are left out of
+                the index (they live in the docstore)
+        """
+        self.embeddings = embeddings
+        self.vectorstore = vectorstore
+        self.batch_size = batch_size
+        self.embed_concurrency = embed_concurrency
+        self.upsert_concurrency = upsert_concurrency
+        self.max_retries = max_retries
+        self.queue_batches = queue_batches
+        self.on_upserted = on_upserted
+        self.index_fields = index_fields
+        self.dead_letters: List[Dict[str, Any]] = []
+        # Time spent in embedding and upsert calls, summed over workers
+        self.embed_seconds = 0.0
+        self.upsert_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _embed(self, batch: List[Document]) -> List[List[float]]:
+        start = time.perf_counter()
+        try:
+            return self.embeddings.embed_documents([doc.page_content for doc in batch])
+        finally:
+            with self._lock:
+                self.embed_seconds += time.perf_counter() - start
+
+    def _upsert(self, batch: List[Document], vectors: List[List[float]]) -> int:
+        if self.index_fields is None:
+            texts = [doc.page_content for doc in batch]
+            metadatas = [doc.metadata for doc in batch]
+        else:
+            texts = ["" for _ in batch]
+            metadatas = [{field: doc.metadata[field] for field in self.index_fields if field in doc.metadata}
+                         for doc in batch]
+        start = time.perf_counter()
+        try:
+            retry_with_backoff(
+                lambda: upsert_embeddings(
+                    self.vectorstore,
+                    [doc.metadata["chunk_id"] for doc in batch],
+                    vectors,
+                    texts,
+                    metadatas
+                ),
+                max_retries=self.max_retries
+            )
+        finally:
+            with self._lock:
+                self.upsert_seconds += time.perf_counter() - start
+        return len(batch)
+
+    def _dead_letter(self, batch: List[Document], stage: str, error: Exception):
+        print(f"❌ Failed to {stage} {len(batch)} chunks: {error}")
+        with self._lock:
+            for doc in batch:
+                self.dead_letters.append({"document": doc, "stage": stage, "error": str(error)})
+
+    def _batches(self, documents: Iterable[Document]) -> Iterator[List[Document]]:
+        batch = []
+        for doc in documents:
+            batch.append(doc)
+            if len(batch) == self.batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def run(self, documents: Iterable[Document], total: Optional[int] = None) -> int:
+        """
+        Embed and upsert documents concurrently.
+
+        Args:
+            documents: Chunks with chunk_id metadata; read lazily, so a generator works
+            total: Number of chunks, if known, for progress output
+
+        Returns:
+            Number of chunks upserted
+        """
+        if total is None and isinstance(documents, list):
+            total = len(documents)
+        embed_queue: "queue.Queue" = queue.Queue(maxsize=self.embed_concurrency * self.queue_batches)
+        upsert_queue: "queue.Queue" = queue.Queue(maxsize=self.upsert_concurrency * self.queue_batches)
+        uploaded = [0]
+
+        def embed_worker():
+            while True:
+                batch = embed_queue.get()
+                if batch is None:
+                    return
+                try:
+                    vectors = self._embed(batch)
+                except Exception as e:
+                    self._dead_letter(batch, "embed", e)
+                    continue
+                upsert_queue.put((batch, vectors))
+
+        def upsert_worker():
+            while True:
+                item = upsert_queue.get()
+                if item is None:
+                    return
+                batch, vectors = item
+                try:
+                    count = self._upsert(batch, vectors)
+                except Exception as e:
+                    self._dead_letter(batch, "upsert", e)
+                    continue
+                with self._lock:
+                    uploaded[0] += count
+                    progress = f"{uploaded[0]}/{total}" if total is not None else str(uploaded[0])
+                    print(f"✅ Uploaded {count} chunks (Total: {progress})")
+                if self.on_upserted is not None:
+                    try:
+                        self.on_upserted(batch)
+                    except Exception as e:
+                        print(f"⚠️  Progress callback failed: {e}")
+
+        embedders = [threading.Thread(target=embed_worker, name="ingest-embed", daemon=True)
+                     for _ in range(self.embed_concurrency)]
+        upserters = [threading.Thread(target=upsert_worker, name="ingest-upsert", daemon=True)
+                     for _ in range(self.upsert_concurrency)]
+        for thread in embedders + upserters:
+            thread.start()
+        try:
+            for batch in self._batches(documents):
+                embed_queue.put(batch)
+        finally:
+            # Drain each stage in turn: stop the embedders, then the upserters behind them
+            for _ in embedders:
+                embed_queue.put(None)
+            for thread in embedders:
+                thread.join()
+            for _ in upserters:
+                upsert_queue.put(None)
+            for thread in upserters:
+                thread.join()
+
+        return uploaded[0]
+
+    def retry_dead_letters(self) -> Tuple[int, List[Dict[str, Any]]]:
+        """
+        Run the dead-lettered chunks through the pipeline once more.
+
+        Returns:
+            Tuple of (number uploaded on retry, chunks that failed again)
+        """
+        documents = [entry["document"] for entry in self.dead_letters]
+        self.dead_letters = []
+        if not documents:
+            return 0, []
+        print(f"🔁 Retrying {len(documents)} dead-lettered chunks...")
+        uploaded = self.run(documents)
+        return uploaded, self.dead_letters
@@ -0,0 +1,174 @@
+import os
+import re
+import json
+import math
+import heapq
+from collections import Counter
+from typing import List, Dict, Any, Optional, Tuple
+from langchain_core.documents import Document
+from projection import STOP_WORDS
+from vector_backends import DEFAULT_LOCAL_INDEX_DIR, matches_filter
+
+
+# Words, numbers and joined identifiers such as "US-251" or "v2.1"
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_./][a-z0-9]+)*")
+PART_SEPARATOR = re.compile(r"[-_./]")
+LEXICAL_STOP_WORDS = STOP_WORDS | {"is", "of", "to", "in", "on", "it", "an", "as", "be", "by", "or", "at", "do", "can"}
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lowercase index terms.
+
+    Joined identifiers are indexed whole and by their parts, so "US-251"
+    matches both a query for "us-251" and one for "251".
+    """
+    terms = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        parts = PART_SEPARATOR.split(token)
+        if len(parts) > 1:
+            terms.append(token)
+        terms.extend(part for part in parts if part not in LEXICAL_STOP_WORDS and (len(part) > 1 or part.isdigit()))
+    return terms
+
+
+def default_lexical_path(index_name: str) -> str:
+    """Where the BM25 index for a vector index lives (LEXICAL_INDEX_PATH overrides it)."""
+    return os.getenv("LEXICAL_INDEX_PATH") or os.path.join(
+        os.getenv("LOCAL_INDEX_DIR", DEFAULT_LOCAL_INDEX_DIR), f"{index_name}.bm25.json"
+    )
+
+
+class BM25Index:
+    """
+    In-process BM25 inverted index over the ingested chunks.
+
+    setup.py keeps it in step with the vector index, file by file, and saves
+    it as a JSON file of chunk texts and metadata; the postings are rebuilt
+    in memory when the index is loaded. Searching needs no embedding call,
+    which makes it cheap for keyword-heavy queries such as ticket ids,
+    feature names and CSV column values.
+    """
+
+    def __init__(self, path: Optional[str] = None, k1: float = 1.5, b: float = 0.75):
+        """
+        Open (or prepare to create) an index file.
+
+        Args:
+            path: JSON file the index is stored in
+            k1: BM25 term frequency saturation
+            b: BM25 document length normalization
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        # file_key -> {"hash": content hash, "chunk_ids": [...]}
+        self.files: Dict[str, Dict[str, Any]] = {}
+        # chunk_id -> {"text": ..., "metadata": ...}
+        self.documents: Dict[str, Dict[str, Any]] = {}
+        self._built = False
+        if path and os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            self.files = data.get("files", {})
+            self.documents = data.get("documents", {})
+
+    @classmethod
+    def load(cls, path: str) -> Optional["BM25Index"]:
+        """Load the index at path with its postings built, or return None if there is none."""
+        if not os.path.exists(path):
+            return None
+        index = cls(path)
+        index.build()
+        return index
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def is_unchanged(self, file_key: str, content_hash: str) -> bool:
+        """Whether a file is indexed with the same content."""
+        entry = self.files.get(file_key)
+        return entry is not None and entry["hash"] == content_hash
+
+    def replace_file(self, file_key: str, content_hash: str, chunks: List[Document]):
+        """Index a file's chunks (which carry chunk_id metadata) in place of its previous ones."""
+        self.remove_file(file_key)
+        for chunk in chunks:
+            self.documents[chunk.metadata["chunk_id"]] = {"text": chunk.page_content, "metadata": chunk.metadata}
+        self.files[file_key] = {"hash": content_hash, "chunk_ids": [chunk.metadata["chunk_id"] for chunk in chunks]}
+        self._built = False
+
+    def remove_file(self, file_key: str):
+        """Drop a file's chunks from the index."""
+        entry = self.files.pop(file_key, None)
+        if entry:
+            for chunk_id in entry["chunk_ids"]:
+                self.documents.pop(chunk_id, None)
+            self._built = False
+
+    def save(self):
+        """Write the index atomically."""
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "files": self.files, "documents": self.documents}, f)
+        os.replace(tmp_path, self.path)
+
+    def build(self):
+        """Build the in-memory postings from the stored chunks."""
+        self._ids = list(self.documents)
+        self._lengths = []
+        self._postings: Dict[str, Dict[int, int]] = {}
+        for position, chunk_id in enumerate(self._ids):
+            counts = Counter(tokenize(self.documents[chunk_id]["text"]))
+            self._lengths.append(sum(counts.values()))
+            for term, count in counts.items():
+                self._postings.setdefault(term, {})[position] = count
+        self._average_length = sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+        self._built = True
+
+    def search(self, query: str, k: int = 5,
+               filter: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float, float]]:
+        """
+        Rank chunks against a query with BM25.
+
+        Args:
+            query: Search query
+            k: Number of results
+            filter: Optional Pinecone-style metadata filter
+
+        Returns:
+            List of (document, score, coverage) triples, best first, where
+            coverage is the fraction of the query's distinct terms the chunk
+            contains
+        """
+        if not self._built:
+            self.build()
+        terms = set(tokenize(query))
+        if not terms or not self._ids or k <= 0:
+            return []
+
+        total = len(self._ids)
+        scores: Dict[int, float] = {}
+        matched: Counter = Counter()
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, count in postings.items():
+                norm = 1 - self.b + self.b * self._lengths[position] / self._average_length
+                scores[position] = scores.get(position, 0.0) + idf * count * (self.k1 + 1) / (count + self.k1 * norm)
+                matched[position] += 1
+
+        if filter:
+            scores = {
+                position: score for position, score in scores.items()
+                if matches_filter(self.documents[self._ids[position]]["metadata"], filter)
+            }
+        results = []
+        for position, score in heapq.nlargest(k, scores.items(), key=lambda item: item[1]):
+            record = self.documents[self._ids[position]]
+            doc = Document(page_content=record["text"], metadata=record["metadata"])
+            results.append((doc, score, matched[position] / len(terms)))
+        return results
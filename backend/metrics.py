@@ -0,0 +1,237 @@
+import os
+import time
+import bisect
+import cProfile
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Dict, Any, Optional, Callable, Tuple, Iterator
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TOKEN_BUCKETS = (32, 64, 128, 256, 512, 1024, 2048, 4096, 8192)
+
+DEFAULT_PROFILE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".profiles")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels.items()
+    )
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Histogram:
+    """Cumulative histogram rendered in the Prometheus text format."""
+
+    def __init__(self, name: str, help: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+                 labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self.labelnames = labelnames
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            # Per series: one count per bucket, then +Inf count and sum
+            series = self._series.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+            series[bisect.bisect_left(self.buckets, value)] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = {key: list(values) for key, values in self._series.items()}
+        for key, values in sorted(series.items()):
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), values[:-1]):
+                cumulative += count
+                bucket_labels = _format_labels({**labels, "le": _format_value(bound)})
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(labels)} {values[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(labels)} {cumulative}")
+        return lines
+
+
+class CallbackMetric:
+    """Gauge or counter whose samples are read from a callback at scrape time."""
+
+    def __init__(self, name: str, help: str, kind: str,
+                 callback: Callable[[], List[Tuple[Dict[str, str], float]]]):
+        self.name = name
+        self.help = help
+        self.kind = kind
+        self.callback = callback
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        try:
+            samples = self.callback()
+        except Exception as e:
+            print(f"❌ Error collecting metric {self.name}: {e}")
+            samples = []
+        for labels, value in samples:
+            lines.append(f"{self.name}{_format_labels(labels)} {value}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide collection of metrics exposed at GET /metrics."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, help: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS,
+                  labelnames: Tuple[str, ...] = ()) -> Histogram:
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, help, buckets, labelnames)
+            return self._metrics[name]
+
+    def callback(self, name: str, help: str, callback: Callable[[], List[Tuple[Dict[str, str], float]]],
+                 kind: str = "gauge"):
+        """Register (or replace) a metric computed at scrape time."""
+        with self._lock:
+            self._metrics[name] = CallbackMetric(name, help, kind, callback)
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+STAGE_SECONDS = METRICS.histogram(
+    "rag_stage_seconds", "Latency of each request pipeline stage", labelnames=("stage",)
+)
+REQUEST_SECONDS = METRICS.histogram(
+    "rag_request_seconds", "HTTP request latency by route", labelnames=("method", "route", "status")
+)
+TOKENS = METRICS.histogram(
+    "rag_tokens", "Tokens per LLM call", buckets=TOKEN_BUCKETS, labelnames=("kind",)
+)
+
+# Stage timings of the request being handled, so callers deep in the stack
+# (e.g. the embeddings cache inside the retriever) add to the right response
+_stage_timings: ContextVar[Optional[Dict[str, Any]]] = ContextVar("rag_stage_timings", default=None)
+
+
+@contextmanager
+def track_stages() -> Iterator[Dict[str, Any]]:
+    """
+    Collect stage timings for the enclosed work into a dict.
+
+    Every stage observed inside the block (in this task, its child tasks or
+    threads run with a copied context) adds "<stage>_ms" to the dict.
+    """
+    timings: Dict[str, Any] = {}
+    token = _stage_timings.set(timings)
+    try:
+        yield timings
+    finally:
+        _stage_timings.reset(token)
+
+
+def current_timings() -> Dict[str, Any]:
+    """Get the stage timings dict of the current request, or a throwaway one."""
+    timings = _stage_timings.get()
+    return timings if timings is not None else {}
+
+
+def observe_stage(stage: str, seconds: float):
+    """Record a stage duration in the histogram and the current request's timings."""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = _stage_timings.get()
+    if timings is not None:
+        key = f"{stage}_ms"
+        timings[key] = round(timings.get(key, 0.0) + seconds * 1000, 2)
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Time the enclosed block as one occurrence of a pipeline stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def observe_tokens(kind: str, count: Optional[int]):
+    """Record a prompt or completion token count."""
+    if count is not None:
+        TOKENS.observe(count, kind=kind)
+
+
+class RequestProfiler:
+    """
+    Optionally wraps requests in cProfile and dumps slow ones to disk.
+
+    Only one request is profiled at a time; requests that arrive while
+    another is being profiled run unprofiled. In the async server the
+    profiler sees everything the event loop runs during the request, so
+    profile under light load for a clean picture.
+    """
+
+    def __init__(self, enabled: bool = False, output_dir: str = DEFAULT_PROFILE_DIR, min_ms: float = 0.0):
+        """
+        Initialize the profiler.
+
+        Args:
+            enabled: Whether to profile requests at all
+            output_dir: Directory the .prof files are written to
+            min_ms: Only dump profiles of requests at least this slow
+        """
+        self.enabled = enabled
+        self.output_dir = output_dir
+        self.min_ms = min_ms
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "RequestProfiler":
+        return cls(
+            enabled=os.getenv("RAG_PROFILE_REQUESTS", "false").lower() == "true",
+            output_dir=os.getenv("RAG_PROFILE_DIR", DEFAULT_PROFILE_DIR),
+            min_ms=float(os.getenv("RAG_PROFILE_MIN_MS", "0"))
+        )
+
+    @contextmanager
+    def profile(self, name: str):
+        """Profile the enclosed block and dump it as <output_dir>/<timestamp>-<name>.prof."""
+        if not self.enabled or not self._lock.acquire(blocking=False):
+            yield
+            return
+        profiler = cProfile.Profile()
+        start = time.perf_counter()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            self._lock.release()
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            if elapsed_ms >= self.min_ms:
+                os.makedirs(self.output_dir, exist_ok=True)
+                safe_name = "".join(c if c.isalnum() else "_" for c in name).strip("_") or "root"
+                path = os.path.join(self.output_dir, f"{int(time.time() * 1000)}-{safe_name}.prof")
+                profiler.dump_stats(path)
+                print(f"🔬 Profiled {name} ({elapsed_ms:.0f} ms) -> {path}")
@@ -0,0 +1,146 @@
+import re
+import json
+import base64
+import hashlib
+from typing import List, Dict, Any, Iterable, Optional
+from langchain_core.documents import Document
+
+
+# Fields a search result can carry; the default keeps the original response shape
+SEARCH_FIELDS = ("id", "content", "snippet", "metadata", "type", "source")
+DEFAULT_SEARCH_FIELDS = ("id", "content", "metadata", "type", "source")
+# Fields that need the chunk's text or full metadata, not just the id and filter fields kept in the index
+TEXT_FIELDS = ("content", "snippet", "metadata")
+
+SNIPPET_CHARS = 240
+
+TERM_PATTERN = re.compile(r"\w+")
+STOP_WORDS = {
+    "the", "and", "for", "are", "was", "what", "which", "who", "how", "why", "when", "where",
+    "does", "did", "our", "with", "that", "this", "from", "about", "into", "have", "has"
+}
+
+
+def document_id(doc: Document) -> str:
+    """Get a stable id for a retrieved document."""
+    doc_id = doc.metadata.get("chunk_id") or getattr(doc, "id", None)
+    if doc_id:
+        return str(doc_id)
+    fingerprint = f"{doc.metadata.get('source', '')}\n{doc.page_content}"
+    return hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()
+
+
+def query_terms(query: str) -> List[str]:
+    """Get the distinct, meaningful lowercase words of a query."""
+    terms = []
+    for word in TERM_PATTERN.findall(query.lower()):
+        if len(word) > 2 and word not in STOP_WORDS and word not in terms:
+            terms.append(word)
+    return terms
+
+
+def make_snippet(text: str, terms: List[str], width: int = SNIPPET_CHARS) -> str:
+    """
+    Cut the window of text that contains the most query terms.
+
+    Args:
+        text: Full chunk text
+        terms: Lowercase query terms (see query_terms)
+        width: Maximum snippet length in characters, before ellipses
+
+    Returns:
+        The snippet, with "…" where text was cut off
+    """
+    text = " ".join(text.split())
+    if len(text) <= width:
+        return text
+
+    matches = []
+    if terms:
+        pattern = re.compile(r"\b(" + "|".join(re.escape(term) for term in terms) + r")", re.IGNORECASE)
+        matches = [(m.start(), m.group(1).lower()) for m in pattern.finditer(text)]
+
+    # Start a window a little before each match and keep the one covering the most distinct terms
+    start = 0
+    best = 0
+    for position, _ in matches:
+        candidate = max(0, min(position - width // 4, len(text) - width))
+        covered = len({term for pos, term in matches if candidate <= pos < candidate + width})
+        if covered > best:
+            best, start = covered, candidate
+
+    end = start + width
+    # Snap to word boundaries so the snippet does not begin or end mid-word
+    if start > 0:
+        space = text.find(" ", start)
+        if 0 <= space < start + width // 4:
+            start = space + 1
+    if end < len(text):
+        space = text.rfind(" ", start, end)
+        if space > start:
+            end = space
+    return ("…" if start > 0 else "") + text[start:end] + ("…" if end < len(text) else "")
+
+
+def format_document(doc: Document, fields: Iterable[str] = DEFAULT_SEARCH_FIELDS, terms: List[str] = None,
+                    snippet_chars: int = SNIPPET_CHARS) -> Dict[str, Any]:
+    """
+    Convert a retrieved document into a search result with only the requested fields.
+
+    Args:
+        doc: Retrieved document
+        fields: Fields to include (see SEARCH_FIELDS)
+        terms: Query terms the snippet is centred on
+        snippet_chars: Snippet length
+
+    Returns:
+        The projected result
+    """
+    result = {}
+    for field in fields:
+        if field == "id":
+            result["id"] = document_id(doc)
+        elif field == "content":
+            result["content"] = doc.page_content
+        elif field == "snippet":
+            result["snippet"] = make_snippet(doc.page_content, terms or [], snippet_chars)
+        elif field == "metadata":
+            result["metadata"] = doc.metadata
+        elif field in ("type", "source"):
+            result[field] = doc.metadata.get(field, "unknown")
+    return result
+
+
+def check_fields(fields: Optional[List[str]]) -> List[str]:
+    """Validate a fields= projection, returning the default fields if none were given."""
+    if not fields:
+        return list(DEFAULT_SEARCH_FIELDS)
+    unknown = [field for field in fields if field not in SEARCH_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields {unknown}; choose from {list(SEARCH_FIELDS)}")
+    return list(dict.fromkeys(fields))
+
+
+def encode_cursor(position: int, scope: str) -> str:
+    """
+    Make an opaque pagination cursor.
+
+    Args:
+        position: Offset the next page starts (or, for history, ends) at
+        scope: What the cursor belongs to (e.g. the query), so it cannot be reused elsewhere
+    """
+    payload = {"p": position, "s": hashlib.sha1(scope.encode("utf-8")).hexdigest()[:12]}
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(",", ":")).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str, scope: str) -> int:
+    """Read the position from a cursor made by encode_cursor, raising ValueError if it is invalid."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        position = int(payload["p"])
+        matches = payload["s"] == hashlib.sha1(scope.encode("utf-8")).hexdigest()[:12]
+    except Exception:
+        raise ValueError("Invalid cursor") from None
+    if not matches or position < 0:
+        raise ValueError("Cursor does not belong to this request")
+    return position
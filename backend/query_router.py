@@ -0,0 +1,107 @@
+import re
+from collections import Counter
+from typing import List, Dict, Any, Optional
+
+
+# Document types, one per data folder; setup.py tags every chunk with its type
+DOCUMENT_TYPES = ["prds", "sprints", "roadmaps"]
+
+# Phrases that point a question at one document type. Phrases common to
+# several types (e.g. "user stories", which PRDs and sprint plans both hold)
+# are left out so they never route.
+DEFAULT_ROUTES: Dict[str, List[str]] = {
+    "prds": [
+        "prd", "prds", "product requirement", "product requirements", "requirements doc", "requirements document",
+        "release note", "release notes", "feature spec", "feature specs", "spec", "specs", "specification",
+        "acceptance criteria", "functional requirements", "non-functional requirements"
+    ],
+    "sprints": [
+        "sprint", "sprints", "backlog", "standup", "stand-up", "retro", "retrospective", "velocity",
+        "story point", "story points", "burndown", "ticket", "tickets", "assignee", "blocker", "blockers"
+    ],
+    "roadmaps": [
+        "roadmap", "roadmaps", "quarter", "quarterly", "q1", "q2", "q3", "q4", "milestone", "milestones",
+        "timeline", "launch plan", "okr", "okrs", "initiative", "initiatives", "long-term plan"
+    ]
+}
+
+
+def build_filter(types: Optional[List[str]] = None, sources: Optional[List[str]] = None,
+                 row_start: Optional[int] = None, row_end: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Build a Pinecone-style metadata filter from request filters.
+
+    Row bounds select CSV chunks whose rows overlap [row_start, row_end];
+    either bound may be left open. Chunks without rows (markdown) never
+    match a row filter.
+
+    Args:
+        types: Document types to search (see DOCUMENT_TYPES)
+        sources: Source file names to search
+        row_start: First CSV row wanted
+        row_end: Last CSV row wanted
+
+    Returns:
+        The filter, or None when nothing is filtered
+
+    Raises:
+        ValueError: An unknown type or an empty row range
+    """
+    conditions = []
+    if types:
+        unknown = [doc_type for doc_type in types if doc_type not in DOCUMENT_TYPES]
+        if unknown:
+            raise ValueError(f"Unknown document type(s): {', '.join(unknown)}; expected {', '.join(DOCUMENT_TYPES)}")
+        conditions.append({"type": {"$in": list(types)}})
+    if sources:
+        conditions.append({"source": {"$in": list(sources)}})
+    if row_start is not None and row_end is not None and row_start > row_end:
+        raise ValueError("row_start must not be greater than row_end")
+    if row_start is not None:
+        conditions.append({"row_end": {"$gte": row_start}})
+    if row_end is not None:
+        conditions.append({"row_start": {"$lte": row_end}})
+    if not conditions:
+        return None
+    return conditions[0] if len(conditions) == 1 else {"$and": conditions}
+
+
+class QueryRouter:
+    """
+    Infer the document type a question is about from the words it uses.
+
+    "What went into the last sprint?" routes to sprints and "Draft release
+    notes for search" to prds, so retrieval only searches that partition.
+    Questions that match no type, or phrases of more than one, are not
+    routed and search everything.
+    """
+
+    def __init__(self, routes: Optional[Dict[str, List[str]]] = None):
+        """
+        Initialize the router.
+
+        Args:
+            routes: Phrases per document type (defaults to DEFAULT_ROUTES)
+        """
+        self.routes = routes or DEFAULT_ROUTES
+        self._patterns = {
+            doc_type: re.compile(r"\b(?:" + "|".join(re.escape(phrase) for phrase in phrases) + r")\b", re.IGNORECASE)
+            for doc_type, phrases in self.routes.items()
+        }
+        # Questions routed to each type, and "none" for those that were not
+        self.counts: Counter = Counter()
+
+    def route(self, query: str) -> Optional[str]:
+        """
+        Pick the document type a query targets.
+
+        Args:
+            query: Question or search query
+
+        Returns:
+            The document type, or None when the query is not clearly about one
+        """
+        matched = [doc_type for doc_type, pattern in self._patterns.items() if pattern.search(query)]
+        doc_type = matched[0] if len(matched) == 1 else None
+        self.counts[doc_type or "none"] += 1
+        return doc_type
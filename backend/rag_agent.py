@@ -1,213 +1,1139 @@
 import os
 import json
-from typing import List, Dict, Any
+import asyncio
+import hashlib
+from typing import List, Dict, Any, Iterator, AsyncIterator, Union, Optional, TYPE_CHECKING
+from contextvars import copy_context
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from dotenv import load_dotenv
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-from langchain_pinecone import PineconeVectorStore
-from langchain.schema import Document, HumanMessage, AIMessage
-from langchain.memory import ConversationBufferMemory
-from langchain.chains import ConversationalRetrievalChain
-from langchain.prompts import PromptTemplate
-from pinecone import Pinecone
+from langchain_core.documents import Document
+from langchain_core.messages import HumanMessage, AIMessage
+from sessions import DEFAULT_SESSION_ID
+from conversation_store import build_conversation_store
+from clients import ClientRegistry, default_registry
+from embedding_cache import CachedEmbeddings
+from response_cache import SemanticResponseCache
+from vector_backends import build_vectorstore, namespace_by_type, LocalVectorStore, NamespacedVectorStore
+from lexical_index import BM25Index, default_lexical_path
+from docstore import ChunkDocstore, docstore_enabled, default_docstore_path
+from hybrid_retrieval import HybridRetriever
+from query_router import DOCUMENT_TYPES, QueryRouter, build_filter
+from context_packing import ContextPacker
+from history_summary import MEMORY_MODES, RollingSummarizer
+from singleflight import SingleFlight, request_key
+from deadlines import DeadlineExceeded, within_deadline, stream_within_deadline
+from projection import document_id
+from condense import CONDENSE_STRATEGIES, history_query, heuristic_rewrite, text_similarity
+from metrics import METRICS, track_stages, current_timings, stage_timer, observe_tokens
 import time
 
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+    from langchain_core.language_models import BaseChatModel
+    from langchain_core.vectorstores import VectorStore
+
 load_dotenv()
 
 class RAGAgent:
-    def __init__(self, index_name: str = "pinecone-chatbot"):
+    def __init__(self, index_name: str = "pinecone-chatbot", max_concurrency: int = None,
+                 vector_backend: str = None, condense_strategy: str = None,
+                 embeddings: "Embeddings" = None, vectorstore: "VectorStore" = None, llm: "BaseChatModel" = None,
+                 clients: ClientRegistry = None, lazy: bool = False):
         """
-        Initialize the RAG Agent with Pinecone vector store and OpenAI models.
+        Initialize the RAG Agent with a vector store and OpenAI models.
         
         Args:
-            index_name: Name of the Pinecone index to use
+            index_name: Name of the Pinecone index (or local index directory) to use
+            max_concurrency: Maximum number of async requests allowed to call the
+                backends at once (defaults to RAG_MAX_CONCURRENCY or 16)
+            vector_backend: "pinecone" or "local" (defaults to VECTOR_BACKEND or "pinecone")
+            condense_strategy: How follow-up questions are turned into retrieval
+                queries: "llm", "none", "heuristic" or "speculative"
+                (defaults to CONDENSE_STRATEGY or "llm")
+            embeddings: Embeddings model to use instead of the cached OpenAI
+                embeddings (used as-is; wrap it in CachedEmbeddings for caching)
+            vectorstore: Vector store to use instead of building one for
+                vector_backend; it should embed queries with `embeddings`
+            llm: Chat model to use instead of ChatOpenAI
+            clients: Registry of shared OpenAI and Pinecone clients (defaults
+                to the process-wide registry)
+            lazy: Only read configuration; call initialize() to build the
+                components (e.g. off the server's startup path)
         """
         self.index_name = index_name
-        self.embeddings = None
-        self.vectorstore = None
-        self.llm = None
+        self.clients = clients or default_registry()
+        self.vector_backend = vector_backend or os.getenv("VECTOR_BACKEND", "pinecone")
+        if max_concurrency is None:
+            max_concurrency = int(os.getenv("RAG_MAX_CONCURRENCY", "16"))
+        self.max_concurrency = max_concurrency
+        self._concurrency = asyncio.Semaphore(max_concurrency)
+        self.batch_chat_concurrency = int(os.getenv("RAG_BATCH_CHAT_CONCURRENCY", "4"))
+        # Only the last turns of a conversation are read into the prompt
+        self.history_turns = int(os.getenv("RAG_HISTORY_TURNS", "10"))
+        # "buffer" passes those turns as they are; "summary" keeps the last few verbatim and summarizes the rest
+        self.memory_mode = os.getenv("RAG_MEMORY_MODE", "buffer")
+        if self.memory_mode not in MEMORY_MODES:
+            raise ValueError(f"Unknown memory mode: {self.memory_mode}")
+        self.condense_strategy = condense_strategy or os.getenv("CONDENSE_STRATEGY", "llm")
+        if self.condense_strategy not in CONDENSE_STRATEGIES:
+            raise ValueError(f"Unknown condense strategy: {self.condense_strategy}")
+        self.condense_similarity_threshold = float(os.getenv("CONDENSE_SIMILARITY_THRESHOLD", "0.6"))
+        # Longest a speculative turn waits for the condensed question, counted from the start of the turn
+        self.speculative_timeout = float(os.getenv("CONDENSE_SPECULATIVE_TIMEOUT_MS", "800")) / 1000
+        self._condense_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="condense")
+        # Identical concurrent async requests share one embed/retrieve/generate
+        self.singleflight = SingleFlight(enabled=os.getenv("RAG_COALESCE_REQUESTS", "true").lower() == "true")
+        # Unfiltered questions that clearly target one document type only search that type
+        self.router = QueryRouter() if os.getenv("QUERY_ROUTING", "true").lower() == "true" else None
+        self.embeddings = embeddings
+        self.vectorstore = vectorstore
+        self.llm = llm
+        self.lexical_index = None
+        self.docstore = None
+        self.retriever = None
         self.qa_chain = None
-        self.memory = None
+        self.prompt = None
+        self.sessions = None
+        self.response_cache = None
+        self.context_packer = None
+        self.summarizer = None
         self.pc = None
+        self.ready = False
+        self.startup_timings: Dict[str, float] = {}
         
         # Initialize components
-        self._initialize_components()
+        if not lazy:
+            self.initialize()
     
-    def _initialize_components(self):
-        """Initialize all the components needed for the RAG agent."""
+    def initialize(self):
+        """
+        Build all the components needed for the RAG agent.
+        
+        Independent clients (Pinecone, embeddings, LLM) are created
+        concurrently, together with the import of the chain modules; the
+        components that depend on them follow. Each phase's duration is
+        recorded in startup_timings.
+        """
+        started = time.perf_counter()
         try:
-            # Initialize Pinecone client
-            self.pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-            print("✅ Pinecone client initialized")
-            
-            # Initialize embeddings
-            self.embeddings = OpenAIEmbeddings()
-            print("✅ OpenAI embeddings initialized")
-            
-            # Get the index
-            index = self.pc.Index(self.index_name)
+            with ThreadPoolExecutor(max_workers=4, thread_name_prefix="rag-init") as pool:
+                phases = [
+                    pool.submit(self._run_phase, "pinecone", self._init_pinecone),
+                    pool.submit(self._run_phase, "embeddings", self._init_embeddings),
+                    pool.submit(self._run_phase, "llm", self._init_llm),
+                    pool.submit(self._run_phase, "chain_imports", self._import_chain_modules)
+                ]
+                for phase in phases:
+                    phase.result()
+                
+                phases = [
+                    pool.submit(self._run_phase, "vectorstore", self._init_vectorstore),
+                    pool.submit(self._run_phase, "lexical_index", self._init_lexical_index),
+                    pool.submit(self._run_phase, "docstore", self._init_docstore),
+                    pool.submit(self._run_phase, "context_packer", self._init_context_packer),
+                    pool.submit(self._run_phase, "sessions", self._init_sessions)
+                ]
+                for phase in phases:
+                    phase.result()
             
-            # Initialize vector store
-            self.vectorstore = PineconeVectorStore(
-                index=index,
-                embedding=self.embeddings
+            self._run_phase("qa_chain", self._init_qa_chain)
+            self._run_phase("summarizer", self._init_summarizer)
+        
+        except Exception as e:
+            print(f"❌ Error initializing components: {e}")
+            raise
+        
+        self._register_metrics()
+        self.startup_timings["total_ms"] = self._elapsed_ms(started)
+        self.ready = True
+    
+    def _run_phase(self, name: str, fn):
+        """Run one startup phase and record how long it took."""
+        started = time.perf_counter()
+        fn()
+        self.startup_timings[f"{name}_ms"] = self._elapsed_ms(started)
+    
+    def _init_pinecone(self):
+        if self.vector_backend == "pinecone" and self.vectorstore is None:
+            self.pc = self.clients.pinecone()
+            # Resolving the index handle looks up its host, so do it once here
+            self.clients.index(self.index_name)
+            print("✅ Pinecone client initialized")
+    
+    def _init_embeddings(self):
+        # Initialize embeddings behind the query-embedding cache
+        if self.embeddings is None:
+            self.embeddings = CachedEmbeddings(
+                self.clients.openai_embeddings(),
+                max_memory_entries=int(os.getenv("EMBEDDING_CACHE_SIZE", "10000")),
+                disk_path=os.getenv("EMBEDDING_CACHE_PATH") or None
             )
-            print(f"✅ Connected to Pinecone index: {self.index_name}")
-            
-            # Initialize LLM
-            self.llm = ChatOpenAI(
+            print("✅ OpenAI embeddings initialized")
+    
+    def _init_llm(self):
+        if self.llm is None:
+            self.llm = self.clients.chat_model(
                 model_name="gpt-3.5-turbo",
                 temperature=0.7,
                 max_tokens=1000
             )
             print("✅ OpenAI LLM initialized")
-            
-            # Initialize memory
-            self.memory = ConversationBufferMemory(
-                memory_key="chat_history",
-                return_messages=True,
-                output_key="answer"
+    
+    @staticmethod
+    def _import_chain_modules():
+        # The chain modules are the slowest imports; load them while the clients are built
+        import langchain.chains  # noqa: F401
+        import langchain.prompts  # noqa: F401
+    
+    def _init_vectorstore(self):
+        if self.vectorstore is None:
+            self.vectorstore = build_vectorstore(
+                self.vector_backend, self.index_name, self.embeddings,
+                index=self.clients.index(self.index_name) if self.vector_backend == "pinecone" else None,
+                namespaces=DOCUMENT_TYPES if namespace_by_type() else None
             )
-            print("✅ Conversation memory initialized")
-            
-            # Create custom prompt template
-            prompt_template = """You are PM Copilot — a highly capable product management assistant trained to help product managers plan, write, and prioritize effectively.
-
-            You have access to high-quality reference documents including PRDs, sprint plans, roadmap entries, success metrics, feature specs, and release notes. These documents are provided below as context. Use them to extract structure, patterns, and best practices to inform your responses.
+            print(f"✅ Connected to {self.vector_backend} index: {self.index_name}")
+    
+    def _init_lexical_index(self):
+        # Load the BM25 index setup.py builds next to the vector index, if hybrid search is on
+        if os.getenv("HYBRID_SEARCH", "true").lower() != "true":
+            return
+        path = default_lexical_path(self.index_name)
+        self.lexical_index = BM25Index.load(path)
+        if self.lexical_index is None:
+            print(f"⚠️  No lexical index at {path}; run setup.py to build it. Using dense retrieval only")
+        else:
+            print(f"✅ Lexical index loaded ({len(self.lexical_index)} chunks)")
+    
+    def _init_docstore(self):
+        # Open the chunk docstore setup.py writes, so id-only vector hits can be filled in
+        if not docstore_enabled():
+            return
+        path = default_docstore_path(self.index_name)
+        self.docstore = ChunkDocstore.load(path)
+        if self.docstore is None:
+            print(f"⚠️  No docstore at {path}; run setup.py to build it. Using the text stored in the index")
+        else:
+            print(f"✅ Docstore opened ({len(self.docstore)} chunks)")
+    
+    def _init_sessions(self):
+        # Initialize per-session memory in the configured conversation store
+        self.sessions = build_conversation_store()
+        print(f"✅ Conversation memory initialized ({self.sessions.stats()['backend']})")
+        
+        # Initialize the opt-in semantic response cache
+        if os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() == "true":
+            self.response_cache = SemanticResponseCache(
+                threshold=float(os.getenv("RESPONSE_CACHE_THRESHOLD", "0.95")),
+                ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600")),
+                max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "1000"))
+            )
+            print("✅ Response cache initialized")
+    
+    def _init_context_packer(self):
+        # Initialize context packing between retrieval and generation
+        self.context_packer = ContextPacker(
+            max_context_tokens=int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500")),
+            max_history_tokens=int(os.getenv("HISTORY_TOKEN_BUDGET", "1000")),
+            model_name=self.llm.model_name
+        )
+        print("✅ Context packer initialized")
+    
+    def _init_summarizer(self):
+        # Summarize older turns in the background instead of passing them all to the prompt
+        if self.memory_mode != "summary":
+            return
+        self.summarizer = RollingSummarizer(
+            self.llm,
+            self.context_packer.tokens,
+            recent_turns=int(os.getenv("SUMMARY_RECENT_TURNS", "3")),
+            fold_every=int(os.getenv("SUMMARY_EVERY_TURNS", "2")),
+            max_tokens=int(os.getenv("SUMMARY_MAX_TOKENS", "256"))
+        )
+        print("✅ Conversation summarizer initialized")
+    
+    def close(self):
+        """
+        Release what the agent holds: buffered conversation turns, the docstore and the condense pool.
+        
+        Condense calls still running on the pool are abandoned rather than
+        waited for; queued ones are cancelled. The async HTTP client is
+        closed with aclose().
+        """
+        if self.sessions:
+            # Write any conversation turns still buffered for the shared store
+            self.sessions.close()
+        if self.docstore:
+            self.docstore.close()
+        self._condense_pool.shutdown(wait=False, cancel_futures=True)
+    
+    async def aclose(self):
+        """Close everything close() does, and the shared HTTP clients."""
+        self.close()
+        await self.clients.aclose()
+    
+    def _init_qa_chain(self):
+        from langchain.chains import ConversationalRetrievalChain
+        from langchain.prompts import PromptTemplate
+        
+        # Create custom prompt template
+        prompt_template = """You are PM Copilot — a highly capable product management assistant trained to help product managers plan, write, and prioritize effectively.
 
-            Your core responsibilities include:
+        You have access to high-quality reference documents including PRDs, sprint plans, roadmap entries, success metrics, feature specs, and release notes. These documents are provided below as context. Use them to extract structure, patterns, and best practices to inform your responses.
 
-            ✅ Generating product requirement documents (PRDs) from feature ideas  
-            → Include context, goals, user stories, functional + non-functional requirements, edge cases, acceptance criteria, and stakeholders
+        Your core responsibilities include:
 
-            ✅ Drafting roadmap entries  
-            → Suggest quarter, priority, dependencies, and delivery timeline
+        ✅ Generating product requirement documents (PRDs) from feature ideas  
+        → Include context, goals, user stories, functional + non-functional requirements, edge cases, acceptance criteria, and stakeholders
 
-            ✅ Proposing success metrics  
-            → Based on the feature type, recommend adoption, activation, retention, NPS, or latency metrics
+        ✅ Drafting roadmap entries  
+        → Suggest quarter, priority, dependencies, and delivery timeline
 
-            ✅ Writing release notes  
-            → Provide clear summaries for internal or customer-facing updates
+        ✅ Proposing success metrics  
+        → Based on the feature type, recommend adoption, activation, retention, NPS, or latency metrics
 
-            ✅ Drafting meeting agendas and action items  
-            → Based on sprint planning, product strategy sessions, or feature reviews
+        ✅ Writing release notes  
+        → Provide clear summaries for internal or customer-facing updates
 
-            Use the documents below as inspiration. If multiple documents are provided, synthesize relevant ideas and generate high-quality output aligned with product management best practices.
+        ✅ Drafting meeting agendas and action items  
+        → Based on sprint planning, product strategy sessions, or feature reviews
 
-            Context information:
-            {context}
+        Use the documents below as inspiration. If multiple documents are provided, synthesize relevant ideas and generate high-quality output aligned with product management best practices.
 
-            Chat history:
-            {chat_history}
+        Context information:
+        {context}
 
-            Human: {question}
-            AI Assistant:"""
+        Chat history:
+        {chat_history}
 
+        Human: {question}
+        AI Assistant:"""
+        # Strip the source indentation so it is not sent as prompt tokens
+        prompt_template = "\n".join(line.strip() for line in prompt_template.splitlines())
+        
+        prompt = PromptTemplate(
+            input_variables=["context", "chat_history", "question"],
+            template=prompt_template
+        )
+        self.prompt = prompt
+        
+        # Dense similarity search fused with BM25 (dense only without a lexical index)
+        self.retriever = HybridRetriever(
+            vectorstore=self.vectorstore,
+            lexical=self.lexical_index,
+            k=5,
+            fetch_k=int(os.getenv("HYBRID_FETCH_K", "20")),
+            rrf_k=int(os.getenv("HYBRID_RRF_K", "60")),
+            skip_margin=float(os.getenv("HYBRID_SKIP_MARGIN", "1.5"))
+        )
+        
+        # Initialize QA chain. Memory is per session, so chat history is
+        # passed in on each call instead of being bound to the chain.
+        self.qa_chain = ConversationalRetrievalChain.from_llm(
+            llm=self.llm,
+            retriever=self.retriever,
+            combine_docs_chain_kwargs={"prompt": prompt},
+            return_source_documents=True,
+            verbose=False,
+            output_key="answer"
+        )
+        print("✅ QA chain initialized")
+    
+    async def awarm_up(self, include_llm: bool = False):
+        """
+        Prime connections and caches before taking traffic.
+        
+        Runs one query embedding and one vector query (and, if include_llm,
+        a one-token completion) so the first user request does not pay for
+        TLS handshakes and connection setup. Failures are logged, not raised.
+        
+        Args:
+            include_llm: Also send a minimal request to the chat model
+        """
+        started = time.perf_counter()
+        try:
+            embedding = await self.embeddings.aembed_query("warm up")
+            await self.vectorstore.asimilarity_search_by_vector(embedding, k=1)
+            if include_llm:
+                await self.llm.bind(max_tokens=1).ainvoke("Hi")
+            print("✅ Warm-up complete")
+        except Exception as e:
+            print(f"❌ Warm-up failed: {e}")
+        self.startup_timings["warm_up_ms"] = self._elapsed_ms(started)
+    
+    def ask(self, question: str, include_sources: bool = True, session_id: str = DEFAULT_SESSION_ID,
+            use_cache: bool = True, filter: Dict[str, Any] = None, route: bool = True) -> Dict[str, Any]:
+        """
+        Ask a question and get a response with relevant sources.
+        
+        Runs the QA chain's condense -> retrieve -> generate steps explicitly so
+        the response cache can be consulted between retrieval and generation.
+        
+        Args:
+            question: The question to ask
+            include_sources: Whether to include source documents in the response
+            session_id: Conversation session the question belongs to
+            use_cache: Whether the response cache may serve or store this answer
+            filter: Pinecone-style metadata filter restricting retrieval (see query_router.build_filter)
+            route: Whether an unfiltered question may be routed to the document type it targets
             
-            prompt = PromptTemplate(
-                input_variables=["context", "chat_history", "question"],
-                template=prompt_template
-            )
+        Returns:
+            Dictionary containing the answer and optionally source documents
+        """
+        start = time.perf_counter()
+        try:
+            if not self.qa_chain:
+                raise ValueError("QA chain not initialized")
             
-            # Initialize QA chain
-            self.qa_chain = ConversationalRetrievalChain.from_llm(
-                llm=self.llm,
-                retriever=self.vectorstore.as_retriever(
-                    search_type="similarity",
-                    search_kwargs={"k": 5}
-                ),
-                memory=self.memory,
-                combine_docs_chain_kwargs={"prompt": prompt},
-                return_source_documents=True,
-                verbose=False,
-                output_key="answer"
-            )
-            print("✅ QA chain initialized")
+            with track_stages() as timings:
+                turn = self._retrieve_for_turn(question, self._session_messages(session_id), filter, route)
+                
+                answer = None
+                prompt_tokens = None
+                cache_key = None
+                if self.response_cache and use_cache:
+                    cache_key = self._response_cache_key(turn["docs"], turn["chat_history"])
+                    question_embedding = self.embeddings.embed_query(turn["question"])
+                    answer = self.response_cache.lookup(question_embedding, cache_key)
+                cached = answer is not None
+                
+                if not cached:
+                    prompt_text = self._build_prompt(turn["question"], turn["context_docs"], turn["chat_history"])
+                    prompt_tokens = self.context_packer.count(prompt_text)
+                    with stage_timer("generate"):
+                        answer = self.llm.invoke(prompt_text).content
+                    self._observe_tokens(prompt_tokens, answer)
+                    if cache_key is not None:
+                        self.response_cache.store(question_embedding, cache_key, answer)
+            
+            self._save_turn(session_id, question, answer)
+            timings["total_ms"] = self._elapsed_ms(start)
+            return self._format_response(question, answer, turn["context_docs"], include_sources, cached,
+                                         prompt_tokens, timings)
             
         except Exception as e:
-            print(f"❌ Error initializing components: {e}")
-            raise
+            print(f"❌ Error getting response: {e}")
+            return self._error_response(question, e)
     
-    def ask(self, question: str, include_sources: bool = True) -> Dict[str, Any]:
+    async def aask(self, question: str, include_sources: bool = True, session_id: str = DEFAULT_SESSION_ID,
+                   use_cache: bool = True, filter: Dict[str, Any] = None, route: bool = True) -> Dict[str, Any]:
         """
-        Ask a question and get a response with relevant sources.
+        Async version of ask() built on the chain components' async APIs.
+        
+        Embedding, retrieval and generation are awaited instead of blocking the
+        event loop, so concurrent callers overlap their network waits. At most
+        max_concurrency calls hit the backends at the same time. Identical
+        questions asked concurrently from the same conversation state share
+        one answer (see singleflight); each caller still saves its own turn.
         
         Args:
             question: The question to ask
             include_sources: Whether to include source documents in the response
+            session_id: Conversation session the question belongs to
+            use_cache: Whether the response cache may serve or store this answer
+            filter: Pinecone-style metadata filter restricting retrieval (see query_router.build_filter)
+            route: Whether an unfiltered question may be routed to the document type it targets
             
         Returns:
             Dictionary containing the answer and optionally source documents
+            
+        Raises:
+            DeadlineExceeded: The request's deadline (see deadlines) passed first
         """
+        start = time.perf_counter()
         try:
             if not self.qa_chain:
                 raise ValueError("QA chain not initialized")
             
-            # Get response from the chain
-            result = self.qa_chain({"question": question})
-            
-            response = {
-                "answer": result["answer"],
-                "question": question,
-                "timestamp": time.time()
-            }
+            with track_stages() as read_timings:
+                messages = await self._asession_messages(session_id)
+            result, coalesced = await self.singleflight.do(
+                "chat", self._coalesce_key(question, messages, use_cache, filter, route),
+                lambda: self._aanswer(question, messages, use_cache, filter, route)
+            )
             
-            if include_sources and "source_documents" in result:
-                sources = []
-                for doc in result["source_documents"]:
-                    source_info = {
-                        "content": doc.page_content[:200] + "..." if len(doc.page_content) > 200 else doc.page_content,
-                        "metadata": doc.metadata,
-                        "type": doc.metadata.get("type", "unknown"),
-                        "source": doc.metadata.get("source", "unknown")
-                    }
-                    sources.append(source_info)
-                response["sources"] = sources
-            
-            return response
+            await self._asave_turn(session_id, question, result["answer"])
+            timings = {**read_timings, **result["timings"]}
+            if coalesced:
+                timings["coalesced"] = True
+            timings["total_ms"] = self._elapsed_ms(start)
+            return self._format_response(question, result["answer"], result["turn"]["context_docs"],
+                                         include_sources, result["cached"], result["prompt_tokens"], timings)
             
+        except DeadlineExceeded:
+            # Let the API answer 504 rather than a normal-looking error reply
+            raise
         except Exception as e:
             print(f"❌ Error getting response: {e}")
-            return {
-                "answer": f"I'm sorry, I encountered an error while processing your question: {str(e)}",
-                "question": question,
-                "timestamp": time.time(),
-                "error": True
+            return self._error_response(question, e)
+    
+    async def _aanswer(self, question: str, messages: List[Any], use_cache: bool,
+                       filter: Dict[str, Any] = None, route: bool = True) -> Dict[str, Any]:
+        """
+        Retrieve and generate the answer to a question, without saving the turn.
+        
+        Returns:
+            Dictionary with the retrieved turn, the answer, whether it came
+            from the response cache, the prompt token count and stage timings
+        """
+        with track_stages() as timings:
+            async with self._concurrency:
+                turn = await self._aretrieve_for_turn(question, messages, filter, route)
+                
+                answer = None
+                prompt_tokens = None
+                cache_key = None
+                if self.response_cache and use_cache:
+                    cache_key = self._response_cache_key(turn["docs"], turn["chat_history"])
+                    question_embedding = await within_deadline(self.embeddings.aembed_query(turn["question"]), "embed")
+                    answer = self.response_cache.lookup(question_embedding, cache_key)
+                cached = answer is not None
+                
+                if not cached:
+                    prompt_text = self._build_prompt(turn["question"], turn["context_docs"], turn["chat_history"])
+                    prompt_tokens = self.context_packer.count(prompt_text)
+                    with stage_timer("generate"):
+                        message = await within_deadline(self.llm.ainvoke(prompt_text), "generate")
+                    answer = message.content
+                    self._observe_tokens(prompt_tokens, answer)
+                    if cache_key is not None:
+                        self.response_cache.store(question_embedding, cache_key, answer)
+        
+        return {"turn": turn, "answer": answer, "cached": cached, "prompt_tokens": prompt_tokens, "timings": timings}
+    
+    def stream_ask(self, question: str, include_sources: bool = True, session_id: str = DEFAULT_SESSION_ID,
+                   filter: Dict[str, Any] = None, route: bool = True) -> Iterator[Dict[str, Any]]:
+        """
+        Ask a question and stream the answer as it is generated.
+        
+        Runs the same condense -> retrieve -> generate steps as ask(), but
+        yields the sources as soon as retrieval finishes and then each LLM
+        token as it arrives.
+        
+        Args:
+            question: The question to ask
+            include_sources: Whether to include source documents in the stream
+            session_id: Conversation session the question belongs to
+            filter: Pinecone-style metadata filter restricting retrieval (see query_router.build_filter)
+            route: Whether an unfiltered question may be routed to the document type it targets
+            
+        Yields:
+            Event dictionaries with an "event" key of "sources", "token",
+            "done", "deadline_exceeded" (the request's deadline passed; see
+            deadlines.py) or "error"
+        """
+        start = time.perf_counter()
+        try:
+            if not self.qa_chain:
+                raise ValueError("QA chain not initialized")
+            
+            with track_stages() as timings:
+                turn = self._retrieve_for_turn(question, self._session_messages(session_id), filter, route)
+                yield self._sources_event(turn, include_sources, timings)
+                
+                prompt_text = self._build_prompt(turn["question"], turn["context_docs"], turn["chat_history"])
+                prompt_tokens = self.context_packer.count(prompt_text)
+                tokens = []
+                with stage_timer("generate"):
+                    for chunk in self.llm.stream(prompt_text):
+                        if not chunk.content:
+                            continue
+                        if not tokens:
+                            timings["time_to_first_token_ms"] = self._elapsed_ms(start)
+                        tokens.append(chunk.content)
+                        yield {"event": "token", "token": chunk.content}
+            
+            answer = "".join(tokens)
+            self._observe_tokens(prompt_tokens, answer)
+            self._save_turn(session_id, question, answer)
+            yield self._done_event(question, answer, start, timings, prompt_tokens)
+            
+        except Exception as e:
+            print(f"❌ Error streaming response: {e}")
+            yield {"event": "error", **self._error_response(question, e)}
+    
+    async def astream_ask(self, question: str, include_sources: bool = True, session_id: str = DEFAULT_SESSION_ID,
+                          filter: Dict[str, Any] = None, route: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Async version of stream_ask() for the streaming API endpoint.
+        
+        Identical questions streamed concurrently from the same conversation
+        state share one generation: callers that join late first receive the
+        tokens already produced, then follow the live stream.
+        
+        Args:
+            question: The question to ask
+            include_sources: Whether to include source documents in the stream
+            session_id: Conversation session the question belongs to
+            filter: Pinecone-style metadata filter restricting retrieval (see query_router.build_filter)
+            route: Whether an unfiltered question may be routed to the document type it targets
+            
+        Yields:
+            Event dictionaries with an "event" key of "sources", "token",
+            "done" or "error"
+        """
+        start = time.perf_counter()
+        try:
+            if not self.qa_chain:
+                raise ValueError("QA chain not initialized")
+            
+            with track_stages() as read_timings:
+                messages = await self._asession_messages(session_id)
+            time_to_first_token = None
+            async for event, coalesced in self.singleflight.stream(
+                "chat_stream", self._coalesce_key(question, messages, filter, route),
+                lambda: self._astream_answer(question, messages, filter, route)
+            ):
+                if event["event"] == "sources":
+                    yield self._sources_event(event["turn"], include_sources, event["timings"])
+                elif event["event"] == "token":
+                    if time_to_first_token is None:
+                        time_to_first_token = self._elapsed_ms(start)
+                    yield event
+                else:
+                    answer = event["answer"]
+                    timings = {**read_timings, **event["timings"], "time_to_first_token_ms": time_to_first_token}
+                    if coalesced:
+                        timings["coalesced"] = True
+            
+            await self._asave_turn(session_id, question, answer)
+            yield self._done_event(question, answer, start, timings, event["prompt_tokens"])
+            
+        except DeadlineExceeded as e:
+            # The response has already started, so instead of a 504 the stream ends with its own event;
+            # within_deadline() has counted the expiry in rag_deadline_exceeded_total
+            yield {"event": "deadline_exceeded", "stage": e.stage, "error": str(e),
+                   "timings": {"total_ms": self._elapsed_ms(start)}}
+        except Exception as e:
+            print(f"❌ Error streaming response: {e}")
+            yield {"event": "error", **self._error_response(question, e)}
+    
+    async def _astream_answer(self, question: str, messages: List[Any], filter: Dict[str, Any] = None,
+                              route: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Retrieve and stream the answer to a question, without saving the turn.
+        
+        Yields:
+            A "sources" event carrying the retrieved turn, a "token" event per
+            LLM token, and a final "answer" event with the full answer, prompt
+            token count and stage timings
+        """
+        with track_stages() as timings:
+            async with self._concurrency:
+                turn = await self._aretrieve_for_turn(question, messages, filter, route)
+                yield {"event": "sources", "turn": turn, "timings": dict(timings)}
+                
+                prompt_text = self._build_prompt(turn["question"], turn["context_docs"], turn["chat_history"])
+                prompt_tokens = self.context_packer.count(prompt_text)
+                tokens = []
+                with stage_timer("generate"):
+                    async for chunk in stream_within_deadline(self.llm.astream(prompt_text), "generate"):
+                        if not chunk.content:
+                            continue
+                        tokens.append(chunk.content)
+                        yield {"event": "token", "token": chunk.content}
+        
+        answer = "".join(tokens)
+        self._observe_tokens(prompt_tokens, answer)
+        yield {"event": "answer", "answer": answer, "prompt_tokens": prompt_tokens, "timings": timings}
+    
+    def _retrieve_for_turn(self, question: str, messages: List[Any], filter: Dict[str, Any] = None,
+                           route: bool = True) -> Dict[str, Any]:
+        """
+        Resolve the retrieval query for a turn with the configured condense
+        strategy, retrieve, and pack the context.
+        
+        Args:
+            question: The question asked
+            messages: The session's recent chat messages (see _session_messages)
+            filter: Metadata filter restricting retrieval
+            route: Whether an unfiltered query may be routed to one document type
+        
+        Stage timings and the condense path taken are recorded in the
+        current request's timings (see metrics.track_stages).
+        
+        Returns:
+            Dictionary with the chat history text, the question to put in the
+            prompt, and the retrieved and packed documents
+        """
+        chat_history = self.context_packer.fit_history(messages)
+        timings = current_timings()
+        
+        if not chat_history:
+            timings["condense_path"] = "standalone"
+            prompt_question = question
+            docs = self._retrieve(question, filter, route)
+        elif self.condense_strategy == "none":
+            timings["condense_path"] = "none"
+            prompt_question = question
+            docs = self._retrieve(history_query(question, messages), filter, route)
+        elif self.condense_strategy == "heuristic":
+            timings["condense_path"] = "heuristic"
+            prompt_question = question
+            docs = self._retrieve(heuristic_rewrite(question, messages), filter, route)
+        elif self.condense_strategy == "speculative":
+            # Condense on a worker thread while retrieving for the locally rewritten question
+            started = time.perf_counter()
+            raw_query = heuristic_rewrite(question, messages)
+            future = self._condense_pool.submit(copy_context().run, self._condense, question, chat_history)
+            try:
+                docs = self._retrieve(raw_query, filter, route)
+            except Exception:
+                future.cancel()
+                raise
+            try:
+                condensed = future.result(timeout=self._speculative_wait(started))
+            except FutureTimeoutError:
+                # Answer from the raw question's results rather than wait on the LLM. This
+                # only cancels a call still queued: one already running finishes on the
+                # pool (at most its max_workers at once) and its result is dropped.
+                future.cancel()
+                timings["condense_path"] = "speculative:timeout"
+                prompt_question = question
+            else:
+                prompt_question = condensed
+                if text_similarity(condensed, raw_query) >= self.condense_similarity_threshold:
+                    timings["condense_path"] = "speculative:raw"
+                else:
+                    timings["condense_path"] = "speculative:condensed"
+                    docs = self._retrieve(condensed, filter, route)
+        else:
+            timings["condense_path"] = "llm"
+            prompt_question = self._condense(question, chat_history)
+            docs = self._retrieve(prompt_question, filter, route)
+        
+        return {
+            "chat_history": chat_history,
+            "question": prompt_question,
+            "docs": docs,
+            "context_docs": self.context_packer.pack_documents(docs)
+        }
+    
+    async def _aretrieve_for_turn(self, question: str, messages: List[Any], filter: Dict[str, Any] = None,
+                                  route: bool = True) -> Dict[str, Any]:
+        """Async version of _retrieve_for_turn()."""
+        chat_history = self.context_packer.fit_history(messages)
+        timings = current_timings()
+        
+        if not chat_history:
+            timings["condense_path"] = "standalone"
+            prompt_question = question
+            docs = await self._aretrieve(question, filter, route)
+        elif self.condense_strategy == "none":
+            timings["condense_path"] = "none"
+            prompt_question = question
+            docs = await self._aretrieve(history_query(question, messages), filter, route)
+        elif self.condense_strategy == "heuristic":
+            timings["condense_path"] = "heuristic"
+            prompt_question = question
+            docs = await self._aretrieve(heuristic_rewrite(question, messages), filter, route)
+        elif self.condense_strategy == "speculative":
+            # Condense concurrently with retrieval for the locally rewritten question
+            started = time.perf_counter()
+            raw_query = heuristic_rewrite(question, messages)
+            condense_task = asyncio.ensure_future(self._acondense(question, chat_history))
+            try:
+                docs = await self._aretrieve(raw_query, filter, route)
+                try:
+                    condensed = await asyncio.wait_for(condense_task, self._speculative_wait(started))
+                except asyncio.TimeoutError:
+                    timings["condense_path"] = "speculative:timeout"
+                    prompt_question = question
+                else:
+                    prompt_question = condensed
+                    if text_similarity(condensed, raw_query) >= self.condense_similarity_threshold:
+                        timings["condense_path"] = "speculative:raw"
+                    else:
+                        timings["condense_path"] = "speculative:condensed"
+                        docs = await self._aretrieve(condensed, filter, route)
+            finally:
+                # Stop the condense call if retrieval failed first, and retrieve its
+                # outcome so a failure nobody awaited isn't logged as never retrieved
+                condense_task.cancel()
+                condense_task.add_done_callback(lambda task: task.cancelled() or task.exception())
+        else:
+            timings["condense_path"] = "llm"
+            prompt_question = await self._acondense(question, chat_history)
+            docs = await self._aretrieve(prompt_question, filter, route)
+        
+        return {
+            "chat_history": chat_history,
+            "question": prompt_question,
+            "docs": docs,
+            "context_docs": self.context_packer.pack_documents(docs)
+        }
+    
+    def _speculative_wait(self, started: float) -> float:
+        """What is left of the speculative condense budget for a turn that started at `started`."""
+        return max(0.0, self.speculative_timeout - (time.perf_counter() - started))
+    
+    @staticmethod
+    def _elapsed_ms(start: float) -> float:
+        return round((time.perf_counter() - start) * 1000, 2)
+    
+    def _search_scoped(self, query: str, scope: Dict[str, Any], filter: Dict[str, Any],
+                       k: int = None) -> List[Document]:
+        """
+        Search within a query's scope (see _scope()), falling back to the caller's filter alone.
+        
+        Every retrieval path goes through here or _asearch_scoped(), so a
+        routed query that finds nothing in its document type is answered
+        from everything the caller's filter allows, wherever it comes from.
+        """
+        docs = self.retriever.search(query, k=k, filter=scope)
+        if not docs and scope is not filter:
+            # Nothing in the routed type; search everything instead
+            docs = self.retriever.search(query, k=k, filter=filter)
+        return docs
+    
+    async def _asearch_scoped(self, query: str, scope: Dict[str, Any], filter: Dict[str, Any], k: int = None,
+                              vector: List[float] = None) -> List[Document]:
+        """Async version of _search_scoped(); vector is the query's embedding, if already computed."""
+        docs = await within_deadline(self.retriever.asearch(query, k=k, filter=scope, vector=vector), "retrieve")
+        if not docs and scope is not filter:
+            docs = await within_deadline(self.retriever.asearch(query, k=k, filter=filter, vector=vector), "retrieve")
+        return docs
+    
+    def _retrieve(self, query: str, filter: Dict[str, Any] = None, route: bool = True) -> List[Document]:
+        with stage_timer("retrieve"):
+            docs = self._search_scoped(query, self._scope(query, filter, route), filter)
+        return self.hydrate(docs)
+    
+    async def _aretrieve(self, query: str, filter: Dict[str, Any] = None, route: bool = True) -> List[Document]:
+        with stage_timer("retrieve"):
+            docs = await self._asearch_scoped(query, self._scope(query, filter, route), filter)
+        return await self.ahydrate(docs)
+    
+    def hydrate(self, docs: List[Document]) -> List[Document]:
+        """
+        Fill in hits that carry only ids with their text and metadata from
+        the docstore, in one bulk read. Hits are hydrated once retrieval has
+        narrowed them to the ones used, never the candidates fused away.
+        """
+        if self.docstore is None or not docs:
+            return docs
+        with stage_timer("docstore"):
+            return self.docstore.hydrate(docs)
+    
+    async def ahydrate(self, docs: List[Document]) -> List[Document]:
+        """Async version of hydrate(); the SQLite read runs on a worker thread."""
+        if self.docstore is None or not docs:
+            return docs
+        return await asyncio.to_thread(self.hydrate, docs)
+    
+    def _scope(self, query: str, filter: Dict[str, Any], route: bool) -> Dict[str, Any]:
+        """
+        The metadata filter to retrieve with: the caller's filter, or, for an
+        unfiltered query the router places in one document type, that type.
+        The routed type is recorded as "route" in the request's timings.
+        """
+        if filter or not route or self.router is None:
+            return filter
+        doc_type = self.router.route(query)
+        if doc_type is None:
+            return filter
+        current_timings()["route"] = doc_type
+        return build_filter(types=[doc_type])
+    
+    def _condense(self, question: str, chat_history: str) -> str:
+        """Rewrite a follow-up question into a standalone one, as the QA chain does."""
+        if not chat_history:
+            return question
+        with stage_timer("condense"):
+            return self.qa_chain.question_generator.run(question=question, chat_history=chat_history)
+    
+    async def _acondense(self, question: str, chat_history: str) -> str:
+        """Async version of _condense()."""
+        if not chat_history:
+            return question
+        with stage_timer("condense"):
+            return await within_deadline(
+                self.qa_chain.question_generator.arun(question=question, chat_history=chat_history), "condense"
+            )
+    
+    def _observe_tokens(self, prompt_tokens: int, answer: str):
+        """Record prompt and completion token counts for /metrics."""
+        observe_tokens("prompt", prompt_tokens)
+        observe_tokens("completion", self.context_packer.count(answer))
+    
+    def _response_cache_key(self, docs: List[Document], chat_history: str) -> str:
+        """
+        Build the response cache context key.
+        
+        Answers are only reused when the same sources were retrieved and the
+        conversation state matches, so history-dependent answers never leak
+        into other conversations.
+        """
+        source_ids = sorted(document_id(doc) for doc in docs)
+        history_key = hashlib.sha256(chat_history.encode("utf-8")).hexdigest() if chat_history else "no-history"
+        return f"{history_key}|{','.join(source_ids)}"
+    
+    @staticmethod
+    def _coalesce_key(question: str, messages: List[Any], *options: Any) -> str:
+        """Identify a question in its conversation state, so only truly identical asks are coalesced."""
+        return request_key(question, [f"{message.type}:{message.content}" for message in messages], *options)
+    
+    def _session_messages(self, session_id: str) -> List[Any]:
+        """Get the session's most recent chat messages to pass to the chain, older turns summarized in summary mode."""
+        messages = self.sessions.recent_messages(session_id, turns=self.history_turns)
+        if self.summarizer:
+            messages = self.summarizer.compact(session_id, messages)
+        return messages
+    
+    def _save_turn(self, session_id: str, question: str, answer: str):
+        """Record a turn, then let the summarizer fold older turns in the background."""
+        self.sessions.save_turn(session_id, question, answer)
+        if self.summarizer:
+            self.summarizer.schedule(session_id, lambda: self.sessions.history(session_id))
+    
+    async def _asession_messages(self, session_id: str) -> List[Any]:
+        """Async version of _session_messages(); the store is read on a worker thread (Redis and SQLite block)."""
+        return await asyncio.to_thread(self._session_messages, session_id)
+    
+    async def _asave_turn(self, session_id: str, question: str, answer: str):
+        """Async version of _save_turn(), run on a worker thread."""
+        await asyncio.to_thread(self._save_turn, session_id, question, answer)
+    
+    def _build_prompt(self, question: str, docs: List[Document], chat_history: str) -> str:
+        """Fill the PM Copilot prompt with the packed context, as the stuff chain would."""
+        context = "\n\n".join(doc.page_content for doc in docs)
+        return self.prompt.format(context=context, chat_history=chat_history, question=question)
+    
+    def _sources_event(self, turn: Dict[str, Any], include_sources: bool, timings: Dict[str, Any]) -> Dict[str, Any]:
+        """Build the stream event sent once retrieval has finished."""
+        return {
+            "event": "sources",
+            "sources": self._format_sources(turn["context_docs"]) if include_sources else [],
+            "condense_path": timings.get("condense_path"),
+            "retrieval_ms": timings.get("retrieve_ms")
+        }
+    
+    def _done_event(self, question: str, answer: str, start: float, timings: Dict[str, Any],
+                    prompt_tokens: int) -> Dict[str, Any]:
+        """Build the final stream event carrying the full answer and timings."""
+        timings.setdefault("time_to_first_token_ms", None)
+        timings["total_ms"] = self._elapsed_ms(start)
+        return {
+            "event": "done",
+            "answer": answer,
+            "question": question,
+            "timestamp": time.time(),
+            "prompt_tokens": prompt_tokens,
+            "timings": timings
+        }
+    
+    def _format_response(self, question: str, answer: str, docs: List[Document], include_sources: bool,
+                         cached: bool = False, prompt_tokens: int = None,
+                         timings: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Build the response dictionary for an answer and its source documents."""
+        response = {
+            "answer": answer,
+            "question": question,
+            "timestamp": time.time()
+        }
+        
+        if include_sources:
+            response["sources"] = self._format_sources(docs)
+        if cached:
+            response["cached"] = True
+        if prompt_tokens is not None:
+            response["prompt_tokens"] = prompt_tokens
+        if timings is not None:
+            response["timings"] = timings
+        
+        return response
+    
+    def _format_sources(self, docs: List[Document]) -> List[Dict[str, Any]]:
+        """Build the truncated source entries returned alongside an answer."""
+        sources = []
+        for doc in docs:
+            source_info = {
+                "content": doc.page_content[:200] + "..." if len(doc.page_content) > 200 else doc.page_content,
+                "metadata": doc.metadata,
+                "type": doc.metadata.get("type", "unknown"),
+                "source": doc.metadata.get("source", "unknown")
             }
+            sources.append(source_info)
+        return sources
     
-    def search_documents(self, query: str, k: int = 5) -> List[Document]:
+    def _error_response(self, question: str, error: Exception) -> Dict[str, Any]:
+        """Build the response dictionary returned when answering fails."""
+        return {
+            "answer": f"I'm sorry, I encountered an error while processing your question: {str(error)}",
+            "question": question,
+            "timestamp": time.time(),
+            "error": True
+        }
+    
+    def search_documents(self, query: str, k: int = 5, filter: Dict[str, Any] = None,
+                         route: bool = True, with_text: bool = True) -> List[Document]:
         """
         Search for relevant documents without generating a response.
         
         Args:
             query: Search query
             k: Number of documents to retrieve
+            filter: Pinecone-style metadata filter (see query_router.build_filter)
+            route: Whether an unfiltered query may be routed to the document type it targets
+            with_text: Whether to fetch the chunks' text from the docstore (a caller
+                that only shows some of the results can hydrate() those instead)
             
         Returns:
             List of relevant documents
         """
         try:
-            if not self.vectorstore:
-                raise ValueError("Vector store not initialized")
+            if not self.retriever:
+                raise ValueError("Retriever not initialized")
             
-            docs = self.vectorstore.similarity_search(query, k=k)
-            return docs
+            with stage_timer("retrieve"):
+                docs = self._search_scoped(query, self._scope(query, filter, route), filter, k=k)
+            return self.hydrate(docs) if with_text else docs
+            
+        except Exception as e:
+            print(f"❌ Error searching documents: {e}")
+            return []
+    
+    async def asearch_documents(self, query: str, k: int = 5, filter: Dict[str, Any] = None,
+                                route: bool = True, with_text: bool = True) -> List[Document]:
+        """
+        Async version of search_documents() that does not block the event loop.
+        
+        Identical searches running at the same time share one embedding and
+        vector query; the callers that joined are marked "coalesced" in their
+        request's timings.
+        
+        Args:
+            query: Search query
+            k: Number of documents to retrieve
+            filter: Pinecone-style metadata filter (see query_router.build_filter)
+            route: Whether an unfiltered query may be routed to the document type it targets
+            with_text: Whether to fetch the chunks' text from the docstore (a caller
+                that only shows some of the results can hydrate() those instead)
             
+        Returns:
+            List of relevant documents
+            
+        Raises:
+            DeadlineExceeded: The request's deadline (see deadlines) passed first
+        """
+        try:
+            if not self.retriever:
+                raise ValueError("Retriever not initialized")
+            
+            scope = self._scope(query, filter, route)
+            
+            async def search() -> List[Document]:
+                async with self._concurrency:
+                    with stage_timer("retrieve"):
+                        return await self._asearch_scoped(query, scope, filter, k=k)
+            
+            docs, coalesced = await self.singleflight.do("search", request_key(query, k, scope), search)
+            if coalesced:
+                current_timings()["coalesced"] = True
+            return await self.ahydrate(list(docs)) if with_text else list(docs)
+            
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             print(f"❌ Error searching documents: {e}")
             return []
     
-    def get_conversation_history(self) -> List[Dict[str, str]]:
+    async def asearch_documents_batch(self, queries: List[str], k: int = 5, filter: Dict[str, Any] = None,
+                                      route: bool = True,
+                                      with_text: bool = True) -> List[Union[List[Document], Exception]]:
         """
-        Get the current conversation history.
+        Search for several queries at once.
         
+        The queries that need an embedding (those without a confident
+        lexical match) are embedded in a single embed_documents call, then
+        the searches run concurrently.
+        
+        Args:
+            queries: Search queries
+            k: Number of documents to retrieve per query
+            filter: Pinecone-style metadata filter applied to every query
+            route: Whether unfiltered queries may be routed to the document type they target
+            with_text: Whether to fetch the chunks' text from the docstore
+            
+        Returns:
+            One entry per query, in order: the documents found, or the
+            exception that query failed with
+        """
+        if not self.retriever:
+            raise ValueError("Retriever not initialized")
+        if not queries:
+            return []
+        
+        scopes = {query: self._scope(query, filter, route) for query in dict.fromkeys(queries)}
+        to_embed = [query for query, scope in scopes.items() if self.retriever.needs_embedding(query, k=k, filter=scope)]
+        vectors = {}
+        if to_embed:
+            async with self._concurrency:
+                embedded = await within_deadline(self.embeddings.aembed_documents(to_embed), "embed")
+            vectors = dict(zip(to_embed, embedded))
+        
+        async def search_one(query: str) -> List[Document]:
+            async with self._concurrency:
+                with stage_timer("retrieve"):
+                    docs = await self._asearch_scoped(query, scopes[query], filter, k=k, vector=vectors.get(query))
+            return await self.ahydrate(docs) if with_text else docs
+        
+        return await asyncio.gather(*(search_one(query) for query in queries), return_exceptions=True)
+    
+    async def aask_batch(self, requests: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Answer several questions at once.
+        
+        The questions are embedded together up front, which warms the
+        embedding cache for the retrieval step of each ask. Completions then
+        run with at most batch_chat_concurrency in flight.
+        
+        Args:
+            requests: Keyword arguments for aask(), one dict per question
+            
+        Returns:
+            One response per request, in order. Failed items carry "error": True.
+        """
+        if not requests:
+            return []
+        
+        try:
+            async with self._concurrency:
+                await self.embeddings.aembed_documents([request["question"] for request in requests])
+        except Exception as e:
+            # Warming is an optimization; each ask embeds on its own if it fails
+            print(f"❌ Error embedding batch questions: {e}")
+        
+        limit = asyncio.Semaphore(self.batch_chat_concurrency)
+        
+        async def ask_one(request: Dict[str, Any]) -> Dict[str, Any]:
+            async with limit:
+                return await self.aask(**request)
+        
+        return await asyncio.gather(*(ask_one(request) for request in requests))
+    
+    def get_conversation_history(self, session_id: str = DEFAULT_SESSION_ID, offset: int = 0,
+                                 limit: Optional[int] = None) -> List[Dict[str, str]]:
+        """
+        Get the conversation history for a session.
+        
+        Args:
+            session_id: Conversation session to read
+            offset: Messages to skip, counting from the oldest
+            limit: Maximum number of messages to return (all remaining if None)
+            
         Returns:
             List of conversation turns
         """
-        if not self.memory:
+        if not self.sessions:
+            return []
+        
+        messages = self.sessions.history(session_id, offset, limit)
+        if messages is None:
             return []
         
         history = []
-        for message in self.memory.chat_memory.messages:
+        for message in messages:
             if isinstance(message, HumanMessage):
                 history.append({"role": "user", "content": message.content})
             elif isinstance(message, AIMessage):
@@ -215,12 +1141,158 @@ class RAGAgent:
         
         return history
     
-    def clear_memory(self):
-        """Clear the conversation memory."""
-        if self.memory:
-            self.memory.clear()
+    def get_history_length(self, session_id: str = DEFAULT_SESSION_ID) -> int:
+        """Number of messages stored for a session."""
+        return self.sessions.history_length(session_id) if self.sessions else 0
+    
+    def clear_memory(self, session_id: str = DEFAULT_SESSION_ID):
+        """
+        Clear the conversation memory for a session.
+        
+        Args:
+            session_id: Conversation session to clear
+        """
+        if self.sessions:
+            self.sessions.clear(session_id)
+            if self.summarizer:
+                self.summarizer.forget(session_id)
             print("✅ Conversation memory cleared")
     
+    def get_memory_stats(self) -> Dict[str, Any]:
+        """
+        Get statistics about the per-session conversation memory.
+        
+        Returns:
+            Dictionary with session counts and approximate memory use, and
+            in summary mode the summarizer's counters under "summary"
+        """
+        if not self.sessions:
+            return {}
+        stats = self.sessions.stats()
+        if self.summarizer:
+            stats["summary"] = self.summarizer.stats()
+        return stats
+    
+    def get_embedding_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get hit, miss and latency counters for the embedding cache.
+        
+        Returns:
+            Dictionary with embedding cache statistics
+        """
+        if not isinstance(self.embeddings, CachedEmbeddings):
+            return {}
+        return self.embeddings.stats()
+    
+    def get_response_cache_stats(self) -> Dict[str, Any]:
+        """
+        Get size and hit-rate statistics for the response cache.
+        
+        Returns:
+            Dictionary with response cache statistics, empty when disabled
+        """
+        if not self.response_cache:
+            return {}
+        return self.response_cache.stats()
+    
+    def get_coalescing_stats(self) -> Dict[str, Any]:
+        """
+        Get counters for request coalescing.
+        
+        Returns:
+            Dictionary with, per request kind, the computations run and the
+            calls that shared one already in flight
+        """
+        return self.singleflight.stats()
+    
+    def get_retrieval_stats(self) -> Dict[str, Any]:
+        """
+        Get lexical index size, how often each retrieval path was taken,
+        where the query router sent questions and docstore fetches.
+        
+        Returns:
+            Dictionary with the lexical index chunk count (None without one),
+            counts of "dense", "hybrid" and "lexical" retrievals, routed
+            queries per document type ("none" for unrouted; empty when routing
+            is off), and docstore stats (None without a docstore)
+        """
+        if not self.retriever:
+            return {}
+        return {
+            "lexical_chunks": len(self.lexical_index) if self.lexical_index is not None else None,
+            "paths": dict(self.retriever.paths),
+            "routes": dict(self.router.counts) if self.router else {},
+            "docstore": self.docstore.stats() if self.docstore is not None else None
+        }
+    
+    def _cache_counts(self) -> Dict[str, Dict[str, int]]:
+        """Hit and miss counts for each enabled cache."""
+        counts = {}
+        embedding_stats = self.get_embedding_cache_stats()
+        if embedding_stats:
+            counts["embedding"] = {
+                "hits": embedding_stats["memory_hits"] + embedding_stats["disk_hits"],
+                "misses": embedding_stats["misses"]
+            }
+        response_stats = self.get_response_cache_stats()
+        if response_stats:
+            counts["response"] = {"hits": response_stats["hits"], "misses": response_stats["misses"]}
+        return counts
+    
+    def _register_metrics(self):
+        """Expose cache and session counters as metrics read at scrape time."""
+        METRICS.callback(
+            "rag_cache_hits_total", "Cache hits by cache",
+            lambda: [({"cache": name}, c["hits"]) for name, c in self._cache_counts().items()],
+            kind="counter"
+        )
+        METRICS.callback(
+            "rag_cache_misses_total", "Cache misses by cache",
+            lambda: [({"cache": name}, c["misses"]) for name, c in self._cache_counts().items()],
+            kind="counter"
+        )
+        METRICS.callback(
+            "rag_cache_hit_ratio", "Fraction of cache lookups that hit",
+            lambda: [
+                ({"cache": name}, round(c["hits"] / (c["hits"] + c["misses"]), 4) if c["hits"] + c["misses"] else 0.0)
+                for name, c in self._cache_counts().items()
+            ]
+        )
+        METRICS.callback(
+            "rag_coalesced_requests_total", "Requests served by an identical computation already in flight",
+            lambda: [({"kind": name}, count) for name, count in self.singleflight.coalesced.items()],
+            kind="counter"
+        )
+        METRICS.callback(
+            "rag_coalesce_executions_total", "Computations run for coalescable requests",
+            lambda: [({"kind": name}, count) for name, count in self.singleflight.executions.items()],
+            kind="counter"
+        )
+        METRICS.callback(
+            "rag_retrieval_path_total", "Retrievals by path: dense, hybrid (rank fusion) or lexical (no embedding)",
+            lambda: [({"path": path}, count) for path, count in self.retriever.paths.items()],
+            kind="counter"
+        )
+        METRICS.callback(
+            "rag_query_route_total", "Queries by the document type the router sent them to (\"none\" if unrouted)",
+            lambda: [({"type": doc_type}, count) for doc_type, count in self.router.counts.items()] if self.router else [],
+            kind="counter"
+        )
+        METRICS.callback(
+            "rag_docstore_chunks_fetched_total", "Chunks whose text was fetched from the docstore",
+            lambda: [({}, self.docstore.chunks_fetched)] if self.docstore is not None else [],
+            kind="counter"
+        )
+        METRICS.callback(
+            "rag_docstore_missing_total", "Retrieved chunks dropped because the docstore did not have them",
+            lambda: [({}, self.docstore.missing)] if self.docstore is not None else [],
+            kind="counter"
+        )
+        METRICS.callback(
+            "rag_active_sessions", "Live conversation sessions in the conversation store",
+            lambda: [({}, self.get_memory_stats().get("active_sessions", 0))]
+        )
+    
     def get_index_stats(self) -> Dict[str, Any]:
         """
         Get statistics about the vector store index.
@@ -229,12 +1301,16 @@ class RAGAgent:
             Dictionary with index statistics
         """
         try:
-            if not self.pc:
-                return {"error": "Pinecone client not initialized"}
-            
-            # Get index info
-            index = self.pc.Index(self.index_name)
-            stats = index.describe_index_stats()
+            if isinstance(self.vectorstore, LocalVectorStore):
+                stats = self.vectorstore.index.describe_index_stats()
+            elif isinstance(self.vectorstore, NamespacedVectorStore) and self.vector_backend == "local":
+                stats = self.vectorstore.describe_index_stats()
+            else:
+                if not self.pc:
+                    return {"error": "Pinecone client not initialized"}
+                
+                # Get index info from the cached index handle
+                stats = self.clients.index(self.index_name).describe_index_stats()
             
             return {
                 "index_name": self.index_name,
@@ -299,17 +1375,25 @@ def main():
                     print(f"\n📊 Index Statistics: {json.dumps(stats, indent=2)}")
                     continue
                 
-                # Get response
+                # Stream the response
                 print("🤖 Thinking...")
-                response = agent.ask(user_input)
-                
-                # Display response
-                print(f"\n🤖 Assistant: {response['answer']}")
+                sources = []
+                for event in agent.stream_ask(user_input):
+                    if event["event"] == "sources":
+                        sources = event["sources"]
+                        print("\n🤖 Assistant: ", end="", flush=True)
+                    elif event["event"] == "token":
+                        print(event["token"], end="", flush=True)
+                    elif event["event"] == "done":
+                        print(f"\n\n⏱️  First token in {event['timings']['time_to_first_token_ms']} ms, "
+                              f"total {event['timings']['total_ms']} ms")
+                    elif event["event"] == "error":
+                        print(f"\n🤖 Assistant: {event['answer']}")
                 
                 # Display sources if available
-                if 'sources' in response and response['sources']:
-                    print(f"\n📚 Sources ({len(response['sources'])} documents):")
-                    for i, source in enumerate(response['sources'], 1):
+                if sources:
+                    print(f"\n📚 Sources ({len(sources)} documents):")
+                    for i, source in enumerate(sources, 1):
                         print(f"{i}. {source['type'].title()} - {source['source']}")
                         print(f"   {source['content'][:150]}...")
                 
@@ -0,0 +1,217 @@
+import time
+import random
+import threading
+from typing import Callable, Optional, Any, List
+from langchain_core.embeddings import Embeddings
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    The bucket holds up to capacity tokens and refills continuously at
+    rate_per_second. acquire() blocks until enough tokens are available.
+    """
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        """
+        Initialize the bucket, starting full.
+
+        Args:
+            rate_per_second: Refill rate
+            capacity: Maximum number of tokens held
+        """
+        self.rate_per_second = rate_per_second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+    def try_acquire(self, amount: float = 1) -> float:
+        """
+        Take tokens if available.
+
+        Returns:
+            0 if the tokens were taken, otherwise the seconds to wait before
+            retrying (infinite if amount is more than the bucket can ever hold)
+        """
+        if amount > self.capacity:
+            return float("inf")
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._tokens >= amount:
+                self._tokens -= amount
+                return 0.0
+            return (amount - self._tokens) / self.rate_per_second
+
+    def acquire(self, amount: float = 1):
+        """
+        Block until the tokens are available, then take them.
+
+        A request larger than the bucket (e.g. one oversized embedding call)
+        waits for a full bucket and drains it instead of blocking forever.
+        """
+        amount = min(amount, self.capacity)
+        while True:
+            wait = self.try_acquire(amount)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+
+class RateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limiter with adaptive backoff.
+
+    When the provider throttles us the refill rates are halved (down to a
+    tenth of the configured limits), and each success recovers a little of
+    the configured rate, so throughput settles just under what the provider
+    actually allows.
+    """
+
+    def __init__(self, requests_per_minute: float, tokens_per_minute: float):
+        """
+        Initialize the limiter.
+
+        Args:
+            requests_per_minute: Maximum requests per minute
+            tokens_per_minute: Maximum tokens per minute
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.requests = TokenBucket(requests_per_minute / 60, max(1, requests_per_minute / 60))
+        self.tokens = TokenBucket(tokens_per_minute / 60, max(1, tokens_per_minute / 60))
+        self._scale = 1.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 0):
+        """Block until one request using the given number of tokens may be sent."""
+        self.requests.acquire(1)
+        if tokens:
+            self.tokens.acquire(tokens)
+
+    def _set_scale(self, scale: float):
+        self._scale = scale
+        self.requests.rate_per_second = self.requests_per_minute / 60 * scale
+        self.tokens.rate_per_second = self.tokens_per_minute / 60 * scale
+
+    def on_throttle(self):
+        """Slow down after a 429 response."""
+        with self._lock:
+            self._set_scale(max(0.1, self._scale / 2))
+
+    def on_success(self):
+        """Recover towards the configured rate after a successful request."""
+        with self._lock:
+            if self._scale < 1.0:
+                self._set_scale(min(1.0, self._scale + 0.05))
+
+
+def error_status(error: Exception) -> Optional[int]:
+    """Extract an HTTP status code from an OpenAI, Pinecone or httpx error, if it has one."""
+    for attr in ("status_code", "status", "http_status"):
+        status = getattr(error, attr, None)
+        if isinstance(status, int):
+            return status
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def retry_after_seconds(error: Exception) -> Optional[float]:
+    """Read a Retry-After header from an error's response, if present."""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        value = headers.get("retry-after") or headers.get("Retry-After")
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether an error is worth retrying: throttling, server errors and connection failures."""
+    status = error_status(error)
+    if status is not None:
+        return status == 429 or status >= 500
+    return isinstance(error, (ConnectionError, TimeoutError)) or "timeout" in type(error).__name__.lower()
+
+
+def retry_with_backoff(
+    fn: Callable[[], Any],
+    max_retries: int = 5,
+    base_delay: float = 1.0,
+    max_delay: float = 60.0,
+    limiter: Optional[RateLimiter] = None
+) -> Any:
+    """
+    Call fn, retrying retryable errors with exponential backoff and full jitter.
+
+    A Retry-After header on the error takes precedence over the computed
+    delay, and 429 responses also slow down the limiter if one is given.
+
+    Args:
+        fn: Zero-argument callable to run
+        max_retries: Retries after the first attempt
+        base_delay: Delay scale in seconds
+        max_delay: Upper bound on a single delay
+        limiter: Optional rate limiter to adapt on throttling
+
+    Returns:
+        The value returned by fn
+    """
+    attempt = 0
+    while True:
+        try:
+            result = fn()
+            if limiter:
+                limiter.on_success()
+            return result
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            if limiter and error_status(e) == 429:
+                limiter.on_throttle()
+            delay = retry_after_seconds(e)
+            if delay is None:
+                delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            attempt += 1
+            print(f"⏳ Retrying after {type(e).__name__} (attempt {attempt}/{max_retries}, waiting {delay:.1f}s)")
+            time.sleep(delay)
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate used for rate limiting (about four characters per token)."""
+    return len(text) // 4 + 1
+
+
+class RateLimitedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that applies a RateLimiter and retry_with_backoff to every call.
+
+    Wrap the provider model with this and put CachedEmbeddings outside it, so
+    only cache misses count against the rate limit.
+    """
+
+    def __init__(self, embeddings: Embeddings, limiter: RateLimiter, max_retries: int = 5):
+        self.embeddings = embeddings
+        self.model = getattr(embeddings, "model", None)
+        self.limiter = limiter
+        self.max_retries = max_retries
+
+    def _call(self, fn: Callable[[], Any], texts: List[str]) -> Any:
+        def attempt():
+            self.limiter.acquire(sum(estimate_tokens(text) for text in texts))
+            return fn()
+        return retry_with_backoff(attempt, max_retries=self.max_retries, limiter=self.limiter)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self._call(lambda: self.embeddings.embed_documents(texts), texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._call(lambda: self.embeddings.embed_query(text), [text])
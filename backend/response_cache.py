@@ -0,0 +1,114 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional
+import numpy as np
+
+
+class SemanticResponseCache:
+    """
+    Answer cache that matches new questions against earlier ones by meaning.
+
+    Each entry stores the normalized embedding of a question, a context key
+    and the answer. A lookup only considers entries with the same context key
+    (built by the caller from the retrieved source ids and the conversation
+    state), and returns the answer of the most similar question if its cosine
+    similarity reaches the threshold. Entries expire after ttl_seconds and the
+    least recently used entries are evicted beyond max_entries.
+    """
+
+    def __init__(self, threshold: float = 0.95, ttl_seconds: float = 3600, max_entries: int = 1000):
+        """
+        Initialize the response cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a cached answer to be reused
+            ttl_seconds: Age after which an entry is no longer served
+            max_entries: Maximum number of cached answers
+        """
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, embedding: List[float], context_key: str) -> Optional[str]:
+        """
+        Find a cached answer for a semantically similar question.
+
+        Args:
+            embedding: Embedding of the (standalone) question
+            context_key: Key describing the retrieved sources and conversation state
+
+        Returns:
+            The cached answer, or None on a miss
+        """
+        query = self._normalize(embedding)
+        now = time.time()
+        with self._lock:
+            expired = [entry_id for entry_id, entry in self._entries.items()
+                       if now - entry["created"] > self.ttl_seconds]
+            for entry_id in expired:
+                del self._entries[entry_id]
+
+            candidates = [(entry_id, entry) for entry_id, entry in self._entries.items()
+                          if entry["context_key"] == context_key]
+            if candidates:
+                matrix = np.stack([entry["embedding"] for _, entry in candidates])
+                scores = matrix @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.threshold:
+                    entry_id, entry = candidates[best]
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    return entry["answer"]
+
+            self.misses += 1
+            return None
+
+    def store(self, embedding: List[float], context_key: str, answer: str):
+        """
+        Cache an answer.
+
+        Args:
+            embedding: Embedding of the (standalone) question
+            context_key: Key describing the retrieved sources and conversation state
+            answer: The generated answer
+        """
+        with self._lock:
+            self._entries[self._next_id] = {
+                "embedding": self._normalize(embedding),
+                "context_key": context_key,
+                "answer": answer,
+                "created": time.time()
+            }
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report cache size and hit rate.
+
+        Returns:
+            Dictionary with cache statistics
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,225 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Iterable, Tuple
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
+
+
+DEFAULT_SESSION_ID = "default"
+
+
+def turns_to_messages(turns: Iterable[Tuple[str, str]]) -> List[BaseMessage]:
+    """Expand (question, answer) pairs into alternating human and AI messages."""
+    messages: List[BaseMessage] = []
+    for question, answer in turns:
+        messages.append(HumanMessage(content=question))
+        messages.append(AIMessage(content=answer))
+    return messages
+
+
+def turn_window(offset: int, limit: Optional[int]) -> Tuple[int, Optional[int]]:
+    """
+    The turns that hold messages [offset, offset + limit); each turn is two messages.
+
+    Returns:
+        Tuple of (first turn, number of turns), where None means through the last turn
+    """
+    first = offset // 2
+    if limit is None:
+        return first, None
+    return first, (offset + limit + 1) // 2 - first
+
+
+def message_window(turns: Iterable[Tuple[str, str]], offset: int, limit: Optional[int]) -> List[BaseMessage]:
+    """Expand the turns read for turn_window(offset, limit) and cut them down to the messages asked for."""
+    messages = turns_to_messages(turns)[offset % 2:]
+    return messages[:limit] if limit is not None else messages
+
+
+class ConversationStore(ABC):
+    """
+    Interface for where conversation turns are kept.
+
+    A store keeps at most max_turns question/answer pairs per session and
+    forgets sessions that have been idle longer than ttl_seconds. Stores that
+    live outside the process (see conversation_store.py) let several API
+    workers share the same conversations.
+    """
+
+    max_turns: int = 50
+    ttl_seconds: float = 3600
+
+    @abstractmethod
+    def recent_messages(self, session_id: str = DEFAULT_SESSION_ID, turns: Optional[int] = None) -> List[BaseMessage]:
+        """
+        Get the last turns of a session as messages, oldest first.
+
+        Reading counts as activity and refreshes the session's TTL.
+
+        Args:
+            session_id: Session identifier
+            turns: Maximum number of question/answer pairs to read (all stored turns if None)
+
+        Returns:
+            Alternating human and AI messages
+        """
+
+    @abstractmethod
+    def history(self, session_id: str = DEFAULT_SESSION_ID, offset: int = 0,
+                limit: Optional[int] = None) -> Optional[List[BaseMessage]]:
+        """
+        Get a session's stored messages without refreshing its TTL.
+
+        Only the requested window is read from the store.
+
+        Args:
+            session_id: Session identifier
+            offset: Messages to skip, counting from the oldest
+            limit: Maximum number of messages to return (all remaining if None)
+
+        Returns:
+            The messages, oldest first, or None if the session does not exist
+        """
+
+    @abstractmethod
+    def history_length(self, session_id: str = DEFAULT_SESSION_ID) -> int:
+        """Number of messages stored for a session (0 if it does not exist), without refreshing its TTL."""
+
+    @abstractmethod
+    def save_turn(self, session_id: str, question: str, answer: str):
+        """Record a question/answer pair."""
+
+    @abstractmethod
+    def clear(self, session_id: str = DEFAULT_SESSION_ID):
+        """Remove a session and its history."""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Report store size and activity."""
+
+    def close(self):
+        """Flush pending writes and release resources."""
+
+
+class SessionTable(ConversationStore):
+    """
+    Bounded in-process table of per-session conversations.
+
+    Sessions are kept in least-recently-used order. A session that has been
+    idle longer than the TTL is dropped, and when the table is full the least
+    recently used session is evicted to make room. Each session also keeps at
+    most max_turns question/answer pairs, so total memory stays flat no matter
+    how much traffic the process serves. Conversations are private to the
+    process, so this store only suits a single worker.
+    """
+
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: float = 3600, max_turns: int = 50):
+        """
+        Initialize the session table.
+
+        Args:
+            max_sessions: Maximum number of sessions held at once
+            ttl_seconds: Idle time after which a session expires
+            max_turns: Maximum question/answer pairs kept per session
+        """
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_turns = max_turns
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.evictions = 0
+        self.expirations = 0
+
+    def _expire(self, now: float):
+        """Drop idle sessions. Entries are in access order, so stop at the first live one."""
+        while self._sessions:
+            session_id, entry = next(iter(self._sessions.items()))
+            if now - entry["last_access"] <= self.ttl_seconds:
+                break
+            del self._sessions[session_id]
+            self.expirations += 1
+
+    def _get(self, session_id: str) -> List[BaseMessage]:
+        """Get a session's message list, creating it if needed. Call with the lock held."""
+        now = time.time()
+        self._expire(now)
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            while len(self._sessions) >= self.max_sessions:
+                self._sessions.popitem(last=False)
+                self.evictions += 1
+            entry = {"messages": [], "last_access": now}
+            self._sessions[session_id] = entry
+        else:
+            entry["last_access"] = now
+            self._sessions.move_to_end(session_id)
+        return entry["messages"]
+
+    def recent_messages(self, session_id: str = DEFAULT_SESSION_ID, turns: Optional[int] = None) -> List[BaseMessage]:
+        with self._lock:
+            messages = self._get(session_id)
+            return list(messages[-turns * 2:]) if turns else list(messages)
+
+    def history(self, session_id: str = DEFAULT_SESSION_ID, offset: int = 0,
+                limit: Optional[int] = None) -> Optional[List[BaseMessage]]:
+        with self._lock:
+            self._expire(time.time())
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            return entry["messages"][offset:offset + limit if limit is not None else None]
+
+    def history_length(self, session_id: str = DEFAULT_SESSION_ID) -> int:
+        with self._lock:
+            self._expire(time.time())
+            entry = self._sessions.get(session_id)
+            return len(entry["messages"]) if entry else 0
+
+    def save_turn(self, session_id: str, question: str, answer: str):
+        """
+        Record a question/answer pair and trim the session to max_turns.
+
+        Args:
+            session_id: Session identifier
+            question: The user's question
+            answer: The assistant's answer
+        """
+        with self._lock:
+            messages = self._get(session_id)
+            messages.extend(turns_to_messages([(question, answer)]))
+            overflow = len(messages) - self.max_turns * 2
+            if overflow > 0:
+                del messages[:overflow]
+
+    def clear(self, session_id: str = DEFAULT_SESSION_ID):
+        """Remove a session and its history."""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Report session table size and approximate memory use.
+
+        Returns:
+            Dictionary with session counts, message counts and content bytes
+        """
+        with self._lock:
+            self._expire(time.time())
+            total_messages = 0
+            content_bytes = 0
+            for entry in self._sessions.values():
+                messages = entry["messages"]
+                total_messages += len(messages)
+                content_bytes += sum(len(str(m.content).encode("utf-8")) for m in messages)
+            return {
+                "backend": "memory",
+                "active_sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "ttl_seconds": self.ttl_seconds,
+                "max_turns": self.max_turns,
+                "total_messages": total_messages,
+                "content_bytes": content_bytes,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
@@ -1,163 +1,468 @@
 import os
-import csv
-from langchain.schema import Document
-from langchain_community.document_loaders import TextLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain_openai import OpenAIEmbeddings  # Updated import
+import argparse
+import threading
 from dotenv import load_dotenv
-from langchain_pinecone import PineconeVectorStore
-from pinecone import Pinecone
 import time
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple, Callable
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from clients import default_registry
+from embedding_cache import CachedEmbeddings
+from vector_backends import build_vectorstore, namespace_by_type
+from ingest_manifest import IngestManifest, IngestCheckpoint, file_hash, assign_chunk_ids
+from ingest_pipeline import IngestPipeline
+from rate_limit import RateLimiter, RateLimitedEmbeddings
+from ingest_loaders import DATA_FOLDERS, iter_source_files, load_file, make_chunker
+from lexical_index import BM25Index, default_lexical_path
+from docstore import INDEX_FIELDS, ChunkDocstore, docstore_enabled, default_docstore_path
 
 load_dotenv()
 
-# Initialize Pinecone client
-pc = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
-
-# Use the updated OpenAI embeddings
-embeddings = OpenAIEmbeddings()
-all_docs = []
-base_path = "backend/copilot-data"
-
-# Loop over folders: prds, sprints, roadmaps
-for folder in ["prds", "sprints", "roadmaps"]:
-    full_path = os.path.join(base_path, folder)
-    
-    # Check if folder exists
-    if not os.path.exists(full_path):
-        print(f"Warning: Folder {full_path} does not exist, skipping...")
-        continue
-    
-    for filename in os.listdir(full_path):
-        file_path = os.path.join(full_path, filename)
-        
-        # Load .md or .txt files
-        if filename.endswith(".md") or filename.endswith(".txt"):
-            try:
-                loader = TextLoader(file_path, encoding='utf-8')
-                docs = loader.load()
-                for doc in docs:
-                    doc.metadata["type"] = folder
-                    doc.metadata["source"] = filename
-                    all_docs.append(doc)
-            except Exception as e:
-                print(f"Error loading {file_path}: {e}")
-        
-        # Load .csv files
-        elif filename.endswith(".csv"):
-            try:
-                with open(file_path, newline='', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    for row_idx, row in enumerate(reader):
-                        content = "\n".join(f"{k}: {v}" for k, v in row.items())
-                        doc = Document(
-                            page_content=content,
-                            metadata={
-                                "type": folder,
-                                "source": filename,
-                                "row_index": row_idx
-                            }
-                        )
-                        all_docs.append(doc)
-            except Exception as e:
-                print(f"Error loading {file_path}: {e}")
-
-print(f"Loaded {len(all_docs)} documents")
-
-# Split documents
-if all_docs:
-    splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-    chunks = splitter.split_documents(all_docs)
-    print(f"Created {len(chunks)} chunks")
-    
-    # Function to upload documents in batches
-    def upload_in_batches(documents, batch_size=50):
-        """Upload documents to Pinecone in batches to avoid size limits"""
-        total_uploaded = 0
-        
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_DATA_DIR = os.path.join(BACKEND_DIR, "copilot-data")
+DEFAULT_CACHE_DIR = os.path.join(BACKEND_DIR, ".cache")
+DEFAULT_INDEX_NAME = "pinecone-chatbot"
+
+
+def delete_in_batches(vectorstore, ids, batch_size=1000):
+    """Delete vectors by id in batches. Returns True if every batch succeeded."""
+    ok = True
+    for i in range(0, len(ids), batch_size):
+        try:
+            vectorstore.delete(ids=ids[i:i + batch_size])
+        except Exception as delete_error:
+            print(f"❌ Failed to delete {len(ids[i:i + batch_size])} stale vectors: {delete_error}")
+            ok = False
+    return ok
+
+
+class IngestProgress:
+    """
+    Track which files have all their chunks in the index, and checkpoint it.
+
+    A file is recorded in the manifest once every chunk it needs has been
+    upserted and its stale vectors are deleted; until then its upserted
+    chunks are kept in the checkpoint. Only then does the lexical index
+    switch to the file's new chunks and the docstore drop its old ones, so
+    neither gets ahead of the vectors. Every checkpoint_seconds (and at the
+    end) the local index is saved first, then the manifest and checkpoint,
+    so they never claim more than is on disk and an interrupted run resumes
+    where it stopped.
+    """
+
+    def __init__(self, manifest: IngestManifest, checkpoint: IngestCheckpoint, vectorstore: Any,
+                 lexical: BM25Index, docstore: Optional[ChunkDocstore] = None,
+                 persist: Optional[Callable[[], None]] = None, checkpoint_seconds: float = 5.0):
+        """
+        Args:
+            manifest: Manifest of fully ingested files
+            checkpoint: Checkpoint of partly upserted files
+            vectorstore: Store the chunks are upserted into (stale vectors are deleted from it)
+            lexical: Lexical index updated as files complete
+            docstore: Docstore whose old rows are dropped as files complete
+            persist: Writes the vector index to disk, for the local backend
+            checkpoint_seconds: Shortest time between checkpoints
+        """
+        self.manifest = manifest
+        self.checkpoint = checkpoint
+        self.vectorstore = vectorstore
+        self.lexical = lexical
+        self.docstore = docstore
+        self.persist = persist
+        self.checkpoint_seconds = checkpoint_seconds
+        # file_key -> {"hash", "chunks", "remaining": chunk ids not upserted yet, "delete": stale ids}
+        self._files: Dict[str, Dict[str, Any]] = {}
+        # chunk_id -> file_key, for chunks still to be upserted
+        self._owners: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._last_save = time.monotonic()
+        self.completed = 0
+
+    def add_file(self, file_key: str, content_hash: str, chunks: List[Document], pending_ids: List[str],
+                 delete_ids: List[str]):
+        """Start tracking a file whose pending chunks are about to enter the pipeline."""
+        with self._lock:
+            self._files[file_key] = {
+                "hash": content_hash,
+                "chunks": chunks,
+                "remaining": set(pending_ids),
+                "delete": delete_ids
+            }
+            for chunk_id in pending_ids:
+                self._owners[chunk_id] = file_key
+            if not pending_ids:
+                self._complete(file_key)
+
+    def upserted(self, batch: List[Document]):
+        """Pipeline callback: mark a batch's chunks as in the index."""
+        with self._lock:
+            for doc in batch:
+                chunk_id = doc.metadata["chunk_id"]
+                file_key = self._owners.pop(chunk_id, None)
+                if file_key is None:
+                    continue
+                entry = self._files[file_key]
+                entry["remaining"].discard(chunk_id)
+                self.checkpoint.mark(file_key, entry["hash"], [chunk_id])
+                if not entry["remaining"]:
+                    self._complete(file_key)
+            if time.monotonic() - self._last_save >= self.checkpoint_seconds:
+                self._save()
+
+    def _complete(self, file_key: str):
+        entry = self._files.pop(file_key)
+        if entry["delete"] and not delete_in_batches(self.vectorstore, entry["delete"]):
+            # Leave it unrecorded; the checkpoint lets the next run retry only the deletes
+            return
+        chunk_ids = [chunk.metadata["chunk_id"] for chunk in entry["chunks"]]
+        self.lexical.replace_file(file_key, entry["hash"], entry["chunks"])
+        if self.docstore is not None:
+            self.docstore.finish_file(file_key, entry["hash"], chunk_ids)
+        self.manifest.record(file_key, entry["hash"], chunk_ids)
+        self.checkpoint.finish(file_key)
+        self.completed += 1
+
+    def _save(self):
+        if self.persist is not None:
+            self.persist()
+        self.manifest.save()
+        self.checkpoint.save()
+        self._last_save = time.monotonic()
+
+    def save(self):
+        """Checkpoint now."""
+        with self._lock:
+            self._save()
+
+    @property
+    def incomplete_files(self) -> int:
+        """Files with chunks that never made it into the index (e.g. dead-lettered)."""
+        with self._lock:
+            return len(self._files)
+
+
+def plan_files(data_dir: str, manifest: IngestManifest, checkpoint: IngestCheckpoint, lexical: BM25Index,
+               docstore: Optional[ChunkDocstore], chunker, summary: Dict[str, int],
+               seen_files: set) -> Iterator[Tuple[str, str, List[Document], List[Document], List[str]]]:
+    """
+    Walk, load and split the data directory one file at a time, yielding what each changed file needs.
+
+    Unchanged files are skipped without being read. A file's new chunks are
+    added to the docstore before their vectors are upserted; its old rows
+    stay until the file completes (see IngestProgress). summary counts
+    added, changed and unchanged files, and seen_files collects every file
+    key found.
+
+    Yields:
+        Tuples of (file_key, content hash, all chunks, chunks to upsert, stale ids to delete); files
+        whose vectors are current but whose lexical or docstore entry is not have nothing to upsert
+    """
+    for folder, filename, file_path in iter_source_files(data_dir):
+        file_key = f"{folder}/{filename}"
+        seen_files.add(file_key)
+
+        # Skip files whose content has not changed since the last run
+        content_hash = file_hash(file_path)
+        vectors_current = manifest.is_unchanged(file_key, content_hash)
+        stored = docstore is None or docstore.is_unchanged(file_key, content_hash)
+        if vectors_current and stored and lexical.is_unchanged(file_key, content_hash):
+            summary["unchanged"] += 1
+            continue
+
+        try:
+            docs = load_file(folder, filename, file_path)
+        except Exception as e:
+            print(f"Error loading {file_path}: {e}")
+            continue
+
+        file_chunks = chunker.split_documents(docs)
+        chunk_ids = assign_chunk_ids(file_key, file_chunks)
+        if docstore is not None:
+            docstore.add_chunks(file_key, file_chunks)
+        if vectors_current:
+            # Only the lexical index or the docstore was missing this file
+            summary["unchanged"] += 1
+            yield file_key, content_hash, file_chunks, [], []
+            continue
+        diff = manifest.diff(file_key, chunk_ids)
+        # Chunks an interrupted run already upserted are not sent again
+        upsert_ids = set(diff["upsert"]) - checkpoint.done(file_key, content_hash)
+        summary["changed" if manifest.get(file_key) else "added"] += 1
+        yield (file_key, content_hash, file_chunks,
+               [chunk for chunk in file_chunks if chunk.metadata["chunk_id"] in upsert_ids], diff["delete"])
+
+
+def timed(items: Iterable, phases: Dict[str, float], name: str) -> Iterator:
+    """Yield from items, adding the time spent producing each one to phases[name]."""
+    iterator = iter(items)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        finally:
+            phases[name] = phases.get(name, 0.0) + time.perf_counter() - start
+        yield item
+
+
+def print_summary(summary: Dict[str, int], chunker):
+    print(
+        f"📋 Files: {summary['added']} added, {summary['changed']} changed, "
+        f"{summary['unchanged']} unchanged, {summary['removed']} removed"
+    )
+    chunk_stats = chunker.stats.summary()
+    if chunk_stats["chunks"]:
+        print(
+            f"📐 Chunk sizes: {chunk_stats['chunks']} chunks, {chunk_stats['total_tokens']} tokens "
+            f"(mean {chunk_stats['mean_tokens']}, p95 {chunk_stats['p95_tokens']}, max {chunk_stats['max_tokens']}); "
+            f"by kind {chunk_stats['by_kind']}"
+        )
+
+
+def ingest(args: argparse.Namespace, embeddings: Optional[Embeddings] = None,
+           vectorstore: Optional[VectorStore] = None) -> Optional[Dict[str, Any]]:
+    """
+    Bring the index up to date with the data directory.
+
+    Files stream through walk -> load -> split (here) and embed -> upsert
+    (IngestPipeline, behind bounded queues), so memory stays flat however
+    large the corpus is.
+
+    Args:
+        args: Parsed command line (data_dir, index, batch_size, dry_run)
+        embeddings: Embeddings model to use instead of the cached, rate limited OpenAI one
+        vectorstore: Vector store to upsert into instead of the configured backend's
+
+    Returns:
+        File counts, chunk counts, chunk sizes and per-phase seconds (plan: walk, load, split
+        and docstore writes; embed and upsert: time in those calls summed over workers;
+        pipeline: wall time of the embed -> upsert run, planning included; finalize: removed
+        files, saving the indexes), or None for a dry run or when the vector store cannot
+        be created
+    """
+    run_started = time.perf_counter()
+    phases: Dict[str, float] = {}
+    # Vector backend to ingest into: "pinecone" or "local"
+    vector_backend = os.getenv("VECTOR_BACKEND", "pinecone")
+    # Optionally keep each document type (prds, sprints, roadmaps) in its own namespace
+    namespaces = DATA_FOLDERS if namespace_by_type() else None
+
+    # Keep chunk text in the docstore and only ids and filter fields in the vector index
+    use_docstore = docstore_enabled()
+
+    # Manifest of what is already in the index, so re-runs only embed what changed. Namespaced
+    # vectors live apart from the single-namespace ones, and id-only vectors replace full ones,
+    # so each layout has its own manifest.
+    layout = ("-by-type" if namespaces else "") + ("-ids" if use_docstore else "")
+    manifest_path = os.getenv("INGEST_MANIFEST_PATH") or os.path.join(
+        DEFAULT_CACHE_DIR, f"manifest-{vector_backend}-{args.index}{layout}.json"
+    )
+    manifest = IngestManifest(manifest_path)
+    checkpoint = IngestCheckpoint(os.path.splitext(manifest_path)[0] + ".checkpoint.json")
+    if checkpoint.files:
+        print(f"⏯️  Resuming: {len(checkpoint.files)} files were part way through when the last run stopped")
+    chunker = make_chunker()
+
+    # BM25 index over the same chunks, loaded by the API for hybrid retrieval
+    lexical = BM25Index(default_lexical_path(args.index))
+    lexical_changed = not os.path.exists(lexical.path)
+    lexical_before = {file_key: entry["hash"] for file_key, entry in lexical.files.items()}
+
+    # Chunk text and metadata, keyed by chunk id (a dry run leaves it alone)
+    docstore = ChunkDocstore(default_docstore_path(args.index)) if use_docstore and not args.dry_run else None
+
+    summary = {"added": 0, "changed": 0, "unchanged": 0, "removed": 0}
+    seen_files = set()
+    files = timed(plan_files(args.data_dir, manifest, checkpoint, lexical, docstore, chunker, summary, seen_files),
+                  phases, "plan")
+
+    if args.dry_run:
+        upserts = 0
+        deletes = 0
+        for file_key, _, _, pending, delete_ids in files:
+            if not pending and not delete_ids:
+                continue
+            print(f"   {file_key}: {len(pending)} to upsert, {len(delete_ids)} to delete")
+            upserts += len(pending)
+            deletes += len(delete_ids)
+        removed_files = [file_key for file_key in manifest.files if file_key not in seen_files]
+        summary["removed"] = len(removed_files)
+        deletes += sum(len(manifest.get(file_key)["chunk_ids"]) for file_key in removed_files)
+        print_summary(summary, chunker)
+        print(f"🧪 Dry run: would embed and upsert {upserts} chunks and delete {deletes} vectors; nothing was written")
+        return None
+
+    # Shared clients (pooled HTTP transport for OpenAI, cached Pinecone index handles)
+    clients = default_registry()
+    pc = clients.pinecone() if vector_backend == "pinecone" and vectorstore is None else None
+
+    # Ingestion tuning
+    embed_concurrency = int(os.getenv("INGEST_EMBED_CONCURRENCY", "4"))
+    upsert_concurrency = int(os.getenv("INGEST_UPSERT_CONCURRENCY", "4"))
+    max_retries = int(os.getenv("INGEST_MAX_RETRIES", "5"))
+
+    if embeddings is None:
+        # Use the updated OpenAI embeddings, rate limited to the provider's quota (we do our own
+        # backoff, so the client's retries are off) and cached on disk so unchanged chunks are not re-embedded
+        embedding_limiter = RateLimiter(
+            requests_per_minute=float(os.getenv("EMBED_RPM", "3000")),
+            tokens_per_minute=float(os.getenv("EMBED_TPM", "1000000"))
+        )
+        embeddings = CachedEmbeddings(
+            RateLimitedEmbeddings(clients.openai_embeddings(max_retries=0), embedding_limiter, max_retries=max_retries),
+            disk_path=os.getenv("EMBEDDING_CACHE_PATH") or os.path.join(DEFAULT_CACHE_DIR, "embeddings.sqlite")
+        )
+
+    if vectorstore is None:
         try:
-            # Get the index
-            index = pc.Index("pinecone-chatbot")
-            
             # Create vectorstore instance
-            vectorstore = PineconeVectorStore(
-                index=index,
-                embedding=embeddings
+            vectorstore = build_vectorstore(
+                vector_backend, args.index, embeddings,
+                index=clients.index(args.index) if pc is not None else None,
+                namespaces=namespaces
             )
-            
-            # Process in batches
-            for i in range(0, len(documents), batch_size):
-                batch = documents[i:i + batch_size]
-                
-                try:
-                    # Add this batch to Pinecone
-                    vectorstore.add_documents(batch)
-                    total_uploaded += len(batch)
-                    print(f"✅ Uploaded batch {i//batch_size + 1}: {len(batch)} documents (Total: {total_uploaded}/{len(documents)})")
-                    
-                    # Add a small delay to avoid rate limiting
-                    time.sleep(0.5)
-                    
-                except Exception as batch_error:
-                    print(f"❌ Failed to upload batch {i//batch_size + 1}: {batch_error}")
-                    
-                    # Try with smaller batch size if this batch failed
-                    if batch_size > 10:
-                        print(f"Retrying with smaller batch size...")
-                        smaller_batch_size = batch_size // 2
-                        for j in range(0, len(batch), smaller_batch_size):
-                            smaller_batch = batch[j:j + smaller_batch_size]
-                            try:
-                                vectorstore.add_documents(smaller_batch)
-                                total_uploaded += len(smaller_batch)
-                                print(f"✅ Uploaded smaller batch: {len(smaller_batch)} documents (Total: {total_uploaded}/{len(documents)})")
-                                time.sleep(0.5)
-                            except Exception as smaller_batch_error:
-                                print(f"❌ Failed smaller batch too: {smaller_batch_error}")
-            
-            return total_uploaded
-            
         except Exception as e:
             print(f"Error initializing vectorstore: {e}")
-            return 0
-    
-    # Try uploading in batches
-    print("\nStarting batch upload to Pinecone...")
-    uploaded_count = upload_in_batches(chunks, batch_size=50)
-    
-    if uploaded_count > 0:
-        print(f"✅ Successfully uploaded {uploaded_count} out of {len(chunks)} chunks to Pinecone")
-    else:
-        print("❌ Failed to upload any documents to Pinecone")
-        
-        # Fallback: try with very small batches
-        print("Trying with very small batch size (10)...")
-        uploaded_count = upload_in_batches(chunks, batch_size=10)
-        
-        if uploaded_count > 0:
-            print(f"✅ Successfully uploaded {uploaded_count} out of {len(chunks)} chunks with small batches")
-        else:
-            print("❌ All upload attempts failed")
-            
-            # Debug information
-            print("\nDebugging information:")
-            print(f"PINECONE_API_KEY exists: {bool(os.getenv('PINECONE_API_KEY'))}")
-            print(f"Index name: pinecone-chatbot")
-            
-            # List available indexes
+            return None
+
+    progress = IngestProgress(
+        manifest, checkpoint, vectorstore, lexical, docstore,
+        # The local index is written to disk at each checkpoint
+        persist=vectorstore.save if vector_backend == "local" else None,
+        checkpoint_seconds=float(os.getenv("INGEST_CHECKPOINT_SECONDS", "5"))
+    )
+    queued = [0]
+
+    def pending_chunks() -> Iterator[Document]:
+        for file_key, content_hash, file_chunks, pending, delete_ids in files:
+            progress.add_file(file_key, content_hash, file_chunks,
+                              [chunk.metadata["chunk_id"] for chunk in pending], delete_ids)
+            queued[0] += len(pending)
+            yield from pending
+
+    # Embed and upsert concurrently, retrying dead-lettered chunks once at the end
+    print(
+        f"\nStarting upload to {vector_backend} index {args.index}{' (one namespace per type)' if namespaces else ''} "
+        f"({embed_concurrency} embed / {upsert_concurrency} upsert workers, batch size {args.batch_size})..."
+    )
+    started = time.perf_counter()
+    pipeline = IngestPipeline(
+        embeddings,
+        vectorstore,
+        batch_size=args.batch_size,
+        embed_concurrency=embed_concurrency,
+        upsert_concurrency=upsert_concurrency,
+        max_retries=max_retries,
+        on_upserted=progress.upserted,
+        index_fields=INDEX_FIELDS if use_docstore else None
+    )
+    uploaded_count = pipeline.run(pending_chunks())
+    failed_count = 0
+    if pipeline.dead_letters:
+        retried_count, dead_letters = pipeline.retry_dead_letters()
+        uploaded_count += retried_count
+        failed_count = len(dead_letters)
+    finalize_started = time.perf_counter()
+    phases["embed"] = pipeline.embed_seconds
+    phases["upsert"] = pipeline.upsert_seconds
+    phases["pipeline"] = finalize_started - started
+
+    # Files that were ingested before but are gone now
+    removed_files = [file_key for file_key in manifest.files if file_key not in seen_files]
+    summary["removed"] = len(removed_files)
+    removed_ids = [chunk_id for file_key in removed_files for chunk_id in manifest.get(file_key)["chunk_ids"]]
+    if removed_ids and delete_in_batches(vectorstore, removed_ids):
+        print(f"🗑️  Deleted {len(removed_ids)} vectors of removed files")
+        for file_key in removed_files:
+            manifest.remove(file_key)
+    progress.save()
+
+    # Text of removed files goes once their vectors are gone (files never in the manifest go regardless)
+    for file_key in [file_key for file_key in lexical.files if file_key not in seen_files and not manifest.get(file_key)]:
+        lexical.remove_file(file_key)
+    if docstore is not None:
+        for file_key in docstore.file_keys():
+            if file_key not in seen_files and not manifest.get(file_key):
+                docstore.remove_file(file_key)
+
+    print_summary(summary, chunker)
+    if queued[0] == 0 and not removed_ids:
+        print("✅ Index is up to date, nothing to embed.")
+    elif uploaded_count > 0:
+        print(
+            f"✅ Successfully uploaded {uploaded_count} out of {queued[0]} chunks "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+    if failed_count or progress.incomplete_files:
+        print(f"❌ {failed_count} chunks failed; {progress.incomplete_files} files will be retried on the next run")
+
+    if queued[0] and uploaded_count == 0:
+        print("❌ All upload attempts failed")
+
+        # Debug information
+        print("\nDebugging information:")
+        print(f"Vector backend: {vector_backend}")
+        print(f"PINECONE_API_KEY exists: {bool(os.getenv('PINECONE_API_KEY'))}")
+        print(f"Index name: {args.index}")
+
+        # List available indexes
+        if pc is not None:
             try:
                 indexes = pc.list_indexes()
                 print(f"Available indexes: {[idx.name for idx in indexes]}")
             except Exception as list_error:
                 print(f"Could not list indexes: {list_error}")
-                
-            # Sample document info
-            if chunks:
-                sample_doc = chunks[0]
-                print(f"Sample document length: {len(sample_doc.page_content)} characters")
-                print(f"Sample metadata: {sample_doc.metadata}")
 
-else:
-    print("No documents found to embed.")
+    # The lexical index follows the files whose vectors are in
+    if lexical_changed or {file_key: entry["hash"] for file_key, entry in lexical.files.items()} != lexical_before:
+        lexical.save()
+        print(f"🔤 Lexical index: {len(lexical)} chunks written to {lexical.path}")
+    if docstore is not None:
+        print(f"🗄️  Docstore: {len(docstore)} chunks in {docstore.path}")
+        docstore.close()
+
+    phases["finalize"] = time.perf_counter() - finalize_started
+    phases["total"] = time.perf_counter() - run_started
+    print("⏱️  Phases: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in phases.items()))
+    return {
+        "files": summary,
+        "queued": queued[0],
+        "uploaded": uploaded_count,
+        "failed": failed_count,
+        "chunk_stats": chunker.stats.summary(),
+        "phases": {name: round(seconds, 3) for name, seconds in phases.items()}
+    }
+
+
+def positive_int(value: str) -> int:
+    """Parse a command-line count that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected a whole number, got {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Embed the prds, sprints and roadmaps folders into the vector index")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR,
+                        help="Directory containing the prds, sprints and roadmaps folders")
+    parser.add_argument("--index", default=DEFAULT_INDEX_NAME,
+                        help="Pinecone index name, also the local index directory name")
+    # A string default goes through type= too, so a bad INGEST_BATCH_SIZE is rejected the same way
+    parser.add_argument("--batch-size", type=positive_int, default=os.getenv("INGEST_BATCH_SIZE", "50"),
+                        help="Chunks per embedding request and upsert")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Report what would be embedded, upserted and deleted without calling any API or writing")
+    args = parser.parse_args()
+
+    ingest(args)
+    print("\nScript completed!")
+
 
-print("\nScript completed!")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import asyncio
+import hashlib
+import json
+from collections import Counter
+from typing import Dict, Any, List, Tuple, Callable, Awaitable, AsyncIterator, Hashable
+from embedding_cache import normalize_text
+from deadlines import deadline_scope, within_deadline
+
+
+def request_key(*parts: Any) -> str:
+    """
+    Build a coalescing key from a request's parts.
+
+    Strings are normalized as the embedding cache normalizes them, so
+    requests differing only in whitespace share a key.
+    """
+    normalized = [normalize_text(part) if isinstance(part, str) else part for part in parts]
+    payload = json.dumps(normalized, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    """One shared computation and the number of callers waiting on it."""
+
+    def __init__(self, future: asyncio.Future):
+        self.future = future
+        self.waiters = 0
+
+
+class _Broadcast:
+    """Events of one shared stream, replayed to every subscriber from the start."""
+
+    def __init__(self):
+        self.events: List[Any] = []
+        self.finished = False
+        self.error: BaseException = None
+        self.subscribers = 0
+        self.producer: asyncio.Future = None
+        self._changed = asyncio.Condition()
+
+    async def publish(self, event: Any):
+        async with self._changed:
+            self.events.append(event)
+            self._changed.notify_all()
+
+    async def finish(self, error: BaseException = None):
+        async with self._changed:
+            self.finished = True
+            self.error = error
+            self._changed.notify_all()
+
+    async def _wait(self, position: int) -> Tuple[List[Any], bool, BaseException]:
+        async with self._changed:
+            await self._changed.wait_for(lambda: position < len(self.events) or self.finished)
+            return self.events[position:], self.finished, self.error
+
+    async def subscribe(self, stage: str) -> AsyncIterator[Any]:
+        position = 0
+        while True:
+            events, finished, error = await within_deadline(self._wait(position), stage)
+            position += len(events)
+            for event in events:
+                yield event
+            if finished and position >= len(self.events):
+                if error is not None:
+                    raise error
+                return
+
+
+class SingleFlight:
+    """
+    Coalesce identical concurrent requests onto one in-flight computation.
+
+    The first caller for a key starts the work as its own task; callers that
+    arrive with the same key while it runs wait for that task instead of
+    repeating it, and all of them get its result (or its exception). Streams
+    are shared the same way: every subscriber receives all events from the
+    start, including ones produced before it joined. The work runs without
+    any one caller's deadline; each caller waits only until its own deadline
+    (see deadlines), and the work is cancelled once no caller is left
+    waiting for it. Keys are forgotten as soon as the work finishes, so
+    nothing is cached beyond the in-flight window.
+    """
+
+    def __init__(self, enabled: bool = True):
+        """
+        Initialize the coalescer.
+
+        Args:
+            enabled: When False every call runs its own work
+        """
+        self.enabled = enabled
+        self._calls: Dict[Hashable, _Call] = {}
+        self._streams: Dict[Hashable, _Broadcast] = {}
+        self.executions: Counter = Counter()
+        self.coalesced: Counter = Counter()
+
+    @staticmethod
+    async def _detached(fn: Callable[[], Awaitable[Any]]) -> Any:
+        with deadline_scope(None):
+            return await fn()
+
+    async def do(self, name: str, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run fn, or wait for the identical call already in flight.
+
+        Args:
+            name: Kind of request, used for the counters (e.g. "search")
+            key: Identity of the request (see request_key)
+            fn: Coroutine function doing the work
+
+        Returns:
+            The result, which callers must not mutate, and whether it came
+            from a call already in flight
+        """
+        if not self.enabled:
+            self.executions[name] += 1
+            return await fn(), False
+        key = (name, key)
+        call = self._calls.get(key)
+        coalesced = call is not None
+        if not coalesced:
+            self.executions[name] += 1
+            call = self._calls[key] = _Call(asyncio.ensure_future(self._detached(fn)))
+            call.future.add_done_callback(lambda _: self._forget(self._calls, key, call))
+        else:
+            self.coalesced[name] += 1
+        call.waiters += 1
+        try:
+            # Shielded so a caller leaving (disconnect or deadline) does not cancel the work for the rest
+            return await within_deadline(asyncio.shield(call.future), name), coalesced
+        finally:
+            call.waiters -= 1
+            if call.waiters == 0 and not call.future.done():
+                self._forget(self._calls, key, call)
+                call.future.cancel()
+
+    async def stream(self, name: str, key: Hashable,
+                     fn: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Tuple[Any, bool]]:
+        """
+        Iterate fn(), or subscribe to the identical stream already in flight.
+
+        Args:
+            name: Kind of request, used for the counters (e.g. "chat_stream")
+            key: Identity of the request (see request_key)
+            fn: Function returning the async iterator that produces the events
+
+        Yields:
+            (event, coalesced) for every event of the stream, where events
+            must not be mutated and coalesced tells whether this caller
+            joined a stream already in flight
+        """
+        if not self.enabled:
+            self.executions[name] += 1
+            async for event in fn():
+                yield event, False
+            return
+        key = (name, key)
+        broadcast = self._streams.get(key)
+        coalesced = broadcast is not None
+        if not coalesced:
+            self.executions[name] += 1
+            broadcast = self._streams[key] = _Broadcast()
+            broadcast.producer = asyncio.ensure_future(self._produce(key, broadcast, fn))
+        else:
+            self.coalesced[name] += 1
+        broadcast.subscribers += 1
+        try:
+            async for event in broadcast.subscribe(name):
+                yield event, coalesced
+        finally:
+            broadcast.subscribers -= 1
+            if broadcast.subscribers == 0 and not broadcast.producer.done():
+                self._forget(self._streams, key, broadcast)
+                broadcast.producer.cancel()
+
+    async def _produce(self, key: Hashable, broadcast: _Broadcast, fn: Callable[[], AsyncIterator[Any]]):
+        error = None
+        try:
+            with deadline_scope(None):
+                async for event in fn():
+                    await broadcast.publish(event)
+        except Exception as e:
+            error = e
+        finally:
+            # Forget the key first so later callers start a fresh stream rather than replay a finished one
+            self._forget(self._streams, key, broadcast)
+        await broadcast.finish(error)
+
+    @staticmethod
+    def _forget(entries: Dict[Hashable, Any], key: Hashable, entry: Any):
+        if entries.get(key) is entry:
+            del entries[key]
+
+    def in_flight(self) -> int:
+        """Number of computations and streams currently running."""
+        return len(self._calls) + len(self._streams)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get coalescing counters.
+
+        Returns:
+            Dictionary with, per request kind, how many computations ran and
+            how many calls were served by one already in flight
+        """
+        names = sorted(set(self.executions) | set(self.coalesced))
+        return {
+            "enabled": self.enabled,
+            "in_flight": self.in_flight(),
+            "executions": {name: self.executions[name] for name in names},
+            "coalesced": {name: self.coalesced[name] for name in names},
+            "coalesced_total": sum(self.coalesced.values())
+        }
@@ -0,0 +1,60 @@
+import os
+import sys
+import pytest
+from langchain_core.documents import Document
+
+# Make the backend modules importable however pytest is started
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from embedding_cache import CachedEmbeddings
+from rag_agent import RAGAgent
+from benchmarks.fakes import FakeEmbeddings, FakeChatModel, build_fake_vectorstore
+
+
+CONCURRENT_REQUESTS = 8
+EMBED_LATENCY_MS = 40
+QUERY_LATENCY_MS = 40
+FIRST_TOKEN_MS = 80
+
+CHUNKS = [
+    Document(page_content=text, metadata={"chunk_id": f"chunk-{i}", "type": doc_type, "source": f"{doc_type}.md"})
+    for i, (doc_type, text) in enumerate([
+        ("prds", "Onboarding checklist PRD with activation goals and acceptance criteria"),
+        ("sprints", "Sprint 14 backlog: latency fixes, search filters and release tooling"),
+        ("roadmaps", "Q3 roadmap: onboarding revamp, latency work and the analytics launch"),
+        ("prds", "Search filters PRD covering functional and non-functional requirements")
+    ])
+]
+
+
+def build_agent(tmp_path, chunks=CHUNKS) -> RAGAgent:
+    """A RAGAgent over chunks whose embeddings, vector store and LLM each wait like a network call would."""
+    fake = FakeEmbeddings(dimension=64, latency_ms=EMBED_LATENCY_MS)
+    embeddings = CachedEmbeddings(fake)
+    vectorstore = build_fake_vectorstore(
+        chunks, embeddings, fake, query_latency_ms=QUERY_LATENCY_MS, path=str(tmp_path / "index")
+    )
+    llm = FakeChatModel(first_token_ms=FIRST_TOKEN_MS, response_tokens=1)
+    return RAGAgent(
+        max_concurrency=CONCURRENT_REQUESTS,
+        condense_strategy="none",
+        embeddings=embeddings,
+        vectorstore=vectorstore,
+        llm=llm
+    )
+
+
+@pytest.fixture
+def agent_env(monkeypatch, tmp_path):
+    """Environment for an in-memory agent with its docstore under tmp_path."""
+    monkeypatch.setenv("CONVERSATION_STORE", "memory")
+    monkeypatch.setenv("HYBRID_SEARCH", "false")
+    monkeypatch.setenv("RESPONSE_CACHE_ENABLED", "false")
+    monkeypatch.setenv("DOCSTORE_PATH", str(tmp_path / "docstore.sqlite"))
+    return tmp_path
+
+
+@pytest.fixture
+def agent(agent_env):
+    """A RAGAgent over CHUNKS (see build_agent)."""
+    return build_agent(agent_env)
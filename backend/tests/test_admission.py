@@ -0,0 +1,46 @@
+import asyncio
+import pytest
+from admission import AdmissionController, AdmissionRejected, EndpointPolicy
+from deadlines import deadline_scope
+
+
+def controller(rate_per_minute=60, burst=5):
+    return AdmissionController([EndpointPolicy("search", max_in_flight=4, max_queue=4,
+                                               rate_per_minute=rate_per_minute, burst=burst)])
+
+
+def test_batch_within_burst_is_charged_its_size():
+    async def run():
+        admission = controller()
+        admission.release(await admission.admit("search", "client", cost=5))
+        # The batch used the whole burst, so the next single request is over the rate
+        with pytest.raises(AdmissionRejected) as rejected:
+            await admission.admit("search", "client")
+        return rejected.value
+
+    rejected = asyncio.run(run())
+    assert (rejected.status_code, rejected.reason) == (429, "rate_limited")
+
+
+def test_batch_larger_than_burst_is_rejected_not_clamped():
+    async def run():
+        admission = controller()
+        with pytest.raises(AdmissionRejected) as rejected:
+            await admission.admit("search", "client", cost=500)
+        # Nothing was charged, so a normal request still gets in
+        admission.release(await admission.admit("search", "client"))
+        return rejected.value
+
+    rejected = asyncio.run(run())
+    assert (rejected.status_code, rejected.reason) == (429, "over_burst")
+
+
+def test_stream_ends_with_deadline_event(agent):
+    async def run():
+        with deadline_scope(0.05):
+            return [event async for event in agent.astream_ask("What is on the roadmap?", session_id="late")]
+
+    events = asyncio.run(run())
+    assert events[-1]["event"] == "deadline_exceeded"
+    assert events[-1]["stage"]
+    assert not any(event["event"] in ("done", "error") for event in events)
@@ -0,0 +1,39 @@
+import time
+import asyncio
+from conftest import CONCURRENT_REQUESTS, EMBED_LATENCY_MS, QUERY_LATENCY_MS, FIRST_TOKEN_MS
+
+
+async def timed(coroutine):
+    start = time.perf_counter()
+    result = await coroutine
+    return time.perf_counter() - start, result
+
+
+def test_concurrent_asks_take_about_as_long_as_one(agent):
+    async def run():
+        # Distinct questions and sessions, so nothing is cached or coalesced
+        single, _ = await timed(agent.aask("What is on the roadmap? (warm-up)", session_id="single"))
+        batch, responses = await timed(asyncio.gather(*(
+            agent.aask(f"What is on the roadmap for item {i}?", session_id=f"session-{i}")
+            for i in range(CONCURRENT_REQUESTS)
+        )))
+        return single, batch, responses
+
+    single, batch, responses = asyncio.run(run())
+    assert not any(response.get("error") for response in responses)
+    assert single >= (EMBED_LATENCY_MS + QUERY_LATENCY_MS + FIRST_TOKEN_MS) / 1000
+    assert batch < single * CONCURRENT_REQUESTS / 3
+
+
+def test_concurrent_searches_take_about_as_long_as_one(agent):
+    async def run():
+        single, _ = await timed(agent.asearch_documents("latency work (warm-up)"))
+        batch, results = await timed(asyncio.gather(*(
+            agent.asearch_documents(f"latency work number {i}") for i in range(CONCURRENT_REQUESTS)
+        )))
+        return single, batch, results
+
+    single, batch, results = asyncio.run(run())
+    assert all(results)
+    assert single >= (EMBED_LATENCY_MS + QUERY_LATENCY_MS) / 1000
+    assert batch < single * CONCURRENT_REQUESTS / 3
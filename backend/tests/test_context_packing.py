@@ -0,0 +1,48 @@
+from langchain_core.documents import Document
+from langchain_core.messages import AIMessage, HumanMessage
+from context_packing import ContextPacker
+
+
+def packer(**kwargs) -> ContextPacker:
+    # An unknown model falls back to four characters per token, so budgets are exact offline
+    return ContextPacker(model_name="fake", **kwargs)
+
+
+def doc(text: str, source: str = "a.md") -> Document:
+    return Document(page_content=text, metadata={"source": source})
+
+
+def test_near_duplicates_are_dropped():
+    docs = [
+        doc("The onboarding checklist covers activation goals and acceptance criteria", "a.md"),
+        doc("The onboarding checklist covers activation goals and acceptance criteria.", "b.md"),
+        doc("Sprint 14 backlog: latency fixes and release tooling", "c.md")
+    ]
+    assert [d.metadata["source"] for d in packer().pack_documents(docs)] == ["a.md", "c.md"]
+
+
+def test_overlapping_chunks_of_one_source_are_merged():
+    first = doc("Goals: faster onboarding. Scope: the checklist")
+    second = doc("Scope: the checklist and welcome emails")
+    [merged] = packer().pack_documents([first, second])
+    assert merged.page_content == "Goals: faster onboarding. Scope: the checklist and welcome emails"
+
+
+def test_chunks_are_budgeted_in_relevance_order():
+    docs = [doc("a" * 39, "best.md"), doc("b" * 79, "too-big.md"), doc("c" * 19, "small.md")]
+    # 10, 20 and 5 tokens against a budget of 16
+    packed = packer(max_context_tokens=16).pack_documents(docs)
+    assert [d.metadata["source"] for d in packed] == ["best.md", "small.md"]
+
+
+def test_best_chunk_is_truncated_rather_than_dropped():
+    [packed] = packer(max_context_tokens=5).pack_documents([doc("x" * 400)])
+    assert packed.page_content == "x" * 20
+
+
+def test_history_keeps_the_most_recent_messages():
+    messages = [HumanMessage(content="old " * 40), AIMessage(content="older answer " * 10),
+                HumanMessage(content="What ships in Q3?"), AIMessage(content="The onboarding revamp.")]
+    history = packer(max_history_tokens=20).fit_history(messages)
+    assert "What ships in Q3?" in history and "The onboarding revamp." in history
+    assert "old old" not in history
@@ -0,0 +1,33 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from embedding_cache import CachedEmbeddings
+from benchmarks.fakes import FakeEmbeddings
+
+THREADS = 8
+QUERIES_PER_THREAD = 200
+
+
+def test_counters_are_exact_under_concurrent_queries():
+    cache = CachedEmbeddings(FakeEmbeddings(dimension=8))
+
+    def embed(thread: int):
+        for i in range(QUERIES_PER_THREAD):
+            cache.embed_query(f"thread {thread} query {i}")
+            cache.embed_query(f"thread {thread} query {i}")
+
+    with ThreadPoolExecutor(THREADS) as pool:
+        list(pool.map(embed, range(THREADS)))
+    stats = cache.stats()
+    assert stats["misses"] == THREADS * QUERIES_PER_THREAD
+    assert stats["memory_hits"] == THREADS * QUERIES_PER_THREAD
+
+
+def test_disk_tier_is_shared_in_wal_mode(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    writer = CachedEmbeddings(FakeEmbeddings(dimension=8), disk_path=path)
+    vector = writer.embed_query("sprint backlog")
+
+    reader = CachedEmbeddings(FakeEmbeddings(dimension=8), disk_path=path)
+    assert reader.embed_query("sprint backlog") == vector
+    assert reader.stats()["disk_hits"] == 1
+    assert sqlite3.connect(path).execute("PRAGMA journal_mode").fetchone()[0] == "wal"
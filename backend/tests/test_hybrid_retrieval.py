@@ -0,0 +1,31 @@
+from langchain_core.documents import Document
+from hybrid_retrieval import reciprocal_rank_fusion
+
+
+def doc(chunk_id: str) -> Document:
+    return Document(page_content=chunk_id, metadata={"chunk_id": chunk_id})
+
+
+def ids(docs):
+    return [d.metadata["chunk_id"] for d in docs]
+
+
+def test_documents_in_both_rankings_rise_to_the_top():
+    dense = [doc("a"), doc("b"), doc("c")]
+    lexical = [doc("c"), doc("d"), doc("b")]
+    # b: 1/62 + 1/63, c: 1/63 + 1/61, a: 1/61, d: 1/62
+    assert ids(reciprocal_rank_fusion([dense, lexical])) == ["c", "b", "a", "d"]
+
+
+def test_ties_keep_the_earlier_ranking_order():
+    assert ids(reciprocal_rank_fusion([[doc("a"), doc("b")], [doc("x"), doc("y")]])) == ["a", "x", "b", "y"]
+
+
+def test_each_document_is_returned_once_as_first_seen():
+    first = doc("a")
+    fused = reciprocal_rank_fusion([[first], [Document(page_content="other copy", metadata={"chunk_id": "a"})]])
+    assert fused == [first]
+
+
+def test_empty_rankings_fuse_to_nothing():
+    assert reciprocal_rank_fusion([[], []]) == []
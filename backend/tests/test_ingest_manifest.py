@@ -0,0 +1,57 @@
+from langchain_core.documents import Document
+from ingest_manifest import IngestManifest, assign_chunk_ids
+
+
+def csv_group(text, row_start, row_end):
+    return Document(page_content=text, metadata={"type": "sprints", "source": "s.csv", "row_index": row_start,
+                                                 "row_start": row_start, "row_end": row_end})
+
+
+def test_chunk_ids_are_deterministic():
+    first = assign_chunk_ids("prds/a.md", [Document(page_content="alpha"), Document(page_content="beta")])
+    second = assign_chunk_ids("prds/a.md", [Document(page_content="alpha"), Document(page_content="beta")])
+    assert first == second
+    assert len(set(first)) == 2
+
+
+def test_identical_chunks_are_told_apart_by_occurrence():
+    ids = assign_chunk_ids("prds/a.md", [Document(page_content="same"), Document(page_content="same")])
+    assert ids[0] != ids[1]
+
+
+def test_chunk_ids_depend_on_file_and_content():
+    base = assign_chunk_ids("prds/a.md", [Document(page_content="alpha")])
+    assert assign_chunk_ids("prds/b.md", [Document(page_content="alpha")]) != base
+    assert assign_chunk_ids("prds/a.md", [Document(page_content="alpha!")]) != base
+
+
+def test_shifted_csv_group_gets_a_new_id():
+    # A row inserted above the group moves it from rows 10-14 to 11-15 without changing its text
+    before = assign_chunk_ids("sprints/s.csv", [csv_group("rows", 10, 14)])
+    after = assign_chunk_ids("sprints/s.csv", [csv_group("rows", 11, 15)])
+    assert before != after
+
+
+def test_chunk_id_metadata_is_ignored_when_reassigning():
+    chunks = [Document(page_content="alpha", metadata={"type": "prds"})]
+    first = assign_chunk_ids("prds/a.md", chunks)
+    assert assign_chunk_ids("prds/a.md", chunks) == first
+    assert chunks[0].metadata["chunk_id"] == first[0]
+
+
+def test_diff_upserts_new_ids_and_deletes_dropped_ones(tmp_path):
+    manifest = IngestManifest(str(tmp_path / "manifest.json"))
+    manifest.record("prds/a.md", "hash-1", ["one", "two", "three"])
+    assert manifest.diff("prds/a.md", ["one", "three", "four"]) == {"upsert": ["four"], "delete": ["two"]}
+    assert manifest.diff("prds/new.md", ["x", "y"]) == {"upsert": ["x", "y"], "delete": []}
+
+
+def test_manifest_round_trips_through_save(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    manifest = IngestManifest(path)
+    manifest.record("prds/a.md", "hash-1", ["one"])
+    manifest.save()
+    reloaded = IngestManifest(path)
+    assert reloaded.is_unchanged("prds/a.md", "hash-1")
+    assert not reloaded.is_unchanged("prds/a.md", "hash-2")
+    assert reloaded.diff("prds/a.md", ["one"]) == {"upsert": [], "delete": []}
@@ -0,0 +1,18 @@
+import pytest
+from projection import encode_cursor, decode_cursor
+
+
+def test_cursor_round_trips():
+    assert decode_cursor(encode_cursor(40, "query"), "query") == 40
+    assert decode_cursor(encode_cursor(0, "query"), "query") == 0
+
+
+def test_cursor_is_bound_to_its_scope():
+    with pytest.raises(ValueError, match="does not belong"):
+        decode_cursor(encode_cursor(40, "query"), "another query")
+
+
+@pytest.mark.parametrize("cursor", ["", "not base64!", "e30=", encode_cursor(-5, "query")])
+def test_malformed_cursors_are_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, "query")
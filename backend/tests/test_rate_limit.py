@@ -0,0 +1,50 @@
+import pytest
+import rate_limit
+from rate_limit import TokenBucket
+
+
+class Clock:
+    """Stands in for time.monotonic so refills are deterministic."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(rate_limit.time, "monotonic", clock)
+    return clock
+
+
+def test_bucket_starts_full_and_reports_the_wait(clock):
+    bucket = TokenBucket(rate_per_second=2, capacity=4)
+    assert bucket.try_acquire(4) == 0.0
+    assert bucket.try_acquire(1) == pytest.approx(0.5)
+
+
+def test_bucket_refills_at_its_rate_up_to_capacity(clock):
+    bucket = TokenBucket(rate_per_second=2, capacity=4)
+    bucket.try_acquire(4)
+    clock.now += 1
+    assert bucket.try_acquire(2) == 0.0
+    assert bucket.try_acquire(1) > 0
+    clock.now += 60
+    assert bucket.try_acquire(4) == 0.0
+    assert bucket.try_acquire(1) > 0
+
+
+def test_more_than_capacity_can_never_be_taken(clock):
+    bucket = TokenBucket(rate_per_second=2, capacity=4)
+    assert bucket.try_acquire(5) == float("inf")
+    # Nothing was taken
+    assert bucket.try_acquire(4) == 0.0
+
+
+def test_acquire_drains_a_full_bucket_for_oversized_requests(clock):
+    bucket = TokenBucket(rate_per_second=2, capacity=4)
+    bucket.acquire(10)
+    assert bucket.try_acquire(1) == pytest.approx(0.5)
@@ -0,0 +1,34 @@
+import asyncio
+import pytest
+from conftest import CHUNKS, build_agent
+
+QUERY = "What is in the sprint backlog?"
+
+
+@pytest.fixture
+def agent_without_sprints(agent_env):
+    """An agent whose index has no sprint chunks, so queries routed to sprints find nothing there."""
+    return build_agent(agent_env, [chunk for chunk in CHUNKS if chunk.metadata["type"] != "sprints"])
+
+
+def test_query_routes_to_an_empty_type(agent_without_sprints):
+    assert agent_without_sprints.router.route(QUERY) == "sprints"
+
+
+def test_search_falls_back_when_routed_type_is_empty(agent_without_sprints):
+    assert agent_without_sprints.search_documents(QUERY, k=2)
+
+
+def test_async_search_falls_back_when_routed_type_is_empty(agent_without_sprints):
+    assert asyncio.run(agent_without_sprints.asearch_documents(QUERY, k=2))
+
+
+def test_batch_search_falls_back_like_single_search(agent_without_sprints):
+    async def run():
+        single = await agent_without_sprints.asearch_documents(QUERY, k=2)
+        batch = await agent_without_sprints.asearch_documents_batch([QUERY, "Q3 roadmap"], k=2)
+        return single, batch
+
+    single, (routed, unrouted) = asyncio.run(run())
+    assert routed and unrouted
+    assert [doc.metadata["chunk_id"] for doc in routed] == [doc.metadata["chunk_id"] for doc in single]
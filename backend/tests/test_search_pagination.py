@@ -0,0 +1,47 @@
+import asyncio
+import pytest
+from langchain_core.documents import Document
+import api
+
+RANKING = [Document(page_content="", metadata={"chunk_id": f"chunk-{i}"}) for i in range(12)]
+# Chunks the index returns but the docstore no longer has
+MISSING = {"chunk-1", "chunk-4"}
+
+
+class IdOnlyAgent:
+    """Returns id-only hits from a fixed ranking and fills them in from a docstore missing some chunks."""
+
+    async def asearch_documents(self, query, k=5, filter=None, route=True, with_text=True):
+        return RANKING[:k]
+
+    async def ahydrate(self, docs):
+        return [Document(page_content=f"text of {doc.metadata['chunk_id']}", metadata=doc.metadata)
+                for doc in docs if doc.metadata["chunk_id"] not in MISSING]
+
+
+@pytest.fixture
+def id_only_agent(monkeypatch):
+    monkeypatch.setattr(api, "rag_agent", IdOnlyAgent())
+
+
+def pages(k, fields=None):
+    """Page through search_results() k at a time, as /search does with its cursor offsets."""
+    offset, found = 0, []
+    while True:
+        results, more = asyncio.run(api.search_results("query", offset + k, None, True, fields))
+        found.append([doc.metadata["chunk_id"] for doc in results[offset:]])
+        if not more:
+            return found
+        offset += k
+
+
+def test_pages_are_refilled_past_missing_chunks(id_only_agent):
+    found = pages(3)
+    assert [len(page) for page in found] == [3, 3, 3, 1]
+    flat = [chunk_id for page in found for chunk_id in page]
+    assert flat == [doc.metadata["chunk_id"] for doc in RANKING if doc.metadata["chunk_id"] not in MISSING]
+
+
+def test_id_only_fields_page_the_raw_ranking(id_only_agent):
+    found = pages(5, fields=["id"])
+    assert [len(page) for page in found] == [5, 5, 2]
@@ -0,0 +1,14 @@
+import argparse
+import pytest
+from setup import positive_int
+
+
+def test_positive_int_accepts_counts():
+    assert positive_int("1") == 1
+    assert positive_int("50") == 50
+
+
+@pytest.mark.parametrize("value", ["0", "-5", "ten", "2.5"])
+def test_positive_int_rejects_non_counts(value):
+    with pytest.raises(argparse.ArgumentTypeError):
+        positive_int(value)
@@ -0,0 +1,37 @@
+import asyncio
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+
+MESSAGES = [HumanMessage(content="What is in the Q3 roadmap?"), AIMessage(content="The onboarding revamp.")]
+
+
+def test_failed_retrieval_cancels_the_condense_task(agent, monkeypatch):
+    condense_cancelled = asyncio.Event()
+
+    async def slow_condense(question, chat_history):
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            condense_cancelled.set()
+            raise
+
+    async def failing_retrieve(query, filter=None, route=True):
+        await asyncio.sleep(0)
+        raise RuntimeError("vector store down")
+
+    agent.condense_strategy = "speculative"
+    monkeypatch.setattr(agent, "_acondense", slow_condense)
+    monkeypatch.setattr(agent, "_aretrieve", failing_retrieve)
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await agent._aretrieve_for_turn("And when does it ship?", MESSAGES)
+        await asyncio.wait_for(condense_cancelled.wait(), 1)
+
+    asyncio.run(run())
+
+
+def test_close_shuts_the_condense_pool(agent):
+    agent.close()
+    with pytest.raises(RuntimeError):
+        agent._condense_pool.submit(print)
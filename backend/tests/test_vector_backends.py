@@ -0,0 +1,13 @@
+from vector_backends import NamespacedVectorStore
+from benchmarks.fakes import FakeEmbeddings
+
+
+def test_namespaced_from_texts_splits_by_field(tmp_path):
+    store = NamespacedVectorStore.from_texts(
+        ["a prd", "a sprint", "another prd"], FakeEmbeddings(dimension=16),
+        metadatas=[{"type": "prds"}, {"type": "sprints"}, {"type": "prds"}],
+        path=str(tmp_path), ids=["1", "2", "3"]
+    )
+    assert store.describe_index_stats()["namespaces"] == {"prds": {"vector_count": 2}, "sprints": {"vector_count": 1}}
+    hits = store.similarity_search("a prd", k=3, filter={"type": "prds"})
+    assert sorted(doc.metadata["type"] for doc in hits) == ["prds", "prds"]
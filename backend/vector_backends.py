@@ -0,0 +1,622 @@
+import os
+import json
+import uuid
+import asyncio
+import functools
+import threading
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.runnables.config import run_in_executor
+from langchain_core.vectorstores import VectorStore
+
+
+DEFAULT_LOCAL_INDEX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".index")
+
+
+def _match_condition(value: Any, condition: Any) -> bool:
+    """Check one metadata value against a Pinecone-style filter condition."""
+    if not isinstance(condition, dict):
+        return value == condition
+    for op, operand in condition.items():
+        if op == "$eq" and not value == operand:
+            return False
+        if op == "$ne" and not value != operand:
+            return False
+        if op == "$in" and value not in operand:
+            return False
+        if op == "$nin" and value in operand:
+            return False
+        if op in ("$gt", "$gte", "$lt", "$lte"):
+            if value is None:
+                return False
+            if op == "$gt" and not value > operand:
+                return False
+            if op == "$gte" and not value >= operand:
+                return False
+            if op == "$lt" and not value < operand:
+                return False
+            if op == "$lte" and not value <= operand:
+                return False
+    return True
+
+
+def matches_filter(metadata: Dict[str, Any], filter: Optional[Dict[str, Any]]) -> bool:
+    """
+    Evaluate a Pinecone-style metadata filter against a metadata dict.
+
+    Supports field equality, $eq, $ne, $in, $nin, $gt, $gte, $lt, $lte,
+    and $and / $or combinations.
+    """
+    if not filter:
+        return True
+    for key, condition in filter.items():
+        if key == "$and":
+            if not all(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif key == "$or":
+            if not any(matches_filter(metadata, sub) for sub in condition):
+                return False
+        elif not _match_condition(metadata.get(key), condition):
+            return False
+    return True
+
+
+def filter_values(filter: Optional[Dict[str, Any]], field: str) -> Optional[List[Any]]:
+    """
+    The values a filter allows for one field, if it pins the field to a set.
+
+    Understands equality, $eq, $in and top-level $and; returns None when the
+    field is unconstrained or constrained some other way.
+    """
+    if not filter:
+        return None
+    allowed = None
+    condition = filter.get(field)
+    if condition is not None:
+        if not isinstance(condition, dict):
+            allowed = [condition]
+        elif "$eq" in condition:
+            allowed = [condition["$eq"]]
+        elif "$in" in condition:
+            allowed = list(condition["$in"])
+    for sub in filter.get("$and", []):
+        values = filter_values(sub, field)
+        if values is not None:
+            allowed = values if allowed is None else [value for value in allowed if value in values]
+    return allowed
+
+
+class _FilterColumn:
+    """One metadata field of every record as NumPy arrays, so filters are evaluated without a Python loop."""
+
+    def __init__(self, values: List[Any]):
+        """
+        Args:
+            values: The field's value in each record (None where it is missing)
+
+        Raises:
+            TypeError: If a value cannot be hashed (e.g. a list)
+        """
+        # Distinct values get integer codes; equal values (1 == 1.0) share one, as with ==
+        self.codes_by_value: Dict[Any, int] = {}
+        self.codes = np.fromiter(
+            (self.codes_by_value.setdefault(value, len(self.codes_by_value)) for value in values),
+            dtype=np.int64, count=len(values)
+        )
+        numeric = all(
+            value is None or (isinstance(value, (int, float)) and not isinstance(value, bool)) for value in values
+        )
+        # NaN for missing values, which fail every range comparison, as None does in _match_condition
+        self.numbers = np.array(
+            [np.nan if value is None else value for value in values], dtype=np.float64
+        ) if numeric else None
+
+    def equals(self, operand: Any) -> np.ndarray:
+        code = self.codes_by_value.get(operand)
+        return self.codes == code if code is not None else np.zeros(len(self.codes), dtype=bool)
+
+    def isin(self, operands: Iterable[Any]) -> np.ndarray:
+        codes = [self.codes_by_value[operand] for operand in operands if operand in self.codes_by_value]
+        return np.isin(self.codes, codes)
+
+    def compare(self, op: str, operand: Any) -> np.ndarray:
+        if self.numbers is None or not isinstance(operand, (int, float)) or isinstance(operand, bool):
+            raise TypeError(f"{op} is only vectorized for numbers")
+        if op == "$gt":
+            return self.numbers > operand
+        if op == "$gte":
+            return self.numbers >= operand
+        if op == "$lt":
+            return self.numbers < operand
+        return self.numbers <= operand
+
+
+class LocalVectorIndex:
+    """
+    In-process vector index stored as a memory-mapped float32 matrix.
+
+    The index directory holds embeddings.npy (one L2-normalized row per
+    vector) and a metadata.json sidecar with each row's id, text and
+    metadata. Loading memory-maps the matrix, so startup does not copy the
+    vectors, and search is a single matrix-vector product followed by a
+    top-k partial sort.
+
+    Upserts write into a buffer with spare rows that doubles when full, so
+    a bulk load copies the vectors O(log N) times rather than once per
+    batch. Filters are evaluated on per-field arrays built on first use.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open (or prepare to create) an index directory.
+
+        Args:
+            path: Directory holding embeddings.npy and metadata.json
+        """
+        self.path = path
+        self.matrix_path = os.path.join(path, "embeddings.npy")
+        self.metadata_path = os.path.join(path, "metadata.json")
+        # Rows past len(self.records) are spare capacity; a loaded index is a read-only memory map
+        self._buffer = np.zeros((0, 0), dtype=np.float32)
+        self.records: List[Dict[str, Any]] = []
+        self._positions: Dict[str, int] = {}
+        # metadata field -> _FilterColumn, dropped whenever the records change
+        self._columns: Dict[str, _FilterColumn] = {}
+
+        if os.path.exists(self.matrix_path) and os.path.exists(self.metadata_path):
+            self._buffer = np.load(self.matrix_path, mmap_mode="r")
+            with open(self.metadata_path, encoding="utf-8") as f:
+                self.records = json.load(f)
+            self._positions = {record["id"]: i for i, record in enumerate(self.records)}
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """One row per record."""
+        return self._buffer[:len(self.records)]
+
+    @property
+    def dimension(self) -> int:
+        return int(self.matrix.shape[1]) if self.matrix.ndim == 2 and len(self.records) else 0
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (vectors / norms).astype(np.float32)
+
+    def upsert(self, ids: List[str], vectors: List[List[float]], texts: List[str], metadatas: List[Dict[str, Any]]):
+        """
+        Insert or replace vectors by id.
+
+        Args:
+            ids: Vector ids
+            vectors: Embedding vectors
+            texts: Chunk text for each vector
+            metadatas: Metadata for each vector
+        """
+        if not ids:
+            return
+        new_rows = self._normalize(np.asarray(vectors, dtype=np.float32))
+        self._reserve(len(self.records) + len(ids), new_rows.shape[1])
+
+        for row, vector_id, text, metadata in zip(new_rows, ids, texts, metadatas):
+            record = {"id": vector_id, "text": text, "metadata": metadata}
+            position = self._positions.get(vector_id)
+            if position is None:
+                position = self._positions[vector_id] = len(self.records)
+                self.records.append(record)
+            else:
+                self.records[position] = record
+            self._buffer[position] = row
+        self._columns = {}
+
+    def _reserve(self, rows: int, dimension: int):
+        """Make the buffer writable with room for at least rows rows, doubling its capacity when it grows."""
+        if self._buffer.flags.writeable and self._buffer.shape[0] >= rows and self._buffer.shape[1] == dimension:
+            return
+        capacity = max(rows, 2 * self._buffer.shape[0], 1024)
+        buffer = np.zeros((capacity, dimension), dtype=np.float32)
+        if len(self.records):
+            buffer[:len(self.records)] = self.matrix
+        self._buffer = buffer
+
+    def delete(self, ids: Iterable[str]):
+        """Remove vectors by id."""
+        doomed = {self._positions[i] for i in ids if i in self._positions}
+        if not doomed:
+            return
+        keep = [i for i in range(len(self.records)) if i not in doomed]
+        self._buffer = np.array(self.matrix[keep], dtype=np.float32)
+        self.records = [self.records[i] for i in keep]
+        self._positions = {record["id"]: i for i, record in enumerate(self.records)}
+        self._columns = {}
+
+    def save(self):
+        """Write the matrix and metadata sidecar, replacing the previous files atomically."""
+        os.makedirs(self.path, exist_ok=True)
+        matrix_tmp = self.matrix_path + ".tmp.npy"
+        metadata_tmp = self.metadata_path + ".tmp"
+        np.save(matrix_tmp, np.ascontiguousarray(self.matrix, dtype=np.float32))
+        with open(metadata_tmp, "w", encoding="utf-8") as f:
+            json.dump(self.records, f)
+        os.replace(matrix_tmp, self.matrix_path)
+        os.replace(metadata_tmp, self.metadata_path)
+
+    def query(self, vector: List[float], k: int = 5, filter: Optional[Dict[str, Any]] = None) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        Find the k most similar vectors by cosine similarity.
+
+        Args:
+            vector: Query embedding
+            k: Number of results
+            filter: Optional Pinecone-style metadata filter
+
+        Returns:
+            List of (record, score) pairs, best first
+        """
+        if not self.records or k <= 0:
+            return []
+        query = self._normalize(np.asarray(vector, dtype=np.float32))
+        scores = self.matrix @ query
+
+        if filter:
+            try:
+                mask = self._filter_mask(filter)
+            except TypeError:
+                # Lists in metadata, or ranges over strings: fall back to checking each record
+                mask = np.fromiter(
+                    (matches_filter(record["metadata"], filter) for record in self.records),
+                    dtype=bool, count=len(self.records)
+                )
+            scores = np.where(mask, scores, -np.inf)
+            k = min(k, int(mask.sum()))
+            if k == 0:
+                return []
+
+        k = min(k, len(self.records))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self.records[i], float(scores[i])) for i in top]
+
+    def _column(self, field: str) -> _FilterColumn:
+        column = self._columns.get(field)
+        if column is None:
+            column = self._columns[field] = _FilterColumn([record["metadata"].get(field) for record in self.records])
+        return column
+
+    def _filter_mask(self, filter: Dict[str, Any]) -> np.ndarray:
+        """
+        Evaluate a Pinecone-style filter over every record at once; same semantics as matches_filter().
+
+        Raises:
+            TypeError: If the filter or the metadata it touches cannot be vectorized
+        """
+        mask = np.ones(len(self.records), dtype=bool)
+        for key, condition in filter.items():
+            if key == "$and":
+                for sub in condition:
+                    mask &= self._filter_mask(sub)
+            elif key == "$or":
+                matched = np.zeros(len(self.records), dtype=bool)
+                for sub in condition:
+                    matched |= self._filter_mask(sub)
+                mask &= matched
+            else:
+                column = self._column(key)
+                for op, operand in (condition.items() if isinstance(condition, dict) else [("$eq", condition)]):
+                    if op == "$eq":
+                        mask &= column.equals(operand)
+                    elif op == "$ne":
+                        mask &= ~column.equals(operand)
+                    elif op == "$in":
+                        mask &= column.isin(operand)
+                    elif op == "$nin":
+                        mask &= ~column.isin(operand)
+                    elif op in ("$gt", "$gte", "$lt", "$lte"):
+                        mask &= column.compare(op, operand)
+        return mask
+
+    def describe_index_stats(self) -> Dict[str, Any]:
+        """Report index size in the same shape as Pinecone's describe_index_stats()."""
+        return {
+            "total_vector_count": len(self.records),
+            "dimension": self.dimension,
+            "namespaces": {"": {"vector_count": len(self.records)}},
+            "index_fullness": 0.0
+        }
+
+
+class LocalVectorStore(VectorStore):
+    """LangChain vector store backed by a LocalVectorIndex."""
+
+    def __init__(self, index: LocalVectorIndex, embedding: Embeddings):
+        self.index = index
+        self._embedding = embedding
+        self._write_lock = threading.Lock()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[Dict[str, Any]]] = None,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        vectors = self._embedding.embed_documents(texts)
+        return self.add_embeddings(ids, vectors, texts, metadatas)
+
+    def add_embeddings(self, ids: List[str], vectors: List[List[float]], texts: List[str],
+                       metadatas: List[Dict[str, Any]]) -> List[str]:
+        """Upsert precomputed embeddings."""
+        with self._write_lock:
+            self.index.upsert(ids, vectors, texts, metadatas)
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        with self._write_lock:
+            self.index.delete(ids or [])
+        return True
+
+    def save(self):
+        """Persist the index to disk."""
+        with self._write_lock:
+            self.index.save()
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4,
+                                               filter: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]:
+        return [
+            (Document(page_content=record["text"], metadata=record["metadata"]), score)
+            for record, score in self.index.query(embedding, k=k, filter=filter)
+        ]
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4,
+                                    filter: Optional[Dict[str, Any]] = None, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k=k, filter=filter)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4,
+                                     filter: Optional[Dict[str, Any]] = None, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self._embedding.embed_query(query), k=k, filter=filter)
+
+    def similarity_search(self, query: str, k: int = 4,
+                          filter: Optional[Dict[str, Any]] = None, **kwargs: Any) -> List[Document]:
+        return self.similarity_search_by_vector(self._embedding.embed_query(query), k=k, filter=filter)
+
+    async def asimilarity_search(self, query: str, k: int = 4,
+                                 filter: Optional[Dict[str, Any]] = None, **kwargs: Any) -> List[Document]:
+        # Only the embedding is a network call; the local search itself is fast enough to run inline.
+        embedding = await self._embedding.aembed_query(query)
+        return self.similarity_search_by_vector(embedding, k=k, filter=filter)
+
+    def _select_relevance_score_fn(self):
+        return lambda score: score
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[Dict[str, Any]]] = None,
+                   path: str = DEFAULT_LOCAL_INDEX_DIR, **kwargs: Any) -> "LocalVectorStore":
+        store = cls(LocalVectorIndex(path), embedding)
+        store.add_texts(texts, metadatas=metadatas, **kwargs)
+        return store
+
+
+class NamespacedVectorStore(VectorStore):
+    """
+    Vector store split into one namespace per value of a metadata field.
+
+    With the field set to "type", PRDs, sprints and roadmaps live in
+    separate partitions (Pinecone namespaces, or separate local indexes).
+    A search whose filter pins the type only queries those partitions;
+    any other search queries each one and merges the hits by score.
+    """
+
+    def __init__(self, stores: Dict[str, VectorStore], embedding: Embeddings, field: str = "type"):
+        """
+        Args:
+            stores: One vector store per namespace
+            embedding: Embeddings model used for queries
+            field: Metadata field whose value picks a chunk's namespace
+        """
+        self.stores = stores
+        self.field = field
+        self._embedding = embedding
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    def namespace_of(self, metadata: Dict[str, Any]) -> str:
+        """The namespace a chunk with this metadata belongs in."""
+        namespace = metadata.get(self.field)
+        if namespace not in self.stores:
+            raise ValueError(f"No namespace for {self.field}={namespace!r}")
+        return namespace
+
+    def namespaces_for(self, filter: Optional[Dict[str, Any]]) -> List[str]:
+        """The namespaces a search with this filter needs to query."""
+        allowed = filter_values(filter, self.field)
+        if allowed is None:
+            return list(self.stores)
+        return [namespace for namespace in self.stores if namespace in allowed]
+
+    def add_texts(self, texts: Iterable[str], metadatas: Optional[List[Dict[str, Any]]] = None,
+                  ids: Optional[List[str]] = None, **kwargs: Any) -> List[str]:
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        vectors = self._embedding.embed_documents(texts)
+        upsert_embeddings(self, ids, vectors, texts, metadatas)
+        return ids
+
+    def delete(self, ids: Optional[List[str]] = None, **kwargs: Any) -> Optional[bool]:
+        # Ids do not say which namespace they are in; deleting a missing id is a no-op
+        for store in self.stores.values():
+            store.delete(ids=ids, **kwargs)
+        return True
+
+    def save(self):
+        """Persist local namespaces to disk."""
+        for store in self.stores.values():
+            if isinstance(store, LocalVectorStore):
+                store.save()
+
+    def describe_index_stats(self) -> Dict[str, Any]:
+        """Report the local namespaces' sizes in the shape of Pinecone's describe_index_stats()."""
+        namespaces = {
+            name: {"vector_count": len(store.index.records)}
+            for name, store in self.stores.items() if isinstance(store, LocalVectorStore)
+        }
+        dimensions = [store.index.dimension for store in self.stores.values() if isinstance(store, LocalVectorStore)]
+        return {
+            "total_vector_count": sum(entry["vector_count"] for entry in namespaces.values()),
+            "dimension": max(dimensions, default=0),
+            "namespaces": namespaces,
+            "index_fullness": 0.0
+        }
+
+    @staticmethod
+    def _merge(results: List[List[Tuple[Document, float]]], k: int) -> List[Tuple[Document, float]]:
+        # Every namespace scores by cosine similarity, so the scores compare directly
+        merged = [hit for hits in results for hit in hits]
+        merged.sort(key=lambda hit: -hit[1])
+        return merged[:k]
+
+    def similarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4,
+                                               filter: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]:
+        return self._merge([
+            self.stores[namespace].similarity_search_by_vector_with_score(embedding, k=k, filter=filter)
+            for namespace in self.namespaces_for(filter)
+        ], k)
+
+    async def asimilarity_search_by_vector_with_score(self, embedding: List[float], k: int = 4,
+                                                      filter: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]:
+        results = await asyncio.gather(*(
+            run_in_executor(None, functools.partial(
+                self.stores[namespace].similarity_search_by_vector_with_score, embedding, k=k, filter=filter
+            ))
+            for namespace in self.namespaces_for(filter)
+        ))
+        return self._merge(list(results), k)
+
+    def similarity_search_by_vector(self, embedding: List[float], k: int = 4,
+                                    filter: Optional[Dict[str, Any]] = None, **kwargs: Any) -> List[Document]:
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k=k, filter=filter)]
+
+    async def asimilarity_search_by_vector(self, embedding: List[float], k: int = 4,
+                                           filter: Optional[Dict[str, Any]] = None, **kwargs: Any) -> List[Document]:
+        hits = await self.asimilarity_search_by_vector_with_score(embedding, k=k, filter=filter)
+        return [doc for doc, _ in hits]
+
+    def similarity_search_with_score(self, query: str, k: int = 4,
+                                     filter: Optional[Dict[str, Any]] = None, **kwargs: Any) -> List[Tuple[Document, float]]:
+        return self.similarity_search_by_vector_with_score(self._embedding.embed_query(query), k=k, filter=filter)
+
+    def similarity_search(self, query: str, k: int = 4,
+                          filter: Optional[Dict[str, Any]] = None, **kwargs: Any) -> List[Document]:
+        return self.similarity_search_by_vector(self._embedding.embed_query(query), k=k, filter=filter)
+
+    async def asimilarity_search(self, query: str, k: int = 4,
+                                 filter: Optional[Dict[str, Any]] = None, **kwargs: Any) -> List[Document]:
+        embedding = await self._embedding.aembed_query(query)
+        return await self.asimilarity_search_by_vector(embedding, k=k, filter=filter)
+
+    def _select_relevance_score_fn(self):
+        return lambda score: score
+
+    @classmethod
+    def from_texts(cls, texts: List[str], embedding: Embeddings, metadatas: Optional[List[Dict[str, Any]]] = None,
+                   path: str = DEFAULT_LOCAL_INDEX_DIR, field: str = "type", ids: Optional[List[str]] = None,
+                   **kwargs: Any) -> "NamespacedVectorStore":
+        """
+        Build a local namespaced store from texts, one LocalVectorStore per value of field.
+
+        Namespaces live under path/namespaces/<value>, as build_vectorstore() lays them out.
+        """
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [str(uuid.uuid4()) for _ in texts]
+        groups: Dict[str, List[int]] = {}
+        for i, metadata in enumerate(metadatas):
+            namespace = metadata.get(field)
+            if namespace is None:
+                raise ValueError(f"Text {i} has no {field} to pick its namespace")
+            groups.setdefault(str(namespace), []).append(i)
+        stores = {
+            namespace: LocalVectorStore.from_texts(
+                [texts[i] for i in positions], embedding, metadatas=[metadatas[i] for i in positions],
+                path=os.path.join(path, "namespaces", namespace), ids=[ids[i] for i in positions], **kwargs
+            )
+            for namespace, positions in groups.items()
+        }
+        return cls(stores, embedding, field=field)
+
+
+def build_vectorstore(backend: str, index_name: str, embeddings: Embeddings, index: Any = None,
+                      namespaces: Optional[List[str]] = None) -> VectorStore:
+    """
+    Create the configured vector store.
+
+    Args:
+        backend: "pinecone" or "local"
+        index_name: Pinecone index name, also used as the local index directory name
+        embeddings: Embeddings model used for queries and ingestion
+        index: Pinecone index handle, e.g. from ClientRegistry.index() (required for the pinecone backend)
+        namespaces: Document types to give their own namespace (see NamespacedVectorStore),
+            or None for a single namespace
+
+    Returns:
+        A LangChain vector store
+    """
+    if backend not in ("local", "pinecone"):
+        raise ValueError(f"Unknown vector backend: {backend}")
+    if backend == "local":
+        path = os.path.join(os.getenv("LOCAL_INDEX_DIR", DEFAULT_LOCAL_INDEX_DIR), index_name)
+        if namespaces:
+            return NamespacedVectorStore({
+                namespace: LocalVectorStore(LocalVectorIndex(os.path.join(path, "namespaces", namespace)), embeddings)
+                for namespace in namespaces
+            }, embeddings)
+        return LocalVectorStore(LocalVectorIndex(path), embeddings)
+    from langchain_pinecone import PineconeVectorStore
+    if namespaces:
+        return NamespacedVectorStore({
+            namespace: PineconeVectorStore(index=index, embedding=embeddings, namespace=namespace)
+            for namespace in namespaces
+        }, embeddings)
+    return PineconeVectorStore(index=index, embedding=embeddings)
+
+
+def namespace_by_type() -> bool:
+    """Whether ingestion and retrieval keep each document type in its own namespace (VECTOR_NAMESPACE_BY_TYPE)."""
+    return os.getenv("VECTOR_NAMESPACE_BY_TYPE", "false").lower() == "true"
+
+
+def upsert_embeddings(vectorstore: VectorStore, ids: List[str], vectors: List[List[float]], texts: List[str],
+                      metadatas: List[Dict[str, Any]]):
+    """
+    Write precomputed embeddings to either backend without embedding again.
+
+    Args:
+        vectorstore: Store created by build_vectorstore()
+        ids: Vector ids
+        vectors: Embedding vectors
+        texts: Chunk text for each vector
+        metadatas: Metadata for each vector
+    """
+    if isinstance(vectorstore, NamespacedVectorStore):
+        groups: Dict[str, Tuple[list, list, list, list]] = {}
+        for vector_id, vector, text, metadata in zip(ids, vectors, texts, metadatas):
+            group = groups.setdefault(vectorstore.namespace_of(metadata), ([], [], [], []))
+            for column, value in zip(group, (vector_id, vector, text, metadata)):
+                column.append(value)
+        for namespace, group in groups.items():
+            upsert_embeddings(vectorstore.stores[namespace], *group)
+        return
+    if isinstance(vectorstore, LocalVectorStore):
+        vectorstore.add_embeddings(ids, vectors, texts, metadatas)
+        return
+    # PineconeVectorStore keeps the chunk text in metadata under its text key
+    vectorstore._index.upsert(vectors=[
+        {"id": vector_id, "values": vector, "metadata": {**metadata, vectorstore._text_key: text}}
+        for vector_id, vector, text, metadata in zip(ids, vectors, texts, metadatas)
+    ], namespace=vectorstore._namespace)
@@ -1,5 +1,5 @@
 import { useState } from 'react';
-import { useMutation, useQuery } from '@tanstack/react-query';
+import { useMutation } from '@tanstack/react-query';
 import { Send, Bot, User, ExternalLink, Loader2 } from 'lucide-react';
 import { Button } from '@/components/ui/button';
 import { Input } from '@/components/ui/input';
@@ -20,11 +20,6 @@ export function ChatInterface() {
   const [message, setMessage] = useState('');
   const [messages, setMessages] = useState<Message[]>([]);
 
-  const { data: history } = useQuery({
-    queryKey: ['chat-history'],
-    queryFn: () => apiClient.getHistory(),
-  });
-
   const chatMutation = useMutation({
     mutationFn: (message: string) => apiClient.chat({ message, include_sources: true }),
     onSuccess: (response: ChatResponse) => {
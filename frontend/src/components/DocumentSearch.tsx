@@ -6,23 +6,47 @@ import { Input } from '@/components/ui/input';
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { Badge } from '@/components/ui/badge';
 import { ScrollArea } from '@/components/ui/scroll-area';
-import { apiClient, Document } from '@/lib/api';
+import { apiClient, Document, SearchField } from '@/lib/api';
+
+// Results only show a snippet, so the full chunk text is never transferred
+const RESULT_FIELDS: SearchField[] = ['id', 'snippet', 'type', 'source', 'metadata'];
+const PAGE_SIZE = 10;
+
+function highlight(text: string, query: string) {
+  const terms = query.toLowerCase().match(/\w{3,}/g);
+  if (!terms) return text;
+  // Terms are word characters only, so they need no escaping
+  const pattern = new RegExp(`(${terms.join('|')})`, 'gi');
+  return text.split(pattern).map((part, i) =>
+    i % 2 === 1 ? <mark key={i} className="bg-primary/20 text-foreground rounded-sm">{part}</mark> : part
+  );
+}
 
 export function DocumentSearch() {
   const [query, setQuery] = useState('');
+  const [searchedQuery, setSearchedQuery] = useState('');
   const [results, setResults] = useState<Document[]>([]);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
 
   const searchMutation = useMutation({
-    mutationFn: (searchQuery: string) => apiClient.search({ query: searchQuery, k: 10 }),
-    onSuccess: (response) => {
-      setResults(response.documents);
+    mutationFn: ({ searchQuery, cursor }: { searchQuery: string; cursor?: string }) =>
+      apiClient.search({ query: searchQuery, k: PAGE_SIZE, fields: RESULT_FIELDS, cursor }),
+    onSuccess: (response, { cursor }) => {
+      setResults((previous) => (cursor ? [...previous, ...response.documents] : response.documents));
+      setNextCursor(response.next_cursor ?? null);
     },
   });
 
   const handleSearch = (e: React.FormEvent) => {
     e.preventDefault();
     if (!query.trim() || searchMutation.isPending) return;
-    searchMutation.mutate(query);
+    setSearchedQuery(query);
+    searchMutation.mutate({ searchQuery: query });
+  };
+
+  const handleLoadMore = () => {
+    if (!nextCursor || searchMutation.isPending) return;
+    searchMutation.mutate({ searchQuery: searchedQuery, cursor: nextCursor });
   };
 
   return (
@@ -89,7 +113,7 @@ export function DocumentSearch() {
               </div>
             )}
 
-            {searchMutation.isPending && (
+            {searchMutation.isPending && results.length === 0 && (
               <div className="text-center py-12 text-muted-foreground px-6">
                 <Loader2 className="h-12 w-12 mx-auto mb-4 animate-spin opacity-50" />
                 <p className="text-lg mb-2">Searching...</p>
@@ -100,7 +124,7 @@ export function DocumentSearch() {
             {results.length > 0 && (
               <div className="space-y-4 p-6">
                 {results.map((doc, index) => (
-                  <Card key={index} className="border-l-4 border-l-primary/20">
+                  <Card key={doc.id ?? index} className="border-l-4 border-l-primary/20">
                     <CardContent className="p-4">
                       <div className="flex items-start justify-between mb-3">
                         <div className="flex items-center gap-2">
@@ -114,10 +138,7 @@ export function DocumentSearch() {
                       
                       <div className="space-y-2">
                         <p className="text-sm leading-relaxed">
-                          {doc.content.length > 300 
-                            ? doc.content.substring(0, 300) + '...'
-                            : doc.content
-                          }
+                          {highlight(doc.snippet ?? '', searchedQuery)}
                         </p>
                         
                         {doc.metadata && Object.keys(doc.metadata).length > 0 && (
@@ -137,6 +158,15 @@ export function DocumentSearch() {
                     </CardContent>
                   </Card>
                 ))}
+
+                {nextCursor && (
+                  <div className="flex justify-center">
+                    <Button variant="outline" size="sm" onClick={handleLoadMore} disabled={searchMutation.isPending}>
+                      {searchMutation.isPending && <Loader2 className="h-4 w-4 mr-2 animate-spin" />}
+                      Load more
+                    </Button>
+                  </div>
+                )}
               </div>
             )}
           </ScrollArea>
@@ -1,5 +1,5 @@
-import { useMutation, useQuery, useQueryClient } from '@tanstack/react-query';
-import { History, Trash2, User, Bot, RefreshCw } from 'lucide-react';
+import { useInfiniteQuery, useMutation, useQueryClient } from '@tanstack/react-query';
+import { History, Trash2, User, Bot, RefreshCw, Loader2 } from 'lucide-react';
 import { Button } from '@/components/ui/button';
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
 import { Badge } from '@/components/ui/badge';
@@ -9,15 +9,25 @@ import { apiClient } from '@/lib/api';
 import { useToast } from '@/hooks/use-toast';
 import { cn } from '@/lib/utils';
 
+// Messages fetched per page, newest first; older pages load on demand
+const PAGE_SIZE = 20;
+
 export function HistoryPanel() {
   const { toast } = useToast();
   const queryClient = useQueryClient();
 
-  const { data: history, isLoading, error, refetch } = useQuery({
+  const { data, isLoading, error, refetch, fetchNextPage, hasNextPage, isFetchingNextPage } = useInfiniteQuery({
     queryKey: ['chat-history'],
-    queryFn: () => apiClient.getHistory(),
+    queryFn: ({ pageParam }) => apiClient.getHistory(PAGE_SIZE, pageParam),
+    initialPageParam: undefined as string | undefined,
+    getNextPageParam: (lastPage) => lastPage.next_cursor ?? undefined,
   });
 
+  // Pages run newest to oldest; show the conversation oldest first
+  const messages = data ? [...data.pages].reverse().flatMap((page) => page.history) : [];
+  const total = data?.pages[0]?.total ?? messages.length;
+  const firstNumber = total - messages.length + 1;
+
   const clearHistoryMutation = useMutation({
     mutationFn: () => apiClient.clearHistory(),
     onSuccess: () => {
@@ -85,7 +95,7 @@ export function HistoryPanel() {
             variant="destructive" 
             size="sm" 
             onClick={handleClearHistory}
-            disabled={clearHistoryMutation.isPending || !history?.history?.length}
+            disabled={clearHistoryMutation.isPending || !messages.length}
           >
             <Trash2 className="h-4 w-4 mr-2" />
             Clear History
@@ -98,9 +108,9 @@ export function HistoryPanel() {
           <CardTitle className="flex items-center gap-2">
             <History className="h-5 w-5" />
             Chat Messages
-            {history?.history && (
+            {data && (
               <Badge variant="secondary">
-                {history.history.length} messages
+                {total} messages
               </Badge>
             )}
           </CardTitle>
@@ -118,7 +128,7 @@ export function HistoryPanel() {
               </div>
             )}
 
-            {!isLoading && (!history?.history || history.history.length === 0) && (
+            {!isLoading && messages.length === 0 && (
               <div className="text-center py-12 text-muted-foreground px-6">
                 <History className="h-12 w-12 mx-auto mb-4 opacity-50" />
                 <p className="text-lg mb-2">No conversation history</p>
@@ -126,9 +136,18 @@ export function HistoryPanel() {
               </div>
             )}
 
-            {history?.history && history.history.length > 0 && (
+            {messages.length > 0 && (
               <div className="space-y-4 p-6">
-                {history.history.map((message, index) => (
+                {hasNextPage && (
+                  <div className="flex justify-center">
+                    <Button variant="outline" size="sm" onClick={() => fetchNextPage()} disabled={isFetchingNextPage}>
+                      {isFetchingNextPage && <Loader2 className="h-4 w-4 mr-2 animate-spin" />}
+                      Load earlier messages
+                    </Button>
+                  </div>
+                )}
+
+                {messages.map((message, index) => (
                   <div
                     key={index}
                     className={cn(
@@ -151,7 +170,7 @@ export function HistoryPanel() {
                           {message.role === 'user' ? 'You' : 'Assistant'}
                         </Badge>
                         <span className="text-xs text-muted-foreground">
-                          Message #{index + 1}
+                          Message #{firstNumber + index}
                         </span>
                       </div>
                       <Card className={cn(
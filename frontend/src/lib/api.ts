@@ -1,8 +1,31 @@
 const API_BASE_URL = 'http://localhost:8000';
+const SESSION_STORAGE_KEY = 'pm-copilot-session-id';
+
+function getSessionId(): string {
+  let sessionId = localStorage.getItem(SESSION_STORAGE_KEY);
+  if (!sessionId) {
+    sessionId = crypto.randomUUID();
+    localStorage.setItem(SESSION_STORAGE_KEY, sessionId);
+  }
+  return sessionId;
+}
+
+export interface SearchFilters {
+  types?: DocumentType[];
+  sources?: string[];
+  row_start?: number;
+  row_end?: number;
+}
+
+export type DocumentType = 'prds' | 'sprints' | 'roadmaps';
 
 export interface ChatRequest {
   message: string;
   include_sources?: boolean;
+  session_id?: string;
+  bypass_cache?: boolean;
+  filters?: SearchFilters;
+  route?: boolean;
 }
 
 export interface ChatResponse {
@@ -11,6 +34,7 @@ export interface ChatResponse {
   timestamp: number;
   sources?: Source[];
   error?: boolean;
+  cached?: boolean;
 }
 
 export interface Source {
@@ -20,21 +44,32 @@ export interface Source {
   source: string;
 }
 
+export type SearchField = 'id' | 'content' | 'snippet' | 'metadata' | 'type' | 'source';
+
 export interface SearchRequest {
   query: string;
   k?: number;
+  fields?: SearchField[];
+  snippet_chars?: number;
+  cursor?: string;
+  filters?: SearchFilters;
+  route?: boolean;
 }
 
 export interface SearchResponse {
   documents: Document[];
   query: string;
+  next_cursor?: string | null;
 }
 
+// Which fields are present depends on the `fields` requested
 export interface Document {
-  content: string;
-  metadata: Record<string, any>;
-  type: string;
-  source: string;
+  id?: string;
+  content?: string;
+  snippet?: string;
+  metadata?: Record<string, any>;
+  type?: string;
+  source?: string;
 }
 
 export interface StatsResponse {
@@ -43,6 +78,8 @@ export interface StatsResponse {
   dimension: number;
   namespaces: Record<string, any>;
   index_fullness: number;
+  memory?: Record<string, any>;
+  stats_age_seconds?: number;
 }
 
 export interface HistoryResponse {
@@ -50,6 +87,9 @@ export interface HistoryResponse {
     role: string;
     content: string;
   }>;
+  session_id: string;
+  total?: number;
+  next_cursor?: string | null;
 }
 
 export interface HealthResponse {
@@ -93,7 +133,7 @@ class APIClient {
   async chat(request: ChatRequest): Promise<ChatResponse> {
     return this.request<ChatResponse>('/chat', {
       method: 'POST',
-      body: JSON.stringify(request),
+      body: JSON.stringify({ session_id: getSessionId(), ...request }),
     });
   }
 
@@ -108,12 +148,15 @@ class APIClient {
     return this.request<StatsResponse>('/stats');
   }
 
-  async getHistory(): Promise<HistoryResponse> {
-    return this.request<HistoryResponse>('/history');
+  async getHistory(limit?: number, cursor?: string): Promise<HistoryResponse> {
+    const params = new URLSearchParams({ session_id: getSessionId() });
+    if (limit) params.set('limit', String(limit));
+    if (cursor) params.set('cursor', cursor);
+    return this.request<HistoryResponse>(`/history?${params}`);
   }
 
   async clearHistory(): Promise<{ message: string }> {
-    return this.request<{ message: string }>('/history', {
+    return this.request<{ message: string }>(`/history?session_id=${encodeURIComponent(getSessionId())}`, {
       method: 'DELETE',
     });
   }